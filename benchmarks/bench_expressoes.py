@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mede a análise sintática de expressões longas e profundamente aninhadas, que a
+antiga descida recursiva não conseguia tratar sem estourar o limite de recursão.
+
+Uso:
+    python3 benchmarks/bench_expressoes.py [--operandos 100000] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from analisador_lexico import analise_lexica
+from analisador_sintatico import Parser
+
+
+def gerar_casos(operandos):
+    """Retorna (nome, código) para uma expressão encadeada e uma profundamente aninhada"""
+    operadores = ["+", "-", "*", "<", "&&", "||"]
+    encadeada = " ".join(f"x {operadores[i % len(operadores)]}" for i in range(operandos - 1)) + " x"
+    aninhada = "(" * operandos + "x" + ")" * operandos
+    return [
+        ("encadeada", f"inteiro x; x = {encadeada};"),
+        ("aninhada", f"inteiro x; x = !{aninhada};"),
+    ]
+
+
+def medir(tokens, repeticoes):
+    """Retorna o melhor tempo (em segundos) da análise sintática e os erros da última execução"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        parser = Parser(tokens)
+        inicio = time.perf_counter()
+        parser.parse()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, parser.errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do analisador de expressões")
+    parser.add_argument("--operandos", type=int, default=100000, help="Operandos (ou níveis de parênteses) por expressão")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Número de repetições por caso")
+    args = parser.parse_args()
+
+    print(f"Limite de recursão do Python: {sys.getrecursionlimit()}")
+    for nome, codigo in gerar_casos(args.operandos):
+        tokens, erros_lexicos = analise_lexica(codigo)
+        tokens = list(tokens)
+        tempo, erros = medir(tokens, args.repeticoes)
+        if erros_lexicos or erros:
+            print(f"❌ {nome}: erros inesperados: {(erros_lexicos + erros)[:3]}")
+            sys.exit(1)
+        print(f"{nome}: {len(tokens)} tokens em {tempo:.3f} s ({len(tokens) / tempo / 1e6:.2f} M tokens/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mede separadamente as fases do compilador (analise_lexica, Parser.parse,
+AnalisadorSemantico.analyze_ast e CodeGenerator.generate) em programas gerados
+por gerador_programas.py, com formas diferentes: muitas funções, aninhamento
+profundo, expressões longas e muitos comentários. Cada fase é medida sobre o
+resultado da anterior, e o relatório mostra tokens/s e nós da AST/s.
+
+Com --saida, os resultados são gravados em JSON; com --comparar, cada fase é
+comparada com um JSON gravado antes, e o script termina com código 1 se alguma
+ficou mais lenta que a tolerância.
+
+Uso:
+    python3 benchmarks/bench_fases.py [--escala 1.0] [--cenarios funcoes aninhamento] [--semente 0]
+                                      [--repeticoes 3] [--saida atual.json] [--comparar base.json]
+                                      [--tolerancia 0.1]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from analisador_lexico import analise_lexica
+from analisador_sintatico import Parser
+from analisador_semantico import AnalisadorSemantico
+from gerador_codigo import CodeGenerator
+from nos_ast import contar_nos
+from simbolos import TabelaSimbolos
+from gerador_programas import gerar_programa
+
+# Formato do JSON gravado por --saida
+VERSAO_RESULTADOS = 1
+
+# Parâmetros de gerar_programa de cada cenário na escala 1; --escala multiplica o
+# número de funções
+CENARIOS = {
+    "funcoes": {"funcoes": 2000, "profundidade": 1, "operandos": 4, "comentarios": 0.05},
+    "aninhamento": {"funcoes": 20, "profundidade": 9, "operandos": 4, "comentarios": 0.05},
+    "expressoes": {"funcoes": 100, "profundidade": 1, "operandos": 400, "comentarios": 0.05},
+    "comentarios": {"funcoes": 500, "profundidade": 2, "operandos": 4, "comentarios": 0.9},
+}
+
+FASES = ("lexica", "sintatica", "semantica", "geracao")
+
+
+def medir(funcao, repeticoes):
+    """Retorna o melhor tempo (em segundos) e o resultado da última execução"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def medir_cenario(codigo, repeticoes):
+    """Tempos de cada fase sobre codigo, com tokens/s e nós/s, ou None se houver erros"""
+    def lexica():
+        return analise_lexica(codigo, TabelaSimbolos())
+
+    def sintatica():
+        parser = Parser(fluxo)
+        return parser.parse(), parser.errors
+
+    def semantica():
+        analisador = AnalisadorSemantico(tabela_simbolos=TabelaSimbolos())
+        analisador.analyze_ast(ast)
+        return analisador.errors
+
+    def geracao():
+        return CodeGenerator(ast, fluxo=fluxo).generate()
+
+    tempos = {}
+    tempos["lexica"], (fluxo, erros) = medir(lexica, repeticoes)
+    if erros:
+        return None
+    tempos["sintatica"], (ast, erros) = medir(sintatica, repeticoes)
+    if erros:
+        return None
+    tempos["semantica"], erros = medir(semantica, repeticoes)
+    if erros:
+        return None
+    tempos["geracao"], _ = medir(geracao, repeticoes)
+
+    tokens = len(fluxo)
+    nos = contar_nos(ast)
+    return {
+        "bytes": len(codigo.encode("utf-8")),
+        "linhas": codigo.count("\n"),
+        "tokens": tokens,
+        "nos": nos,
+        "fases": {fase: {"segundos": tempos[fase], "tokens_por_s": tokens / tempos[fase],
+                         "nos_por_s": nos / tempos[fase]}
+                  for fase in FASES},
+    }
+
+
+def comparar(resultados, base, tolerancia):
+    """Imprime a variação de cada fase em relação a base; retorna as fases mais lentas que a tolerância"""
+    regressoes = []
+    for nome, cenario in resultados["cenarios"].items():
+        anterior = base["cenarios"].get(nome)
+        if anterior is None:
+            continue
+        if (anterior["tokens"], anterior["nos"]) != (cenario["tokens"], cenario["nos"]):
+            print(f"⚠ {nome}: programa diferente do da base (outra escala ou semente?), não comparado")
+            continue
+        for fase in FASES:
+            atual = cenario["fases"][fase]["segundos"]
+            antes = anterior["fases"][fase]["segundos"]
+            variacao = atual / antes - 1
+            marca = "❌" if variacao > tolerancia else "  "
+            print(f"{marca} {nome:12} {fase:10} {antes:8.3f} s -> {atual:8.3f} s ({variacao:+.1%})")
+            if variacao > tolerancia:
+                regressoes.append((nome, fase))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por fase do compilador")
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica o número de funções de cada cenário")
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS),
+                        help="Cenários medidos")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do gerador de programas")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Número de repetições por fase")
+    parser.add_argument("--saida", help="Arquivo JSON onde os resultados são gravados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior usado como base")
+    parser.add_argument("--tolerancia", type=float, default=0.1,
+                        help="Aumento relativo de tempo aceito antes de uma fase contar como regressão")
+    args = parser.parse_args()
+
+    resultados = {
+        "versao": VERSAO_RESULTADOS,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "escala": args.escala,
+        "semente": args.semente,
+        "repeticoes": args.repeticoes,
+        "cenarios": {},
+    }
+    for nome in args.cenarios:
+        parametros = dict(CENARIOS[nome], semente=args.semente)
+        parametros["funcoes"] = max(1, int(parametros["funcoes"] * args.escala))
+        codigo = gerar_programa(**parametros)
+        cenario = medir_cenario(codigo, args.repeticoes)
+        if cenario is None:
+            print(f"❌ {nome}: o programa gerado tem erros")
+            sys.exit(1)
+        cenario["parametros"] = parametros
+        resultados["cenarios"][nome] = cenario
+        print(f"{nome}: {cenario['bytes'] / 1e6:.1f} MB, {cenario['tokens']} tokens, {cenario['nos']} nós")
+        for fase in FASES:
+            medida = cenario["fases"][fase]
+            print(f"  {fase:10} {medida['segundos']:8.3f} s  {medida['tokens_por_s'] / 1e6:6.2f} M tokens/s  "
+                  f"{medida['nos_por_s'] / 1e6:6.2f} M nós/s")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"✅ Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("versao") != VERSAO_RESULTADOS:
+            print(f"❌ {args.comparar} foi gravado em outro formato")
+            sys.exit(1)
+        regressoes = comparar(resultados, base, args.tolerancia)
+        if regressoes:
+            print(f"❌ {len(regressoes)} fases mais lentas que a base além de {args.tolerancia:.0%}")
+            sys.exit(1)
+        print("✅ Nenhuma regressão em relação à base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compara a vazão (MB/s) do analisador léxico com despacho pelo primeiro caractere
+(varrer) com a da expressão regular de alternativas (varrer_regex).
+
+Uso:
+    python3 benchmarks/bench_lexico.py [--mb 5] [--repeticoes 3] [--arquivo caminho]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from analisador_lexico import varrer, varrer_regex
+
+
+def medir(motor, codigo, repeticoes):
+    """Retorna o melhor tempo (em segundos) de uma varredura completa"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in motor(codigo):
+            pass
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do analisador léxico")
+    parser.add_argument("--mb", type=float, default=5.0, help="Tamanho aproximado da entrada em MB")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Número de repetições por motor")
+    parser.add_argument("--arquivo", default=os.path.join(project_root, "examples", "codigo.txt"),
+                        help="Arquivo Coins repetido até atingir o tamanho pedido")
+    args = parser.parse_args()
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        base = f.read()
+    repeticoes_base = max(1, int(args.mb * 1024 * 1024 / len(base.encode("utf-8"))))
+    codigo = base * repeticoes_base
+    tamanho_mb = len(codigo.encode("utf-8")) / (1024 * 1024)
+
+    if list(varrer(codigo)) != list(varrer_regex(codigo)):
+        print("❌ Os motores produziram tokens diferentes!")
+        sys.exit(1)
+
+    print(f"Entrada: {tamanho_mb:.2f} MB ({args.arquivo} x {repeticoes_base})")
+    tempo_regex = medir(varrer_regex, codigo, args.repeticoes)
+    tempo_despacho = medir(varrer, codigo, args.repeticoes)
+    print(f"varrer_regex: {tempo_regex:.3f} s  ({tamanho_mb / tempo_regex:.2f} MB/s)")
+    print(f"varrer:       {tempo_despacho:.3f} s  ({tamanho_mb / tempo_despacho:.2f} MB/s)")
+    print(f"Aceleração: {tempo_regex / tempo_despacho:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
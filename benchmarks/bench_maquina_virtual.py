@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compara a máquina virtual de registradores com a execução do código Python gerado
+(exec do texto de CodeGenerator e do objeto de código do backend bytecode), em
+programas com laços, chamadas de função, recursão e variáveis globais alteradas
+por subrotinas no meio de uma expressão. Os valores finais das variáveis globais
+das três execuções devem ser iguais.
+
+Uso:
+    python3 benchmarks/bench_maquina_virtual.py [--iteracoes 300000] [--fib 22] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from compilador import compile_source, CompileOptions
+from gerador_bytecode import gerar_bytecode
+from maquina_virtual import MaquinaVirtual, traduzir
+
+
+def gerar_casos(iteracoes, fib):
+    """Retorna (nome, código) de cada programa medido"""
+    laco = f"""
+inteiro i, soma, pares;
+i = 0;
+soma = 0;
+pares = 0;
+enquanto (i < {iteracoes}) {{
+    se (i % 2 == 0) {{
+        pares = pares + 1;
+    }} senao {{
+        soma = soma + i * 3 - 1;
+    }}
+    i = i + 1;
+}}
+"""
+    recursao = f"""
+inteiro resultado;
+funcao fib(inteiro n) retorna inteiro {{
+    se (n < 2) {{
+        retorna n;
+    }}
+    retorna fib(n - 1) + fib(n - 2);
+}}
+resultado = fib({fib});
+"""
+    chamadas = f"""
+inteiro i, total;
+real media;
+funcao quadrado(inteiro x) retorna inteiro {{
+    retorna x * x;
+}}
+funcao soma_quadrados(inteiro a, inteiro b) retorna inteiro {{
+    inteiro parcial;
+    parcial = quadrado(a) + quadrado(b);
+    retorna parcial % 1000;
+}}
+i = 0;
+total = 0;
+enquanto (i < {iteracoes // 4}) {{
+    total = total + soma_quadrados(i, i + 1);
+    i = i + 1;
+}}
+media = total / i;
+"""
+    # Operandos globais lidos antes de uma chamada que os altera, no programa principal
+    globais = f"""
+inteiro i, g, r, maiores;
+funcao altera() retorna inteiro {{
+    g = g + 10;
+    retorna 1;
+}}
+i = 0;
+r = 0;
+maiores = 0;
+enquanto (i < {iteracoes // 4}) {{
+    g = i;
+    r = r + (g - altera());
+    se (g < altera() + i + 15) {{
+        maiores = maiores + 1;
+    }}
+    i = i + 1;
+}}
+"""
+    return [("laco", laco), ("recursao", recursao), ("chamadas", chamadas), ("globais", globais)]
+
+
+def medir(funcao, repeticoes):
+    """Retorna o melhor tempo (em segundos) e o resultado da última execução"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da máquina virtual")
+    parser.add_argument("--iteracoes", type=int, default=300000, help="Voltas dos programas com laço")
+    parser.add_argument("--fib", type=int, default=22, help="Argumento do fibonacci recursivo")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Número de repetições por caso")
+    args = parser.parse_args()
+
+    falhas = 0
+    for nome, codigo in gerar_casos(args.iteracoes, args.fib):
+        result = compile_source(codigo, CompileOptions())
+        if not result.success:
+            print(f"❌ {nome}: erros inesperados: {result.diagnostics.mensagens()[:3]}")
+            sys.exit(1)
+        nomes = list(traduzir(result.ast).globais)
+        codigo_objeto = compile(result.code, "<codigo_gerado>", "exec")
+        bytecode = gerar_bytecode(result.ast)
+
+        def executar_python(objeto):
+            variaveis = {}
+            exec(objeto, variaveis)
+            return {nome: variaveis[nome] for nome in nomes}
+
+        tempo_vm, globais_vm = medir(lambda: MaquinaVirtual(traduzir(result.ast)).executar(), args.repeticoes)
+        tempo_texto, globais_texto = medir(lambda: executar_python(codigo_objeto), args.repeticoes)
+        tempo_bytecode, globais_bytecode = medir(lambda: executar_python(bytecode), args.repeticoes)
+        if not globais_vm == globais_texto == globais_bytecode:
+            print(f"❌ {nome}: resultados diferentes: {globais_vm} {globais_texto} {globais_bytecode}")
+            falhas += 1
+            continue
+        print(f"{nome}: máquina virtual {tempo_vm:.3f} s, exec do código gerado {tempo_texto:.3f} s "
+              f"({tempo_vm / tempo_texto:.1f}x), exec do bytecode {tempo_bytecode:.3f} s")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
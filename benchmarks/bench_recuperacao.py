@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verifica que a recuperação de erros do analisador sintático mantém o trabalho
+linear no número de tokens: analisa fluxos de tokens aleatórios (lexemas válidos
+em ordem sem sentido) e entradas adversárias (chaves e parênteses aninhados,
+cabeçalhos de subrotina repetidos) em tamanhos crescentes e compara o tempo por
+token do maior tamanho com o do menor.
+
+O script termina com código 1 se o tempo por token crescer mais que a tolerância,
+se a análise levantar uma exceção (ex.: RecursionError) ou se parar antes do fim
+da entrada.
+
+Uso:
+    python3 benchmarks/bench_recuperacao.py [--megabytes 1 2 4] [--semente 0] [--repeticoes 3]
+                                            [--tolerancia 1.0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from analisador_lexico import analise_lexica
+from analisador_sintatico import Parser
+from simbolos import TabelaSimbolos
+
+# Lexemas sorteados para os fluxos aleatórios, com pesos que aproximam código real
+# (mais identificadores, números e pontuação que palavras reservadas). '}' é um pouco
+# mais frequente que '{' para que os blocos abertos ao acaso se fechem; do contrário,
+# a recuperação descartaria quase toda a entrada como um único bloco.
+LEXEMAS = (
+    ("x", 8), ("total", 4), ("f", 2), ("1", 6), ("2.5", 2), ('"texto"', 2),
+    ("inteiro", 3), ("real", 1), ("texto", 1), ("se", 2), ("senao", 1), ("enquanto", 2),
+    ("procedimento", 1), ("funcao", 1), ("retorna", 2),
+    ("+", 3), ("-", 2), ("*", 2), ("/", 1), ("<", 1), ("==", 1), ("&&", 1), ("||", 1), ("!", 1),
+    ("=", 4), (";", 6), (",", 2), ("(", 4), (")", 4), ("{", 2), ("}", 3),
+    ("// comentário\n", 1), ("/* bloco */", 1),
+)
+
+
+def fluxo_aleatorio(tamanho, semente):
+    """Texto com cerca de tamanho bytes de lexemas sorteados, separados por espaços"""
+    aleatorio = random.Random(semente)
+    lexemas = [lexema for lexema, _ in LEXEMAS]
+    pesos = [peso for _, peso in LEXEMAS]
+    partes = []
+    total = 0
+    while total < tamanho:
+        bloco = aleatorio.choices(lexemas, pesos, k=4096)
+        partes.append(" ".join(bloco))
+        total += len(partes[-1]) + 1
+    return "\n".join(partes)
+
+
+def repetir(trecho):
+    """Entrada formada por trecho repetido até o tamanho pedido"""
+    def gerar(tamanho, semente):
+        return trecho * max(1, tamanho // len(trecho))
+    return gerar
+
+
+# Entradas medidas: cada uma recebe o tamanho em bytes e a semente
+ENTRADAS = {
+    "aleatoria": fluxo_aleatorio,
+    "chaves_abertas": repetir("{ "),
+    "blocos_aninhados": repetir("se (x) { "),
+    "parenteses": repetir("x = ((((((((( "),
+    "cabecalhos": repetir("funcao inteiro f(inteiro a) { retorna a; } "),
+    "fechamentos": repetir("} ) ; "),
+}
+
+
+def medir_entrada(texto, repeticoes):
+    """Melhor tempo da análise sintática, tokens, erros reportados e erros em cascata"""
+    fluxo, _ = analise_lexica(texto, TabelaSimbolos())
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        parser = Parser(fluxo)
+        inicio = time.perf_counter()
+        parser.parse()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    if parser.current_token_index != len(fluxo):
+        raise AssertionError(f"a análise parou no token {parser.current_token_index} de {len(fluxo)}")
+    return melhor, len(fluxo), len(parser.errors), parser.suprimidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica que a recuperação de erros do analisador sintático é linear")
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1, 2, 4],
+                        help="Tamanhos de cada entrada, em MB")
+    parser.add_argument("--entradas", nargs="+", choices=list(ENTRADAS), default=list(ENTRADAS),
+                        help="Entradas medidas")
+    parser.add_argument("--semente", type=int, default=0, help="Semente dos fluxos aleatórios")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Número de repetições por tamanho")
+    parser.add_argument("--tolerancia", type=float, default=1.0,
+                        help="Aumento relativo do tempo por token, do menor ao maior tamanho, aceito")
+    args = parser.parse_args()
+
+    tamanhos = sorted(args.megabytes)
+    falhas = []
+    for nome in args.entradas:
+        print(f"{nome}:")
+        por_token = []
+        for megabytes in tamanhos:
+            texto = ENTRADAS[nome](int(megabytes * 1024 * 1024), args.semente)
+            try:
+                segundos, tokens, erros, cascata = medir_entrada(texto, args.repeticoes)
+            except (RecursionError, AssertionError) as e:
+                print(f"  ❌ {megabytes:5.1f} MB: {type(e).__name__}: {e}")
+                falhas.append(nome)
+                break
+            por_token.append(segundos / tokens)
+            print(f"  {megabytes:5.1f} MB {tokens:9} tokens {segundos:8.3f} s  "
+                  f"{tokens / segundos / 1e6:6.2f} M tokens/s  {erros:8} erros  {cascata:8} em cascata")
+        else:
+            variacao = por_token[-1] / por_token[0] - 1
+            if variacao > args.tolerancia:
+                print(f"  ❌ tempo por token {variacao:+.0%} do menor ao maior tamanho")
+                falhas.append(nome)
+
+    if falhas:
+        print(f"❌ Análise não linear ou com falha em: {', '.join(falhas)}")
+        sys.exit(1)
+    print("✅ Tempo por token estável em todas as entradas")
+
+
+if __name__ == "__main__":
+    main()
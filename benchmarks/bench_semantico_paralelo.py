@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mede a análise semântica de um programa com milhares de funções, sequencial
+(AnalisadorSemantico) e em duas fases com os corpos das subrotinas em paralelo
+(analise_paralela), conferindo que os diagnósticos saem iguais e na mesma ordem.
+
+Uso:
+    python3 benchmarks/bench_semantico_paralelo.py [--funcoes 5000] [--jobs 1 2 4] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from analisador_lexico import analise_lexica
+from analisador_sintatico import Parser
+from analisador_semantico import AnalisadorSemantico
+from analise_paralela import analisar_em_paralelo
+from simbolos import TabelaSimbolos
+
+
+def gerar_programa(funcoes):
+    """Programa com funções que usam variáveis globais e chamam as anteriores; uma em cada 100 tem um erro"""
+    partes = ["inteiro total, contador;", "real media;", "total = 0;"]
+    for i in range(funcoes):
+        chamada = f" + f{i - 1}(a, b % 7)" if i else ""
+        erro = " indefinida = 1;" if i % 100 == 99 else ""
+        partes.append(f"""
+funcao f{i}(inteiro a, inteiro b) retorna inteiro {{
+    inteiro parcial, j;
+    parcial = a * {i % 13} + b;
+    j = 0;
+    enquanto (j < b) {{
+        se (parcial % 2 == 0) {{
+            parcial = parcial / 2 + j;
+        }} senao {{
+            parcial = parcial * 3 + 1;
+        }}
+        j = j + 1;
+    }}
+    contador = contador + 1;{erro}
+    retorna parcial{chamada};
+}}""")
+        if i % 50 == 0:
+            partes.append(f"total = total + f{i}({i}, 3);")
+    partes.append("media = total / 2;")
+    return "\n".join(partes)
+
+
+def medir(funcao, repeticoes):
+    """Retorna o melhor tempo (em segundos) e o resultado da última execução"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da análise semântica em paralelo")
+    parser.add_argument("--funcoes", type=int, default=5000, help="Número de funções do programa gerado")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4], help="Números de processos medidos")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Número de repetições por caso")
+    args = parser.parse_args()
+
+    codigo = gerar_programa(args.funcoes)
+    tabela = TabelaSimbolos()
+    fluxo, _ = analise_lexica(codigo, tabela)
+    ast = Parser(fluxo).parse()
+
+    def sequencial():
+        analisador = AnalisadorSemantico(tabela_simbolos=tabela)
+        analisador.analyze_ast(ast)
+        return analisador.errors, analisador.warnings
+
+    def paralelo(jobs):
+        analisador = analisar_em_paralelo(ast, jobs, tabela_simbolos=tabela)
+        return analisador.errors, analisador.warnings
+
+    tempo_sequencial, esperado = medir(sequencial, args.repeticoes)
+    print(f"{args.funcoes} funções, {len(codigo) / 1e6:.1f} MB, {len(esperado[0])} erros; "
+          f"{os.cpu_count()} CPUs")
+    print(f"sequencial: {tempo_sequencial:.3f} s")
+    falhas = 0
+    for jobs in args.jobs:
+        tempo, resultado = medir(lambda: paralelo(jobs), args.repeticoes)
+        if resultado != esperado:
+            print(f"❌ {jobs} processos: diagnósticos diferentes da análise sequencial")
+            falhas += 1
+            continue
+        print(f"{jobs} processos: {tempo:.3f} s ({tempo_sequencial / tempo:.2f}x)")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gera programas Coins válidos (sem erros léxicos, sintáticos ou semânticos) de
+tamanho e forma configuráveis, para os benchmarks. A mesma semente e os mesmos
+parâmetros geram sempre o mesmo programa.
+
+Uso:
+    python3 benchmarks/gerador_programas.py [--funcoes 1000] [--profundidade 3] [--operandos 8]
+                                            [--comentarios 0.2] [--semente 0] [--saida programa.coins]
+"""
+
+import argparse
+import random
+import sys
+
+# Operadores de expressões inteiras e de condições. "!=" fica de fora porque o
+# analisador léxico o divide em "!" e "=" (ver analisador_lexico.despacho)
+OPERADORES_ARITMETICOS = ("+", "-", "*", "%")
+OPERADORES_RELACIONAIS = ("<", "<=", ">", ">=", "==")
+OPERADORES_LOGICOS = ("&&", "||")
+
+# Variáveis locais de cada função, além dos parâmetros a e b
+LOCAIS = ("v0", "v1", "v2", "v3")
+
+
+class GeradorProgramas:
+    """
+    Monta o texto de um programa Coins com funcoes funções inteiras, cada uma com
+    blocos se/enquanto aninhados até profundidade níveis, expressões com operandos
+    operandos e, em uma fração comentarios dos comandos, um comentário antes do
+    comando. As funções chamam as anteriores, e o programa termina com comandos de
+    nível superior que chamam parte delas.
+    """
+
+    def __init__(self, funcoes=1000, profundidade=3, operandos=8, comentarios=0.2, semente=0):
+        self.funcoes = funcoes
+        self.profundidade = profundidade
+        self.operandos = max(1, operandos)
+        self.comentarios = comentarios
+        self.aleatorio = random.Random(semente)
+        self.partes = []
+
+    def gerar(self):
+        self.partes = ["inteiro total, contador;", "total = 0;", "contador = 0;"]
+        for indice in range(self.funcoes):
+            self.comentario(0)
+            self.funcao(indice)
+            if indice % 10 == 0:
+                self.partes.append(f"total = total + f{indice}({indice}, contador);")
+        return "\n".join(self.partes) + "\n"
+
+    def comentario(self, nivel):
+        aleatorio = self.aleatorio
+        if aleatorio.random() >= self.comentarios:
+            return
+        recuo = "    " * nivel
+        if aleatorio.random() < 0.5:
+            self.partes.append(f"{recuo}// Comentário de linha {aleatorio.randrange(1000)}")
+        else:
+            linhas = "\n".join(f"{recuo}   texto do comentário {i}" for i in range(aleatorio.randint(1, 3)))
+            self.partes.append(f"{recuo}/*\n{linhas}\n{recuo}*/")
+
+    def funcao(self, indice):
+        self.partes.append(f"funcao f{indice}(inteiro a, inteiro b) retorna inteiro {{")
+        self.partes.append(f"    inteiro {', '.join(LOCAIS)};")
+        for local in LOCAIS:
+            self.partes.append(f"    {local} = {self.expressao(indice)};")
+        self.bloco(indice, 1, self.profundidade)
+        self.partes.append("    contador = contador + 1;")
+        self.partes.append(f"    retorna {self.expressao(indice)};")
+        self.partes.append("}")
+
+    def bloco(self, indice, nivel, restantes):
+        """Comandos do corpo, com um se/senao ou enquanto aninhado enquanto restarem níveis"""
+        aleatorio = self.aleatorio
+        recuo = "    " * nivel
+        for _ in range(2):
+            self.comentario(nivel)
+            self.partes.append(f"{recuo}{aleatorio.choice(LOCAIS)} = {self.expressao(indice)};")
+        if not restantes:
+            return
+        self.comentario(nivel)
+        if aleatorio.random() < 0.5:
+            self.partes.append(f"{recuo}se ({self.condicao(indice)}) {{")
+            self.bloco(indice, nivel + 1, restantes - 1)
+            self.partes.append(f"{recuo}}} senao {{")
+            self.bloco(indice, nivel + 1, restantes - 1)
+            self.partes.append(f"{recuo}}}")
+        else:
+            self.partes.append(f"{recuo}enquanto ({self.condicao(indice)}) {{")
+            self.bloco(indice, nivel + 1, restantes - 1)
+            self.partes.append(f"{recuo}}}")
+
+    def operando(self, indice):
+        aleatorio = self.aleatorio
+        sorteio = aleatorio.random()
+        if sorteio < 0.4:
+            return aleatorio.choice(("a", "b") + LOCAIS)
+        if sorteio < 0.8 or not indice:
+            return str(aleatorio.randrange(100))
+        if sorteio < 0.9:
+            return f"({aleatorio.choice(LOCAIS)} {aleatorio.choice(OPERADORES_ARITMETICOS)} {aleatorio.randrange(1, 10)})"
+        # Chamada de uma função anterior, com argumentos curtos
+        return f"f{aleatorio.randrange(indice)}({aleatorio.choice(LOCAIS)}, {aleatorio.randrange(10)})"
+
+    def expressao(self, indice):
+        aleatorio = self.aleatorio
+        partes = [self.operando(indice)]
+        for _ in range(self.operandos - 1):
+            partes.append(aleatorio.choice(OPERADORES_ARITMETICOS))
+            partes.append(self.operando(indice))
+        return " ".join(partes)
+
+    def condicao(self, indice):
+        aleatorio = self.aleatorio
+        comparacao = (f"{self.operando(indice)} {aleatorio.choice(OPERADORES_RELACIONAIS)} "
+                      f"{self.operando(indice)}")
+        if aleatorio.random() < 0.3:
+            comparacao = (f"({comparacao}) {aleatorio.choice(OPERADORES_LOGICOS)} ({aleatorio.choice(LOCAIS)} "
+                          f"{aleatorio.choice(OPERADORES_RELACIONAIS)} {aleatorio.randrange(100)})")
+        return comparacao
+
+
+def gerar_programa(funcoes=1000, profundidade=3, operandos=8, comentarios=0.2, semente=0):
+    """Texto de um programa Coins válido gerado com os parâmetros de GeradorProgramas"""
+    return GeradorProgramas(funcoes, profundidade, operandos, comentarios, semente).gerar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de programas Coins sintéticos")
+    parser.add_argument("--funcoes", type=int, default=1000, help="Número de funções")
+    parser.add_argument("--profundidade", type=int, default=3, help="Níveis de se/enquanto aninhados em cada função")
+    parser.add_argument("--operandos", type=int, default=8, help="Operandos por expressão")
+    parser.add_argument("--comentarios", type=float, default=0.2, help="Fração dos comandos precedidos por um comentário")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do gerador aleatório")
+    parser.add_argument("--saida", help="Arquivo gravado (padrão: saída padrão)")
+    args = parser.parse_args()
+
+    codigo = gerar_programa(args.funcoes, args.profundidade, args.operandos, args.comentarios, args.semente)
+    if args.saida is None:
+        sys.stdout.write(codigo)
+    else:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(codigo)
+
+
+if __name__ == "__main__":
+    main()
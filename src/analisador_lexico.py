@@ -1,6 +1,10 @@
 import re
 import html
 import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from simbolos import TabelaSimbolos
 
 token_specs = [
     ("COMENTARIO_LINHA", r"//.*\n"), # Comentário de linha
@@ -30,52 +34,362 @@ token_specs = [
 ]
 
 tok_regex = "|".join(f"(?P<{name}>{regex})" for name, regex in token_specs)
+padrao_tokens = re.compile(tok_regex)
 
-tabela_simbolos = {}
+# Códigos inteiros dos tipos de token, na mesma ordem de token_specs. Todos cabem
+# em um byte, o que permite guardar o fluxo de tokens em um array('B').
+NOMES_TOKENS = [name for name, _ in token_specs] + ["EOF"]
+CODIGOS_TOKENS = {nome: codigo for codigo, nome in enumerate(NOMES_TOKENS)}
 
-def analise_lexica(codigo):
-    tokens_gerados = []
-    erros_lexicos = []
-    for match in re.finditer(tok_regex, codigo):
-        tipo = match.lastgroup
-        valor = match.group(tipo)
+(T_COMENTARIO_LINHA, T_COMENTARIO_BLOCO, T_SKIP, T_TIPO, T_SE, T_SENAO, T_ENQUANTO,
+ T_PROCEDIMENTO, T_FUNCAO, T_RETORNA, T_ID, T_NUMERO, T_STRING, T_OP_ARIT, T_OP_LOGICO,
+ T_OP_COMP, T_IGUAL, T_PONTO_VIRGULA, T_VIRGULA, T_ABRE_PAREN, T_FECHA_PAREN,
+ T_ABRE_CHAVE, T_FECHA_CHAVE, T_MISMATCH, T_EOF) = range(len(NOMES_TOKENS))
+
+# Token com posição: o tipo é um dos códigos T_*; linha e coluna começam em 1.
+Token = namedtuple("Token", ["tipo", "valor", "linha", "coluna"])
+
+def varrer_regex(codigo):
+    """
+    Percorre o código fonte gerando (tipo, inicio, fim) para cada lexema, exceto espaços.
+
+    Implementação de referência: tenta as alternativas de tok_regex em ordem a cada
+    posição. Mantida para comparação com varrer.
+    """
+    for match in padrao_tokens.finditer(codigo):
+        tipo = CODIGOS_TOKENS[match.lastgroup]
+        if tipo != T_SKIP:
+            yield tipo, match.start(), match.end()
+
+padroes = dict(token_specs)
+_re_espacos = re.compile(padroes["SKIP"])
+_re_comentario_linha = re.compile(padroes["COMENTARIO_LINHA"])
+_re_comentario_bloco = re.compile(padroes["COMENTARIO_BLOCO"])
+_re_id = re.compile(padroes["ID"])
+_re_numero = re.compile(padroes["NUMERO"])
+_re_string = re.compile(padroes["STRING"])
+
+# Palavras reservadas são reconhecidas depois do ID, por consulta ao dicionário
+PALAVRAS_RESERVADAS = {
+    "inteiro": T_TIPO, "real": T_TIPO, "texto": T_TIPO,
+    "se": T_SE, "senao": T_SENAO, "enquanto": T_ENQUANTO,
+    "procedimento": T_PROCEDIMENTO, "funcao": T_FUNCAO, "retorna": T_RETORNA,
+}
+
+# Ações da tabela de despacho pelo primeiro caractere. Valores >= 0 são tokens
+# de um único caractere; valores negativos indicam a rotina de reconhecimento.
+(_ESPACO, _LETRA, _DIGITO, _BARRA, _ASPAS, _E_COMERCIAL, _BARRA_VERTICAL,
+ _IGUAL, _MENOR_MAIOR) = range(-1, -10, -1)
+
+despacho = {
+    "+": T_OP_ARIT, "-": T_OP_ARIT, "*": T_OP_ARIT, "%": T_OP_ARIT,
+    "!": T_OP_LOGICO,  # OP_LOGICO vem antes de OP_COMP, então "!=" é "!" seguido de "="
+    ";": T_PONTO_VIRGULA, ",": T_VIRGULA,
+    "(": T_ABRE_PAREN, ")": T_FECHA_PAREN, "{": T_ABRE_CHAVE, "}": T_FECHA_CHAVE,
+    " ": _ESPACO, "\t": _ESPACO, "\n": _ESPACO,
+    "/": _BARRA, "\"": _ASPAS, "&": _E_COMERCIAL, "|": _BARRA_VERTICAL,
+    "=": _IGUAL, "<": _MENOR_MAIOR, ">": _MENOR_MAIOR,
+}
+for _c in "0123456789":
+    despacho[_c] = _DIGITO
+for _c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_":
+    despacho[_c] = _LETRA
+for _c in range(0x00C0, 0x0180):
+    despacho[chr(_c)] = _LETRA
+
+# Caracteres aceitos em identificadores que não são caracteres de palavra para \b.
+# Lexemas que os contêm são delegados ao padrão completo, preservando o resultado exato.
+_FORA_DE_PALAVRA = ("\u00d7", "\u00f7")
+
+def varrer(codigo):
+    """
+    Percorre o código fonte gerando (tipo, inicio, fim) para cada lexema, exceto espaços.
+
+    Escolhe a rotina de reconhecimento pelo primeiro caractere e identifica palavras
+    reservadas por consulta a PALAVRAS_RESERVADAS depois de reconhecer um ID. Os casos
+    raros (caracteres inválidos e lexemas ambíguos) usam padrao_tokens na mesma
+    posição, de modo que o resultado é idêntico ao de varrer_regex.
+    """
+    n = len(codigo)
+    pos = 0
+    acao_de = despacho.get
+    while pos < n:
+        acao = acao_de(codigo[pos])
+        if acao is not None and acao >= 0:
+            yield acao, pos, pos + 1
+            pos += 1
+            continue
 
-        if tipo == "SKIP":
+        if acao == _ESPACO:
+            pos = _re_espacos.match(codigo, pos).end()
+            continue
+        elif acao == _LETRA:
+            match = _re_id.match(codigo, pos)
+            if match is not None:
+                fim = match.end()
+                lexema = codigo[pos:fim]
+                if _FORA_DE_PALAVRA[0] not in lexema and _FORA_DE_PALAVRA[1] not in lexema:
+                    yield PALAVRAS_RESERVADAS.get(lexema, T_ID), pos, fim
+                    pos = fim
+                    continue
+        elif acao == _DIGITO:
+            match = _re_numero.match(codigo, pos)
+            if match is not None:
+                yield T_NUMERO, pos, match.end()
+                pos = match.end()
+                continue
+        elif acao == _BARRA:
+            match = _re_comentario_linha.match(codigo, pos)
+            if match is not None:
+                yield T_COMENTARIO_LINHA, pos, match.end()
+                pos = match.end()
+                continue
+            match = _re_comentario_bloco.match(codigo, pos)
+            if match is not None:
+                yield T_COMENTARIO_BLOCO, pos, match.end()
+                pos = match.end()
+                continue
+            yield T_OP_ARIT, pos, pos + 1
+            pos += 1
+            continue
+        elif acao == _ASPAS:
+            match = _re_string.match(codigo, pos)
+            if match is not None:
+                yield T_STRING, pos, match.end()
+                pos = match.end()
+                continue
+        elif acao == _E_COMERCIAL or acao == _BARRA_VERTICAL:
+            if codigo.startswith("&&" if acao == _E_COMERCIAL else "||", pos):
+                yield T_OP_LOGICO, pos, pos + 2
+                pos += 2
+                continue
+        elif acao == _IGUAL:
+            if codigo.startswith("=", pos + 1):
+                yield T_OP_COMP, pos, pos + 2
+                pos += 2
+            else:
+                yield T_IGUAL, pos, pos + 1
+                pos += 1
             continue
-        elif tipo == "COMENTARIO_LINHA":
-            tokens_gerados.append(("COMENTARIO", valor, "COMENTARIO_LINHA"))
-        elif tipo == "COMENTARIO_BLOCO":
-            tokens_gerados.append(("COMENTARIO", valor, "COMENTARIO_BLOCO"))
-        elif tipo == "MISMATCH":
-            erros_lexicos.append(f"Erro léxico: Caractere inválido \'{valor}\' na posição {match.start()}")
-            # Não adiciona o token MISMATCH à lista de tokens gerados para que o parser não o veja
+        elif acao == _MENOR_MAIOR:
+            fim = pos + 2 if codigo.startswith("=", pos + 1) else pos + 1
+            yield T_OP_COMP, pos, fim
+            pos = fim
+            continue
+
+        # Caso raro: usa o padrão completo na posição atual
+        match = padrao_tokens.match(codigo, pos)
+        yield CODIGOS_TOKENS[match.lastgroup], pos, match.end()
+        pos = match.end()
+
+def _erro_caractere(valor, linha, coluna, inicio):
+    return f"Erro léxico: Caractere inválido \'{valor}\' na linha {linha}, coluna {coluna} (posição {inicio})"
+
+class TabelaComentarios:
+    """
+    Comentários do código fonte, guardados fora do fluxo de tokens para que o
+    analisador sintático não os veja.
+
+    Como FluxoTokens, guarda o tipo (T_COMENTARIO_LINHA ou T_COMENTARIO_BLOCO) e os
+    deslocamentos de início e fim de cada comentário. antes_de é o índice, no
+    FluxoTokens, do token que vem logo depois do comentário (len(fluxo) no fim do
+    arquivo); como os comentários estão em ordem, antes_de é não decrescente.
+    """
+    __slots__ = ("codigo", "tipos", "inicios", "fins", "antes_de")
+
+    def __init__(self, codigo):
+        self.codigo = codigo
+        self.tipos = array("B")
+        self.inicios = array("I")
+        self.fins = array("I")
+        self.antes_de = array("I")
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def valor(self, indice):
+        """Texto do comentário na posição indicada"""
+        return self.codigo[self.inicios[indice]:self.fins[indice]]
+
+    def primeiro_antes_de(self, token):
+        """Índice do primeiro comentário com antes_de >= token"""
+        return bisect_left(self.antes_de, token)
+
+class FluxoTokens:
+    """
+    Sequência compacta de tokens.
+
+    Guarda apenas o código do tipo (array('B')) e os deslocamentos de início e fim
+    de cada lexema no código fonte; o texto do lexema é obtido por fatiamento
+    somente quando pedido. Linha e coluna são calculadas sob demanda a partir de
+    uma tabela com o início de cada linha.
+
+    Os comentários não fazem parte da sequência: ficam em comentarios, uma
+    TabelaComentarios, ou None se foram descartados na análise léxica.
+    """
+    __slots__ = ("codigo", "tipos", "inicios", "fins", "comentarios", "_inicios_linha")
+
+    def __init__(self, codigo, comentarios=True):
+        self.codigo = codigo
+        self.tipos = array("B")
+        self.inicios = array("I")
+        self.fins = array("I")
+        self.comentarios = TabelaComentarios(codigo) if comentarios else None
+        self._inicios_linha = None
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __getitem__(self, indice):
+        inicio = self.inicios[indice]
+        linha, coluna = self.posicao(inicio)
+        return Token(self.tipos[indice], self.codigo[inicio:self.fins[indice]], linha, coluna)
+
+    def __iter__(self):
+        return self.iterar()
+
+    def iterar(self, primeiro=0, ultimo=None):
+        """Produz os objetos Token dos índices primeiro (inclusive) a ultimo (exclusive)"""
+        if ultimo is None:
+            ultimo = len(self.tipos)
+        if primeiro >= ultimo:
+            return
+        codigo = self.codigo
+        if primeiro == 0:
+            linha, inicio_linha, contado_ate = 1, 0, 0
         else:
-            tokens_gerados.append((tipo, valor))
-            if tipo == "ID" and valor not in tabela_simbolos:
-                tabela_simbolos[valor] = {"tipo": "indefinido", "valor": ""}
-    return tokens_gerados, erros_lexicos
+            contado_ate = self.inicios[primeiro]
+            linha, coluna = self.posicao(contado_ate)
+            inicio_linha = contado_ate - coluna + 1
+        for tipo, inicio, fim in zip(self.tipos[primeiro:ultimo], self.inicios[primeiro:ultimo],
+                                     self.fins[primeiro:ultimo]):
+            quebras = codigo.count("\n", contado_ate, inicio)
+            if quebras:
+                linha += quebras
+                inicio_linha = codigo.rfind("\n", contado_ate, inicio) + 1
+            contado_ate = inicio
+            yield Token(tipo, codigo[inicio:fim], linha, inicio - inicio_linha + 1)
+
+    def valor(self, indice):
+        """Texto do lexema na posição indicada"""
+        return self.codigo[self.inicios[indice]:self.fins[indice]]
+
+    def _linhas(self):
+        if self._inicios_linha is None:
+            inicios_linha = array("I", [0])
+            encontrado = self.codigo.find("\n")
+            while encontrado != -1:
+                inicios_linha.append(encontrado + 1)
+                encontrado = self.codigo.find("\n", encontrado + 1)
+            self._inicios_linha = inicios_linha
+        return self._inicios_linha
+
+    def posicao(self, deslocamento):
+        """Converte um deslocamento no código fonte em (linha, coluna)"""
+        inicios_linha = self._linhas()
+        linha = bisect_right(inicios_linha, deslocamento)
+        return linha, deslocamento - inicios_linha[linha - 1] + 1
+
+    def deslocamento(self, linha, coluna):
+        """Converte (linha, coluna) em um deslocamento no código fonte (o inverso de posicao)"""
+        return self._linhas()[linha - 1] + coluna - 1
+
+    def indice_token(self, linha, coluna):
+        """Índice do primeiro token que começa em (linha, coluna) ou depois"""
+        return bisect_left(self.inicios, self.deslocamento(linha, coluna))
+
+def gerar_tokens(codigo, erros_lexicos=None, tabela_simbolos=None):
+    """
+    Gera os tokens do código fonte sob demanda, um por vez.
+
+    A linha e a coluna são calculadas de forma incremental, contando as quebras
+    de linha entre um lexema e o seguinte. Os comentários são descartados.
+
+    Args:
+        codigo: Código fonte a ser analisado.
+        erros_lexicos: Lista opcional onde os erros léxicos são acumulados
+            conforme aparecem.
+        tabela_simbolos: TabelaSimbolos opcional onde os identificadores são registrados.
+    """
+    linha = 1
+    inicio_linha = 0
+    contado_ate = 0
+    for tipo, inicio, fim in varrer(codigo):
+        if tipo <= T_COMENTARIO_BLOCO:
+            continue  # Comentários não chegam ao analisador sintático
+        quebras = codigo.count("\n", contado_ate, inicio)
+        if quebras:
+            linha += quebras
+            inicio_linha = codigo.rfind("\n", contado_ate, inicio) + 1
+        contado_ate = inicio
+        valor = codigo[inicio:fim]
+
+        if tipo == T_MISMATCH:
+            if erros_lexicos is not None:
+                erros_lexicos.append(_erro_caractere(valor, linha, inicio - inicio_linha + 1, inicio))
+            # Não gera o token MISMATCH para que o parser não o veja
+            continue
+        if tipo == T_ID and tabela_simbolos is not None:
+            tabela_simbolos.registrar(valor)
+        yield Token(tipo, valor, linha, inicio - inicio_linha + 1)
+
+def analise_lexica(codigo, tabela_simbolos=None, comentarios=True):
+    """
+    Analisa o código fonte inteiro e retorna (FluxoTokens, erros_lexicos).
+
+    Os tokens ficam em arrays compactos em vez de uma lista de tuplas; iterar
+    sobre o fluxo produz objetos Token um de cada vez. Se tabela_simbolos for
+    informada, os identificadores encontrados são registrados nela. Os comentários
+    vão para fluxo.comentarios; com comentarios=False, são descartados.
+    """
+    erros_lexicos = []
+    fluxo = FluxoTokens(codigo, comentarios)
+    tipos, inicios, fins = fluxo.tipos, fluxo.inicios, fluxo.fins
+    tabela = fluxo.comentarios
+    for tipo, inicio, fim in varrer(codigo):
+        if tipo <= T_COMENTARIO_BLOCO:  # Os comentários têm os dois menores códigos
+            if tabela is not None:
+                tabela.tipos.append(tipo)
+                tabela.inicios.append(inicio)
+                tabela.fins.append(fim)
+                tabela.antes_de.append(len(tipos))
+            continue
+        if tipo == T_MISMATCH:
+            linha, coluna = fluxo.posicao(inicio)
+            erros_lexicos.append(_erro_caractere(codigo[inicio:fim], linha, coluna, inicio))
+            continue
+        tipos.append(tipo)
+        inicios.append(inicio)
+        fins.append(fim)
+        if tipo == T_ID and tabela_simbolos is not None:
+            tabela_simbolos.registrar(codigo[inicio:fim])
+    return fluxo, erros_lexicos
 
-def salvar_html(caminho_arquivo=None):
+def salvar_html(caminho_arquivo=None, tabela_simbolos=None):
     """
     Salva a tabela de símbolos em um arquivo HTML
     
     Args:
         caminho_arquivo: Caminho completo para o arquivo de saída. Se None, usa "tabela_simbolos.html" no diretório atual.
+        tabela_simbolos: TabelaSimbolos da compilação. Se None, salva uma tabela vazia.
     """
     if caminho_arquivo is None:
         caminho_arquivo = "tabela_simbolos.html"
+    if tabela_simbolos is None:
+        tabela_simbolos = TabelaSimbolos()
     
     # Garante que o diretório de saída existe
-    os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
+    directory = os.path.dirname(caminho_arquivo)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
     
     with open(caminho_arquivo, "w", encoding="utf-8") as f:
         f.write("<html><head><meta charset=\'UTF-8\'><title>Tabela de Símbolos</title></head><body>\n")
         f.write("<h2>Tabela de Símbolos</h2>\n")
         f.write("<table border=\'1\'><tr><th>Identificador</th><th>Tipo</th><th>Valor</th></tr>\n")
-        for nome, info in tabela_simbolos.items():
-            f.write(f"<tr><td>{html.escape(nome)}</td><td>{info['tipo']}</td><td>{html.escape(str(info['valor']))}</td></tr>\n")
+        for nome, entrada in tabela_simbolos.items():
+            f.write(f"<tr><td>{html.escape(nome)}</td><td>{entrada.tipo}</td><td>{html.escape(str(entrada.valor))}</td></tr>\n")
         f.write("</table></body></html>\n")
-    print(f"Tabela salva em {caminho_arquivo}!")
 
 if __name__ == "__main__":
     try:
@@ -88,10 +402,11 @@ if __name__ == "__main__":
             if not codigo_fonte.strip():
                 print(f"⚠ O arquivo {codigo_path} está vazio!")
             else:
-                tokens, erros_lexicos = analise_lexica(codigo_fonte)
+                tabela = TabelaSimbolos()
+                tokens, erros_lexicos = analise_lexica(codigo_fonte, tabela)
                 print("Tokens gerados:")
                 for token in tokens:
-                    print(token)
+                    print((NOMES_TOKENS[token.tipo], token.valor, token.linha, token.coluna))
                 
                 if erros_lexicos:
                     print("Erros léxicos encontrados:")
@@ -101,7 +416,8 @@ if __name__ == "__main__":
                 output_dir = os.path.join(project_root, "output")
                 os.makedirs(output_dir, exist_ok=True)
                 tabela_path = os.path.join(output_dir, "tabela_simbolos.html")
-                salvar_html(tabela_path)
+                salvar_html(tabela_path, tabela)
+                print(f"Tabela salva em {tabela_path}!")
     except FileNotFoundError as e:
         print(f"❌ Arquivo não encontrado: {e}")
 
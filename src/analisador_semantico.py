@@ -1,50 +1,223 @@
-import sys
-import os
-from analisador_lexico import tabela_simbolos
+from diagnosticos import ColetorDiagnosticos, EscritorLog, FASE_SEMANTICA, ERRO, AVISO
+from instrumentacao import CATEGORIA_SUBROTINA
+from simbolos import TabelaSimbolos
+from nos_ast import (PROGRAMA, DECLARACAO, ATRIBUICAO, CONDICIONAL, REPETICAO, SUBROUTINE_DECLARATION,
+                     CHAMADA_SUBROTINA, RETORNO, BINARY_EXPRESSION, UNARY_EXPRESSION, LITERAL,
+                     IDENTIFIER)
+
+# Códigos dos tipos usados na inferência de tipos das expressões, na ordem de NOMES_TIPOS
+(INTEIRO, REAL, TEXTO, BOOLEANO, VAZIO, DESCONHECIDO) = range(6)
+NOMES_TIPOS = ("inteiro", "real", "texto", "boolean", "void", "unknown")
+CODIGOS_TIPOS = {nome: codigo for codigo, nome in enumerate(NOMES_TIPOS)}
+# Bit somado ao código guardado em BinaryExpression.tipo e UnaryExpression.tipo
+# quando a subexpressão só tem literais e nenhum diagnóstico: o tipo não depende
+# dos símbolos, e as próximas análises do nó usam o código guardado
+TIPO_FIXO = 8
+
+OPERADORES_ARITMETICOS = ("+", "-", "*", "/", "%")
+OPERADORES_COMPARACAO = ("==", "!=", ">", "<", ">=", "<=")
+OPERADORES_ORDEM = (">", "<", ">=", "<=")
+OPERADORES_LOGICOS = ("&&", "||")
+
+def _inferir(type1, type2, operator):
+    """
+    Tipo resultante de uma operação entre os tipos type1 e type2 (None em operações
+    unárias), com a severidade e a mensagem do diagnóstico, ou None e None
+    """
+    if operator in OPERADORES_ARITMETICOS:
+        if type1 == "texto" or type2 == "texto":
+            return "unknown", ERRO, f"Operação aritmética com tipo texto não permitida: {type1} {operator} {type2}"
+        if type1 == "real" or type2 == "real":
+            return "real", None, None
+        return "inteiro", None, None
+
+    elif operator in OPERADORES_COMPARACAO:
+        if type1 in ("inteiro", "real") and type2 in ("inteiro", "real"):
+            return "boolean", None, None
+        elif type1 == "texto" and type2 == "texto":
+            if operator in OPERADORES_ORDEM:
+                return ("boolean", AVISO,
+                        f"Comparação de ordem ({operator}) entre strings pode ter comportamento inesperado.")
+            return "boolean", None, None
+        else:
+            return "unknown", ERRO, f"Operação de comparação inválida entre {type1} e {type2}"
+
+    elif operator in OPERADORES_LOGICOS:
+        if type1 == "boolean" and type2 == "boolean":
+            return "boolean", None, None
+        else:
+            return "unknown", ERRO, f"Operação lógica inválida entre {type1} e {type2}"
+
+    elif operator == "!":
+        if type1 == "boolean":
+            return "boolean", None, None
+        else:
+            return "unknown", ERRO, f"Operador lógico '!' inválido para o tipo {type1}"
+
+    return "unknown", None, None
+
+def _tabela_operador(operator, unario):
+    """
+    Resultados de operator indexados pelos códigos dos operandos, com ou sem
+    TIPO_FIXO: tabela[tipo1][tipo2] (ou tabela[tipo1] se unario) é a tupla (código do
+    tipo resultante, severidade, mensagem). O resultado tem TIPO_FIXO quando os
+    operandos têm e não há diagnóstico.
+    """
+    codigos = [codigo | fixo for fixo in (0, TIPO_FIXO) for codigo in range(len(NOMES_TIPOS))]
+    tabela = [None] * (2 * TIPO_FIXO)
+    for tipo1 in codigos:
+        linha = [None] * (2 * TIPO_FIXO)
+        for tipo2 in [TIPO_FIXO] if unario else codigos:
+            nome2 = None if unario else NOMES_TIPOS[tipo2 & ~TIPO_FIXO]
+            resultado, severidade, mensagem = _inferir(NOMES_TIPOS[tipo1 & ~TIPO_FIXO], nome2, operator)
+            resultado = CODIGOS_TIPOS[resultado]
+            if severidade is None:
+                resultado |= tipo1 & tipo2 & TIPO_FIXO
+            linha[tipo2] = (resultado, severidade, mensagem)
+        tabela[tipo1] = linha[TIPO_FIXO] if unario else linha
+    return tabela
+
+# Operador -> tabela de _tabela_operador, calculada uma vez para todas as combinações de tipos
+TABELA_OPERACOES = {operador: _tabela_operador(operador, False)
+                    for operador in OPERADORES_ARITMETICOS + OPERADORES_COMPARACAO + OPERADORES_LOGICOS}
+TABELA_UNARIA = {operador: _tabela_operador(operador, True) for operador in ("!", "-")}
+
+def _compatibilidade(expected_type, actual_type):
+    """
+    (compatível, severidade, modelo da mensagem) de um valor de actual_type onde
+    se espera expected_type; o modelo tem {operation} no lugar da operação
+    """
+    if expected_type == "unknown" or actual_type == "unknown":
+        return False, None, None
+    if expected_type == actual_type or (expected_type == "real" and actual_type == "inteiro"):
+        return True, None, None
+    if expected_type == "inteiro" and actual_type == "real":
+        return True, AVISO, "Conversão implícita de real para inteiro em {operation}. Pode haver perda de dados."
+    return (False, ERRO,
+            f"Incompatibilidade de tipos em {{operation}}. Esperado {expected_type}, encontrado {actual_type}.")
+
+# (tipo esperado, tipo encontrado) -> resultado de _compatibilidade
+TABELA_COMPATIBILIDADE = {(esperado, encontrado): _compatibilidade(esperado, encontrado)
+                          for esperado in NOMES_TIPOS for encontrado in NOMES_TIPOS}
+
+class _Entrada:
+    """Símbolo visível por um nome no índice de nomes do analisador semântico"""
+    __slots__ = ("info", "escopo", "vinculo", "anterior", "tipo")
+
+    def __init__(self, info, escopo, vinculo, anterior):
+        self.info = info
+        self.escopo = escopo  # Posição do escopo em scope_stack
+        self.vinculo = vinculo  # (profundidade, slot) de variáveis; None para subrotinas
+        self.anterior = anterior  # Entrada do mesmo nome que esta esconde, em um escopo externo
+        # Código do tipo de variáveis, para analyze_expression; None para subrotinas
+        self.tipo = CODIGOS_TIPOS.get(info["type"]) if vinculo is not None else None
 
 class AnalisadorSemantico:
-    def __init__(self, errors_log_path=None, semantic_errors_log_path=None):
+    """
+    Analisador semântico.
+
+    Além de scope_stack, mantém um índice com o símbolo visível por cada nome: a
+    busca de um nome é uma consulta ao dicionário, qualquer que seja a profundidade
+    dos escopos, e sair de um escopo apenas restaura as entradas que ele escondia.
+
+    Cada variável recebe um vínculo (profundidade, slot): profundidade é o quadro
+    em que ela vive (0 para o programa, mais 1 por subrotina aninhada) e slot, a
+    sua posição nesse quadro. Os parâmetros ocupam os primeiros slots, e os slots
+    das variáveis de um bloco voltam a ficar livres no fim dele. Os nós Identifier
+    e Atribuicao são anotados com o vínculo da variável, que as fases seguintes
+    podem usar no lugar do nome.
+    """
+
+    # analyze_expression lê as variáveis direto do índice, sem chamar get_symbol_info;
+    # subclasses que precisam ver todas as leituras de símbolos desativam
+    LEITURA_DIRETA = True
+
+    def __init__(self, tabela_simbolos=None, diagnosticos=None, instrumentacao=None):
         self.errors = []
         self.warnings = []
         self.scope_stack = [{}]  # Pilha de escopos para controle de variáveis
+        self._indice = {}  # nome -> _Entrada visível
+        self._slots_livres = [0]  # Próximo slot livre de cada quadro (programa e subrotinas)
+        self._marcas = []  # Por escopo aberto: slots livres do quadro na entrada, ou None se abriu um quadro
         self.current_function = None  # Função atual sendo analisada
         self.current_function_return_type = None  # Tipo de retorno da função atual
         self.has_return = False  # Indica se a função atual tem retorno
-        self.errors_log_path = errors_log_path or "errors.log"
-        self.semantic_errors_log_path = semantic_errors_log_path or "semantic_errors.log"
-        
-        # Garante que os diretórios de saída existem (apenas se o caminho tiver um diretório)
-        self._ensure_directory_exists(self.errors_log_path)
-        self._ensure_directory_exists(self.semantic_errors_log_path)
-
-    def _ensure_directory_exists(self, file_path):
-        """Cria o diretório para um arquivo se necessário e se o diretório não for vazio"""
-        directory = os.path.dirname(file_path)
-        if directory:  # Verifica se o diretório não é vazio
-            os.makedirs(directory, exist_ok=True)
+        # Tabela de símbolos da compilação, compartilhada com o analisador léxico
+        self.tabela_simbolos = tabela_simbolos if tabela_simbolos is not None else TabelaSimbolos()
+        # Coletor de diagnósticos compartilhado com as demais fases (opcional)
+        self.diagnosticos = diagnosticos
+        # Instrumentacao que recebe um intervalo por subrotina analisada (opcional)
+        self.instrumentacao = instrumentacao
+        # Tratadores indexados pela TAG do nó
+        self._tratadores_nos = {
+            DECLARACAO: self.analyze_declaration,
+            ATRIBUICAO: self.analyze_assignment,
+            CONDICIONAL: self.analyze_conditional,
+            REPETICAO: self.analyze_loop,
+            SUBROUTINE_DECLARATION: self.analyze_subroutine_declaration,
+            CHAMADA_SUBROTINA: self.analyze_subroutine_call,
+            RETORNO: self.analyze_return,
+            BINARY_EXPRESSION: self.analyze_binary_expression,
+            UNARY_EXPRESSION: self.analyze_unary_expression,
+            IDENTIFIER: self.analyze_identifier,
+            LITERAL: self.analyze_literal,
+        }
+        self._tratadores_expressoes = {
+            IDENTIFIER: self.analyze_identifier,
+            CHAMADA_SUBROTINA: self.analyze_subroutine_call,
+        }
 
     def error(self, message):
         """Registra um erro semântico"""
         self.errors.append(message)
-        with open(self.errors_log_path, "a", encoding="utf-8") as f:
-            f.write(f"ERRO SEMÂNTICO: {message}\n")
-        print(f"ERRO SEMÂNTICO: {message}", file=sys.stderr)
+        if self.diagnosticos is not None:
+            self.diagnosticos.erro(FASE_SEMANTICA, message)
 
     def warning(self, message):
         """Registra um aviso semântico"""
         self.warnings.append(message)
-        with open(self.errors_log_path, "a", encoding="utf-8") as f:
-            f.write(f"AVISO SEMÂNTICO: {message}\n")
-        print(f"AVISO SEMÂNTICO: {message}", file=sys.stderr)
+        if self.diagnosticos is not None:
+            self.diagnosticos.aviso(FASE_SEMANTICA, message)
 
-    def enter_scope(self):
-        """Entra em um novo escopo"""
+    def enter_scope(self, novo_quadro=False):
+        """Entra em um novo escopo; novo_quadro para o corpo de uma subrotina"""
         self.scope_stack.append({})
+        if novo_quadro:
+            self._marcas.append(None)
+            self._slots_livres.append(0)
+        else:
+            self._marcas.append(self._slots_livres[-1])
 
     def exit_scope(self):
         """Sai do escopo atual"""
         if len(self.scope_stack) > 1:
-            self.scope_stack.pop()
+            indice = self._indice
+            for name in self.scope_stack.pop():
+                anterior = indice[name].anterior
+                if anterior is None:
+                    del indice[name]
+                else:
+                    indice[name] = anterior
+            marca = self._marcas.pop()
+            if marca is None:
+                self._slots_livres.pop()
+            else:
+                self._slots_livres[-1] = marca
+
+    def _definir(self, name, info):
+        """Põe o símbolo no escopo atual e no índice, alocando um slot se for uma variável"""
+        vinculo = None
+        if info["kind"] == "variable":
+            slots_livres = self._slots_livres
+            vinculo = (len(slots_livres) - 1, slots_livres[-1])
+            slots_livres[-1] += 1
+        self.scope_stack[-1][name] = info
+        self._indice[name] = _Entrada(info, len(self.scope_stack) - 1, vinculo, self._indice.get(name))
+
+    def vinculo(self, name):
+        """Vínculo (profundidade, slot) da variável visível por name, ou None"""
+        entrada = self._indice.get(name)
+        return entrada.vinculo if entrada is not None else None
 
     def declare_variable(self, name, var_type):
         """Declara uma variável no escopo atual"""
@@ -52,22 +225,22 @@ class AnalisadorSemantico:
         if name in current_scope:
             self.error(f"Variável '{name}' já declarada neste escopo.")
             return False
-        current_scope[name] = {"type": var_type, "kind": "variable"}
+        self._definir(name, {"type": var_type, "kind": "variable"})
         
         # Atualiza a tabela de símbolos com o tipo correto
-        tabela_simbolos[name] = {"tipo": var_type, "valor": ""}
+        self.tabela_simbolos.definir(name, var_type)
         return True
 
     def update_variable_value(self, name, value):
         """Atualiza o valor de uma variável na tabela de símbolos"""
-        if name in tabela_simbolos:
+        if name in self.tabela_simbolos:
             # Converte o valor para string para exibição na tabela
-            if isinstance(value, dict) and "value" in value:
-                valor_str = str(value["value"])
+            if value.TAG == LITERAL:
+                valor_str = str(value.value)
             else:
-                valor_str = str(value)
+                valor_str = value.repr_dict()
             
-            tabela_simbolos[name]["valor"] = valor_str
+            self.tabela_simbolos.atualizar_valor(name, valor_str)
 
     def declare_subroutine(self, name, sub_type, params, return_type=None):
         """Declara uma subrotina (procedimento ou função) no escopo atual"""
@@ -75,31 +248,28 @@ class AnalisadorSemantico:
         if name in current_scope:
             self.error(f"{sub_type.capitalize()} '{name}' já declarado neste escopo.")
             return False
-        current_scope[name] = {
+        self._definir(name, {
             "type": sub_type, 
             "kind": sub_type, 
             "params": params, 
             "return_type": return_type
-        }
+        })
         
         # Atualiza a tabela de símbolos com informações da subrotina
-        params_info = [f"{p['name']}: {p['type']}" for p in params]
+        params_info = [f"{p.name}: {p.var_type}" for p in params]
         params_str = ", ".join(params_info)
         valor_str = f"{sub_type}({params_str})"
         if return_type:
             valor_str += f" -> {return_type}"
             
-        tabela_simbolos[name] = {
-            "tipo": sub_type, 
-            "valor": valor_str
-        }
+        self.tabela_simbolos.definir(name, sub_type, valor_str)
         return True
 
     def get_symbol_info(self, name):
         """Busca informações de um símbolo em todos os escopos"""
-        for scope in reversed(self.scope_stack):
-            if name in scope:
-                return scope[name]
+        entrada = self._indice.get(name)
+        if entrada is not None:
+            return entrada.info
         self.error(f"Símbolo '{name}' não declarado.")
         return None
 
@@ -115,66 +285,35 @@ class AnalisadorSemantico:
 
     def check_type_compatibility(self, expected_type, actual_type, operation="atribuição"):
         """Verifica compatibilidade entre tipos"""
-        if expected_type == "unknown" or actual_type == "unknown":
-            return False
-        
-        if expected_type == actual_type:
-            return True
-        
-        if expected_type == "real" and actual_type == "inteiro":
-            return True
-        
-        if expected_type == "inteiro" and actual_type == "real":
-            self.warning(f"Conversão implícita de real para inteiro em {operation}. Pode haver perda de dados.")
-            return True
-        
-        self.error(f"Incompatibilidade de tipos em {operation}. Esperado {expected_type}, encontrado {actual_type}.")
-        return False
+        compatibilidade = TABELA_COMPATIBILIDADE.get((expected_type, actual_type))
+        if compatibilidade is None:  # Tipo fora de NOMES_TIPOS
+            compatibilidade = _compatibilidade(expected_type, actual_type)
+        compativel, severidade, modelo = compatibilidade
+        if severidade == ERRO:
+            self.error(modelo.format(operation=operation))
+        elif severidade == AVISO:
+            self.warning(modelo.format(operation=operation))
+        return compativel
 
     def infer_type(self, type1, type2, operator):
-        """Infere o tipo resultante de uma operação binária"""
-        if operator in ["+", "-", "*", "/", "%"]:
-            if type1 == "texto" or type2 == "texto":
-                self.error(f"Operação aritmética com tipo texto não permitida: {type1} {operator} {type2}")
-                return "unknown"
-            if type1 == "real" or type2 == "real":
-                return "real"
-            return "inteiro"
-        
-        elif operator in ["==", "!=", ">", "<", ">=", "<="]:
-            if type1 in ["inteiro", "real"] and type2 in ["inteiro", "real"]:
-                return "boolean"
-            elif type1 == "texto" and type2 == "texto":
-                if operator in [">", "<", ">=", "<="]:
-                    self.warning(f"Comparação de ordem ({operator}) entre strings pode ter comportamento inesperado.")
-                return "boolean"
-            else:
-                self.error(f"Operação de comparação inválida entre {type1} e {type2}")
-                return "unknown"
-        
-        elif operator in ["&&", "||"]:
-            if type1 == "boolean" and type2 == "boolean":
-                return "boolean"
-            else:
-                self.error(f"Operação lógica inválida entre {type1} e {type2}")
-                return "unknown"
-        
-        elif operator == "!":
-            if type1 == "boolean":
-                return "boolean"
-            else:
-                self.error(f"Operador lógico '!' inválido para o tipo {type1}")
-                return "unknown"
-        
-        return "unknown"
+        """
+        Infere o tipo resultante de uma operação binária (ou unária, com type2 None)
+        a partir dos nomes dos tipos; analyze_expression usa TABELA_OPERACOES
+        """
+        tipo, severidade, mensagem = _inferir(type1, type2, operator)
+        if severidade == ERRO:
+            self.error(mensagem)
+        elif severidade == AVISO:
+            self.warning(mensagem)
+        return tipo
 
     def analyze_ast(self, ast):
         """Analisa a AST completa"""
-        if ast["type"] != "Programa":
+        if ast.TAG != PROGRAMA:
             self.error("AST inválida: nó raiz deve ser do tipo 'Programa'")
             return False
         
-        for node in ast["body"]:
+        for node in ast.body:
             self.analyze_node(node)
         
         return len(self.errors) == 0
@@ -184,44 +323,22 @@ class AnalisadorSemantico:
         if node is None:
             return
         
-        node_type = node.get("type")
-        
-        if node_type == "Declaracao":
-            self.analyze_declaration(node)
-        elif node_type == "Atribuicao":
-            self.analyze_assignment(node)
-        elif node_type == "Condicional":
-            self.analyze_conditional(node)
-        elif node_type == "Repeticao":
-            self.analyze_loop(node)
-        elif node_type == "SubroutineDeclaration":
-            self.analyze_subroutine_declaration(node)
-        elif node_type == "ChamadaSubrotina":
-            self.analyze_subroutine_call(node)
-        elif node_type == "Retorno":
-            self.analyze_return(node)
-        elif node_type == "BinaryExpression":
-            return self.analyze_binary_expression(node)
-        elif node_type == "UnaryExpression": # Adicionado para tratar expressões unárias
-            return self.analyze_unary_expression(node)
-        elif node_type == "Identifier":
-            return self.analyze_identifier(node)
-        elif node_type == "Literal":
-            return self.analyze_literal(node)
-        elif node_type == "Comentario": # Comentários não precisam de análise semântica, mas são nós na AST
-            pass
+        tratador = self._tratadores_nos.get(node.TAG)
+        if tratador is not None:  # Comentários não precisam de análise semântica
+            return tratador(node)
 
     def analyze_declaration(self, node):
         """Analisa declarações de variáveis"""
-        for decl in node.get("declarations", []):
-            self.declare_variable(decl["name"], decl["type"])
+        for decl in node.declarations:
+            self.declare_variable(decl.name, decl.var_type)
 
     def analyze_assignment(self, node):
         """Analisa atribuições"""
-        var_name = node["variable"]
+        var_name = node.variable
         var_type = self.get_variable_type(var_name)
+        node.vinculo = self.vinculo(var_name)
         
-        value = node["value"]
+        value = node.value
         value_type = self.analyze_expression(value)
         
         if self.check_type_compatibility(var_type, value_type):
@@ -230,40 +347,51 @@ class AnalisadorSemantico:
 
     def analyze_conditional(self, node):
         """Analisa estruturas condicionais"""
-        condition_type = self.analyze_expression(node["condition"])
+        condition_type = self.analyze_expression(node.condition)
         
         if condition_type not in ["inteiro", "real", "boolean"]:
             self.error(f"Condição de tipo inesperado: {condition_type}. Esperado tipo booleano ou numérico.")
         
         self.enter_scope()
-        for stmt in node.get("consequent", []):
+        for stmt in node.consequent:
             self.analyze_node(stmt)
         self.exit_scope()
         
-        if "alternate" in node:
+        if node.alternate is not None:
             self.enter_scope()
-            for stmt in node["alternate"]:
+            for stmt in node.alternate:
                 self.analyze_node(stmt)
             self.exit_scope()
 
     def analyze_loop(self, node):
         """Analisa estruturas de repetição"""
-        condition_type = self.analyze_expression(node["condition"])
+        condition_type = self.analyze_expression(node.condition)
         
         if condition_type not in ["inteiro", "real", "boolean"]:
             self.error(f"Condição de tipo inesperado: {condition_type}. Esperado tipo booleano ou numérico.")
         
         self.enter_scope()
-        for stmt in node.get("body", []):
+        for stmt in node.body:
             self.analyze_node(stmt)
         self.exit_scope()
 
     def analyze_subroutine_declaration(self, node):
         """Analisa declarações de subrotinas (procedimentos e funções)"""
-        name = node["name"]
-        sub_type = node["kind"] # Usar 'kind' do nó da AST
-        params = node.get("parameters", [])
-        return_type = node.get("return_type")
+        # Declara a subrotina no escopo atual
+        self.declare_subroutine(node.name, node.kind, node.parameters, node.return_type)
+        if self.instrumentacao is None:
+            self.analyze_subroutine_body(node)
+            return
+        intervalo = self.instrumentacao.abrir(node.name, CATEGORIA_SUBROTINA, {"fase": "semantica"})
+        self.analyze_subroutine_body(node)
+        self.instrumentacao.encerrar(intervalo)
+
+    def analyze_subroutine_body(self, node):
+        """Analisa os parâmetros e o corpo de uma subrotina já declarada"""
+        name = node.name
+        sub_type = node.kind # Usar 'kind' do nó da AST
+        params = node.parameters
+        return_type = node.return_type
         
         # Registra a função atual para verificação de retorno
         old_function = self.current_function
@@ -274,22 +402,19 @@ class AnalisadorSemantico:
         self.current_function_return_type = return_type
         self.has_return = False
         
-        # Declara a subrotina no escopo atual
-        self.declare_subroutine(name, sub_type, params, return_type)
-        
-        # Entra em um novo escopo para os parâmetros e corpo
-        self.enter_scope()
+        # Entra em um novo escopo (e quadro) para os parâmetros e corpo
+        self.enter_scope(novo_quadro=True)
         
         # Declara os parâmetros no novo escopo
         for param in params:
-            self.declare_variable(param["name"], param["type"])
+            self.declare_variable(param.name, param.var_type)
         
         # Analisa o corpo da subrotina
-        for stmt in node.get("body", []):
+        for stmt in node.body:
             self.analyze_node(stmt)
         
         # Verifica se funções têm retorno
-        if sub_type == "FUNCAO" and not self.has_return and return_type is not None:
+        if sub_type == "funcao" and not self.has_return and return_type is not None:
             self.error(f"Função '{name}' com tipo de retorno '{return_type}' não tem instrução de retorno.")
         
         # Restaura o contexto anterior
@@ -302,8 +427,8 @@ class AnalisadorSemantico:
 
     def analyze_subroutine_call(self, node):
         """Analisa chamadas de subrotinas"""
-        name = node["name"]
-        args = node.get("arguments", [])
+        name = node.name
+        args = node.arguments
         
         # Busca informações da subrotina
         subroutine_info = self.get_symbol_info(name)
@@ -311,7 +436,7 @@ class AnalisadorSemantico:
             return "unknown"
         
         # Verifica se é realmente uma subrotina
-        if subroutine_info["kind"] not in ["PROCEDIMENTO", "FUNCAO"]:
+        if subroutine_info["kind"] not in ["procedimento", "funcao"]:
             self.error(f"'{name}' não é um procedimento ou função.")
             return "unknown"
         
@@ -323,11 +448,11 @@ class AnalisadorSemantico:
         # Verifica tipos dos argumentos
         for i, (arg, param) in enumerate(zip(args, params)):
             arg_type = self.analyze_expression(arg)
-            param_type = param["type"]
+            param_type = param.var_type
             self.check_type_compatibility(param_type, arg_type, f"argumento {i+1} de '{name}'")
         
         # Retorna o tipo de retorno para funções
-        if subroutine_info["kind"] == "FUNCAO":
+        if subroutine_info["kind"] == "funcao":
             return subroutine_info.get("return_type", "unknown")
         return "void"
 
@@ -342,8 +467,8 @@ class AnalisadorSemantico:
         self.has_return = True
         
         # Verifica o tipo do valor retornado
-        if "value" in node:
-            value_type = self.analyze_expression(node["value"])
+        if node.value is not None:
+            value_type = self.analyze_expression(node.value)
             if self.current_function_return_type is None:
                 self.error(f"Função '{self.current_function}' não deveria retornar valor.")
             else:
@@ -357,22 +482,20 @@ class AnalisadorSemantico:
 
     def analyze_binary_expression(self, node):
         """Analisa expressões binárias"""
-        left_type = self.analyze_expression(node["left"])
-        right_type = self.analyze_expression(node["right"])
-        return self.infer_type(left_type, right_type, node["operator"])
+        return self.analyze_expression(node)
 
     def analyze_unary_expression(self, node):
         """Analisa expressões unárias (ex: !booleano)"""
-        operand_type = self.analyze_expression(node["operand"])
-        return self.infer_type(operand_type, None, node["operator"])
+        return self.analyze_expression(node)
 
     def analyze_identifier(self, node):
         """Analisa identificadores"""
-        return self.get_variable_type(node["name"])
+        node.vinculo = self.vinculo(node.name)
+        return self.get_variable_type(node.name)
 
     def analyze_literal(self, node):
         """Analisa literais"""
-        value = node["value"]
+        value = node.value
         if isinstance(value, str) and value.startswith('"'):
             return "texto"
         elif "." in str(value):
@@ -381,45 +504,100 @@ class AnalisadorSemantico:
             return "inteiro"
 
     def analyze_expression(self, node):
-        """Analisa expressões genéricas"""
+        """
+        Analisa expressões genéricas e retorna o tipo resultante.
+
+        Operadores binários e unários são percorridos em pós-ordem com uma pilha
+        explícita, para que expressões longas não estourem o limite de recursão. Os
+        tipos são códigos inteiros, combinados por TABELA_OPERACOES e TABELA_UNARIA,
+        e o código do tipo de cada operação fica guardado no nó; uma subexpressão
+        com TIPO_FIXO não é percorrida de novo.
+        """
         if node is None:
             return "unknown"
         
-        node_type = node.get("type")
-        
-        if "_type" in node:
-            return node["_type"]
-        elif node_type == "BinaryExpression":
-            return self.analyze_binary_expression(node)
-        elif node_type == "UnaryExpression":
-            return self.analyze_unary_expression(node)
-        elif node_type == "Identifier":
-            return self.analyze_identifier(node)
-        elif node_type == "Literal":
-            return self.analyze_literal(node)
-        elif node_type == "ChamadaSubrotina":
-            return self.analyze_subroutine_call(node)
-        
-        return "unknown"
+        operacoes = TABELA_OPERACOES
+        codigos = CODIGOS_TIPOS
+        indice = self._indice
+        tipos = []
+        pilha = [(node, False)]
+        while pilha:
+            atual, operandos_prontos = pilha.pop()
+            if atual is None:
+                tipos.append(DESCONHECIDO)
+                continue
+            tag = atual.TAG
+            if tag == IDENTIFIER:
+                entrada = indice.get(atual.name) if self.LEITURA_DIRETA else None
+                if entrada is not None and entrada.tipo is not None:  # Variável: caso mais comum
+                    atual.vinculo = entrada.vinculo
+                    tipos.append(entrada.tipo)
+                else:
+                    tipos.append(codigos.get(self.analyze_identifier(atual), DESCONHECIDO))
+            elif tag == BINARY_EXPRESSION:
+                if operandos_prontos:
+                    right_type = tipos.pop()
+                    tabela = operacoes.get(atual.operator)
+                    if tabela is None:
+                        tipos[-1] = DESCONHECIDO
+                        atual.tipo = DESCONHECIDO
+                        continue
+                    tipo, severidade, mensagem = tabela[tipos[-1]][right_type]
+                    if severidade is not None:
+                        if severidade == ERRO:
+                            self.error(mensagem)
+                        else:
+                            self.warning(mensagem)
+                    atual.tipo = tipos[-1] = tipo
+                elif atual.tipo is not None and atual.tipo & TIPO_FIXO:
+                    tipos.append(atual.tipo)
+                else:
+                    pilha.append((atual, True))
+                    pilha.append((atual.right, False))
+                    pilha.append((atual.left, False))
+            elif tag == LITERAL:
+                tipos.append(codigos.get(atual.value_type, DESCONHECIDO) | TIPO_FIXO)
+            elif tag == UNARY_EXPRESSION:
+                if operandos_prontos:
+                    tabela = TABELA_UNARIA.get(atual.operator)
+                    if tabela is None:
+                        tipos[-1] = DESCONHECIDO
+                        atual.tipo = DESCONHECIDO
+                        continue
+                    tipo, severidade, mensagem = tabela[tipos[-1]]
+                    if severidade is not None:
+                        if severidade == ERRO:
+                            self.error(mensagem)
+                        else:
+                            self.warning(mensagem)
+                    atual.tipo = tipos[-1] = tipo
+                elif atual.tipo is not None and atual.tipo & TIPO_FIXO:
+                    tipos.append(atual.tipo)
+                else:
+                    pilha.append((atual, True))
+                    pilha.append((atual.operand, False))
+            else:
+                tratador = self._tratadores_expressoes.get(tag)
+                tipos.append(codigos.get(tratador(atual), DESCONHECIDO) if tratador is not None else DESCONHECIDO)
+        return NOMES_TIPOS[tipos[0] & ~TIPO_FIXO]
 
 # Função para executar a análise semântica
-def analise_semantica(ast, semantic_errors_log_path=None):
-    """Executa a análise semântica na AST fornecida"""
-    # Define o caminho do arquivo de log
-    if semantic_errors_log_path is None:
-        semantic_errors_log_path = "semantic_errors.log"
-    
-    # Garante que o diretório de saída existe (apenas se o caminho tiver um diretório)
-    directory = os.path.dirname(semantic_errors_log_path)
-    if directory:  # Verifica se o diretório não é vazio
-        os.makedirs(directory, exist_ok=True)
-
-    # Limpa o arquivo de log semântico antes de cada execução
-    with open(semantic_errors_log_path, "w", encoding="utf-8") as f:
-        f.write("")
-
-    analisador = AnalisadorSemantico(semantic_errors_log_path=semantic_errors_log_path)
+def analise_semantica(ast, semantic_errors_log_path=None, tabela_simbolos=None, diagnosticos=None):
+    """
+    Executa a análise semântica na AST fornecida
+
+    Se diagnosticos (um ColetorDiagnosticos) for informado, os erros e avisos são
+    reportados nele e quem o criou é responsável por fechá-lo. Caso contrário, eles
+    são gravados de uma só vez em semantic_errors_log_path ao final da análise.
+    """
+    coletor = diagnosticos
+    if coletor is None:
+        if semantic_errors_log_path is None:
+            semantic_errors_log_path = "semantic_errors.log"
+        coletor = ColetorDiagnosticos(destinos=[EscritorLog(semantic_errors_log_path)])
+
+    analisador = AnalisadorSemantico(tabela_simbolos=tabela_simbolos, diagnosticos=coletor)
     analisador.analyze_ast(ast)
+    if diagnosticos is None:
+        coletor.fechar()
     return True, analisador.errors, analisador.warnings
-
-
@@ -1,21 +1,95 @@
 import json
 import sys
 import os
+from analisador_lexico import (
+    NOMES_TOKENS, T_TIPO, T_SE, T_SENAO,
+    T_ENQUANTO, T_PROCEDIMENTO, T_FUNCAO, T_RETORNA, T_ID, T_NUMERO, T_STRING,
+    T_OP_ARIT, T_OP_LOGICO, T_OP_COMP, T_IGUAL, T_PONTO_VIRGULA, T_VIRGULA,
+    T_ABRE_PAREN, T_FECHA_PAREN, T_ABRE_CHAVE, T_FECHA_CHAVE, T_EOF
+)
+from nos_ast import (
+    Programa, Declaracao, DeclaracaoVariavel, Atribuicao, Condicional, Repeticao,
+    SubroutineDeclaration, ChamadaSubrotina, Retorno, BinaryExpression, UnaryExpression,
+    Literal, Identifier
+)
+
+# Precedência dos operadores binários em expressões (maior liga mais forte). Todos
+# são associativos à esquerda.
+PRECEDENCIA_BINARIA = {
+    (T_OP_LOGICO, "||"): 1,
+    (T_OP_LOGICO, "&&"): 2,
+    (T_OP_COMP, "=="): 3, (T_OP_COMP, "!="): 3, (T_OP_COMP, ">"): 3,
+    (T_OP_COMP, "<"): 3, (T_OP_COMP, ">="): 3, (T_OP_COMP, "<="): 3,
+    (T_OP_ARIT, "+"): 4, (T_OP_ARIT, "-"): 4,
+    (T_OP_ARIT, "*"): 5, (T_OP_ARIT, "/"): 5, (T_OP_ARIT, "%"): 5,
+}
+
+# Marcadores da pilha de operadores de Parser.expressao. A precedência 0 faz com que
+# a redução dos operadores binários pare neles.
+_PARENTESE = (0, "(")
+_NEGACAO = (0, "!")
+
+# Tokens em que a recuperação de erros para de descartar a entrada
+TOKENS_SINCRONIZACAO = frozenset([
+    T_PONTO_VIRGULA, T_ABRE_CHAVE, T_FECHA_CHAVE,
+    T_TIPO, T_PROCEDIMENTO, T_FUNCAO, T_SE, T_ENQUANTO, T_RETORNA,
+    T_EOF
+])
+
+# Tokens que precisam ser aceitos normalmente (não descartados pela recuperação)
+# depois de um erro para que o próximo erro volte a ser reportado. Erros antes disso
+# são, quase sempre, consequência do primeiro, e são apenas contados.
+TOKENS_RETOMADA = 3
+
+# Blocos aninhados aceitos. Cada nível usa alguns quadros da pilha do Python aqui e
+# nas fases seguintes; um bloco mais fundo é reportado e descartado inteiro.
+PROFUNDIDADE_MAXIMA_BLOCOS = 100
 
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    """
+    Analisador sintático descendente recursivo.
+
+    A recuperação de erros é em modo pânico: depois de um erro, os tokens são
+    descartados até um token de sincronização, e um bloco '{ ... }' que não pode
+    ser analisado é descartado inteiro, até a chave correspondente. Cada token é
+    consumido uma única vez, então o trabalho é linear no número de tokens mesmo
+    em entradas sem sentido.
+
+    Args:
+        tokens: Lista ou gerador de tokens (ex.: FluxoTokens).
+        max_erros: A análise para depois de reportar este número de erros, e o
+            restante da entrada é ignorado (ver interrompido). None desativa o limite.
+    """
+
+    def __init__(self, tokens, max_erros=None):
+        # Aceita tanto uma lista quanto um gerador de tokens (ex.: gerar_tokens),
+        # mantendo em memória apenas o token atual e o próximo.
+        self.tokens = iter(tokens)
         self.current_token_index = 0
-        self.current_token = self.tokens[self.current_token_index] if self.tokens else None
-        self.ast = {"type": "Programa", "body": []}
+        self.current_token = next(self.tokens, None)
+        self.next_token = next(self.tokens, None) if self.current_token else None
+        self.ast = Programa()
         self.errors = []
+        self.max_erros = max_erros
+        self.suprimidos = 0  # Erros em cascata, não reportados
+        self.interrompido = False  # True se a análise parou em max_erros
+        self._descartados = 0  # Tokens descartados pela recuperação de erros
+        self._retomada = 0  # Tokens aceitos a partir dos quais um erro volta a ser reportado
+        self._profundidade = 0
 
     def advance(self):
         self.current_token_index += 1
-        if self.current_token_index < len(self.tokens):
-            self.current_token = self.tokens[self.current_token_index]
-        else:
-            self.current_token = None
+        self.current_token = self.next_token
+        self.next_token = next(self.tokens, None) if self.current_token else None
+
+    def descartar(self):
+        """Avança sem aceitar o token atual (recuperação de erros)"""
+        self._descartados += 1
+        self.advance()
+
+    def peek(self):
+        """Retorna o próximo token sem consumi-lo"""
+        return self.next_token
 
     def match(self, expected_type):
         if self.current_token and self.current_token[0] == expected_type:
@@ -23,436 +97,488 @@ class Parser:
             self.advance()
             return value
         else:
-            self.error(f"Erro de sintaxe: Esperado {expected_type}, encontrado {self.current_token[0] if self.current_token else 'EOF'}")
+            self.error(f"Erro de sintaxe: Esperado {NOMES_TOKENS[expected_type]}, encontrado {NOMES_TOKENS[self.current_token[0]] if self.current_token else 'EOF'}")
             return None
 
+    def posicao(self):
+        """(linha, coluna) do token atual, guardada nos nós dos comandos"""
+        return (self.current_token[2], self.current_token[3]) if self.current_token else None
+
     def error(self, message):
+        aceitos = self.current_token_index - self._descartados
+        if aceitos < self._retomada or self.interrompido:
+            self.suprimidos += 1
+            return
+        self._retomada = aceitos + TOKENS_RETOMADA
+        if self.current_token:
+            message += f" (linha {self.current_token[2]}, coluna {self.current_token[3]})"
         self.errors.append(message)
+        if self.max_erros is not None and len(self.errors) >= self.max_erros:
+            # Sem token atual, todos os laços terminam e o restante da entrada não é lido
+            self.interrompido = True
+            self.current_token = self.next_token = None
 
     def parse(self):
         self.programa()
         return self.ast
 
     def programa(self):
-        while self.current_token and self.current_token[0] != "EOF":
+        while self.current_token and self.current_token[0] != T_EOF:
             initial_token_index = self.current_token_index
             
-            if self.current_token[0] == "TIPO":
+            if self.current_token[0] == T_TIPO:
                 self.declaracoes()
-            elif self.current_token[0] in ["PROCEDIMENTO", "FUNCAO"]:
+            elif self.current_token[0] in (T_PROCEDIMENTO, T_FUNCAO):
                 self.subroutine_declaration()
-            elif self.current_token[0] == "SE" or self.current_token[0] == "ENQUANTO":
+            elif self.current_token[0] == T_SE or self.current_token[0] == T_ENQUANTO:
                 self.estrutura_controle()
-            elif self.current_token[0] == "RETORNA":
+            elif self.current_token[0] == T_RETORNA:
                 self.retorno()
-            elif self.current_token[0] == "ID":
-                next_token_index = self.current_token_index + 1
-                if next_token_index < len(self.tokens) and self.tokens[next_token_index][0] == "IGUAL":
+            elif self.current_token[0] == T_ID:
+                next_token = self.peek()
+                if next_token and next_token[0] == T_IGUAL:
                     self.atribuicao()
-                elif next_token_index < len(self.tokens) and self.tokens[next_token_index][0] == "ABRE_PAREN":
+                elif next_token and next_token[0] == T_ABRE_PAREN:
                     self.chamada_subrotina()
                 else:
-                    self.error(f"Erro de sintaxe: Comando inesperado após ID '{self.current_token[1]}' ({self.current_token[0]}). Esperado '=' ou '(' para atribuição/chamada.")
-                    self.advance() # Avança para tentar recuperar
+                    self.error(f"Erro de sintaxe: Comando inesperado após ID '{self.current_token[1]}' ({NOMES_TOKENS[self.current_token[0]]}). Esperado '=' ou '(' para atribuição/chamada.")
+                    self.descartar() # Avança para tentar recuperar
                     self.synchronize()
-            elif self.current_token[0] == "COMENTARIO":
-                self.ast["body"].append({"type": "Comentario", "value": self.current_token[1], "kind": self.current_token[2]})
-                self.advance()
+            elif self.current_token[0] == T_ABRE_CHAVE:
+                self.error("Erro de sintaxe: Bloco inesperado no início de uma declaração ou comando. O bloco foi ignorado.")
+                self.pular_bloco()
             else:
-                self.error(f"Erro de sintaxe: Token inesperado '{self.current_token[1]}' ({self.current_token[0]}) no início de uma declaração ou comando. Tentando recuperar...")
-                self.advance() # Avança para evitar loop infinito
+                self.error(f"Erro de sintaxe: Token inesperado '{self.current_token[1]}' ({NOMES_TOKENS[self.current_token[0]]}) no início de uma declaração ou comando. Tentando recuperar...")
+                self.descartar() # Avança para evitar loop infinito
                 self.synchronize()
             
             # Prevent infinite loop if no tokens are consumed
             if self.current_token_index == initial_token_index and self.current_token is not None:
-                self.advance()
+                self.descartar()
                 self.synchronize()
 
+    def comandos_em(self, destino):
+        """
+        Analisa os comandos de um bloco acrescentando os nós em destino, que fica no
+        lugar de self.ast.body até o fim do bloco. Retorna destino.
+        """
+        if self._profundidade >= PROFUNDIDADE_MAXIMA_BLOCOS:
+            self.error(f"Erro de sintaxe: Mais de {PROFUNDIDADE_MAXIMA_BLOCOS} blocos aninhados. O bloco foi ignorado.")
+            self.pular_ate_fim_bloco()
+            return destino
+        original_body = self.ast.body
+        self.ast.body = destino
+        self._profundidade += 1
+        try:
+            self.comandos()
+        finally:
+            self.ast.body = original_body
+            self._profundidade -= 1
+        return destino
+
     def comandos(self):
-        while self.current_token and self.current_token[0] not in ["FECHA_CHAVE", "EOF"]:
+        while self.current_token and self.current_token[0] not in (T_FECHA_CHAVE, T_EOF):
             initial_token_index = self.current_token_index
             
-            if self.current_token[0] == "TIPO":
+            if self.current_token[0] == T_TIPO:
                 self.declaracoes()
-            elif self.current_token[0] in ["PROCEDIMENTO", "FUNCAO"]:
+            elif self.current_token[0] in (T_PROCEDIMENTO, T_FUNCAO):
                 self.subroutine_declaration()
-            elif self.current_token[0] == "SE" or self.current_token[0] == "ENQUANTO":
+            elif self.current_token[0] == T_SE or self.current_token[0] == T_ENQUANTO:
                 self.estrutura_controle()
-            elif self.current_token[0] == "RETORNA":
+            elif self.current_token[0] == T_RETORNA:
                 self.retorno()
-            elif self.current_token[0] == "ID":
-                next_token_index = self.current_token_index + 1
-                if next_token_index < len(self.tokens) and self.tokens[next_token_index][0] == "IGUAL":
+            elif self.current_token[0] == T_ID:
+                next_token = self.peek()
+                if next_token and next_token[0] == T_IGUAL:
                     self.atribuicao()
-                elif next_token_index < len(self.tokens) and self.tokens[next_token_index][0] == "ABRE_PAREN":
+                elif next_token and next_token[0] == T_ABRE_PAREN:
                     self.chamada_subrotina()
                 else:
-                    self.error(f"Erro de sintaxe: Comando inesperado após ID '{self.current_token[1]}' ({self.current_token[0]}). Esperado '=' ou '(' para atribuição/chamada.")
-                    self.advance() # Avança para tentar recuperar
+                    self.error(f"Erro de sintaxe: Comando inesperado após ID '{self.current_token[1]}' ({NOMES_TOKENS[self.current_token[0]]}). Esperado '=' ou '(' para atribuição/chamada.")
+                    self.descartar() # Avança para tentar recuperar
                     self.synchronize()
-            elif self.current_token[0] == "COMENTARIO":
-                self.ast["body"].append({"type": "Comentario", "value": self.current_token[1], "kind": self.current_token[2]})
-                self.advance()
+            elif self.current_token[0] == T_ABRE_CHAVE:
+                self.error("Erro de sintaxe: Bloco inesperado dentro de um bloco de comandos. O bloco foi ignorado.")
+                self.pular_bloco()
             else:
-                self.error(f"Erro de sintaxe: Token inesperado '{self.current_token[1]}' ({self.current_token[0]}) dentro de um bloco de comandos. Tentando recuperar...")
-                self.advance() # Avança para evitar loop infinito
+                self.error(f"Erro de sintaxe: Token inesperado '{self.current_token[1]}' ({NOMES_TOKENS[self.current_token[0]]}) dentro de um bloco de comandos. Tentando recuperar...")
+                self.descartar() # Avança para evitar loop infinito
                 self.synchronize()
             
             # Prevent infinite loop if no tokens are consumed
             if self.current_token_index == initial_token_index and self.current_token is not None:
-                self.advance()
+                self.descartar()
                 self.synchronize()
 
     def synchronize(self):
-        sync_tokens = [
-            "PONTO_VIRGULA", "ABRE_CHAVE", "FECHA_CHAVE", 
-            "TIPO", "PROCEDIMENTO", "FUNCAO", "SE", "ENQUANTO", "RETORNA",
-            "EOF" 
-        ]
-        while self.current_token and self.current_token[0] not in sync_tokens:
-            self.advance()
-        if self.current_token and self.current_token[0] == "PONTO_VIRGULA":
-            self.advance()
+        while self.current_token and self.current_token[0] not in TOKENS_SINCRONIZACAO:
+            self.descartar()
+        if self.current_token and self.current_token[0] == T_PONTO_VIRGULA:
+            self.descartar()
+
+    def pular_ate_fim_bloco(self):
+        """Descarta tokens até a '}' que fecha o bloco atual, sem consumi-la"""
+        nivel = 0
+        while self.current_token and self.current_token[0] != T_EOF:
+            tipo = self.current_token[0]
+            if tipo == T_FECHA_CHAVE:
+                if not nivel:
+                    return
+                nivel -= 1
+            elif tipo == T_ABRE_CHAVE:
+                nivel += 1
+            self.descartar()
+
+    def pular_bloco(self):
+        """Descarta o bloco '{ ... }' que começa no token atual, com os blocos internos"""
+        self.descartar()
+        self.pular_ate_fim_bloco()
+        if self.current_token and self.current_token[0] == T_FECHA_CHAVE:
+            self.descartar()
+
+    def sincronizar_subrotina(self):
+        """
+        Recuperação de um erro no cabeçalho de uma subrotina: descarta o cabeçalho e
+        o corpo, em vez de analisar os comandos do corpo como se estivessem fora dela.
+        """
+        while self.current_token and self.current_token[0] not in (
+                T_ABRE_CHAVE, T_FECHA_CHAVE, T_PONTO_VIRGULA, T_PROCEDIMENTO, T_FUNCAO, T_EOF):
+            self.descartar()
+        if not self.current_token:
+            return
+        if self.current_token[0] == T_ABRE_CHAVE:
+            self.pular_bloco()
+        elif self.current_token[0] == T_PONTO_VIRGULA:
+            self.descartar()
 
     def declaracoes(self):
-        node = {"type": "Declaracao", "declarations": []}
-        var_type = self.match("TIPO")
+        node = Declaracao(posicao=self.posicao())
+        var_type = self.match(T_TIPO)
         if var_type is None: 
             self.synchronize()
             return
         while True:
-            var_name = self.match("ID")
+            var_name = self.match(T_ID)
             if var_name is None: 
                 self.synchronize()
                 return 
-            node["declarations"].append({"name": var_name, "type": var_type})
-            if self.current_token and self.current_token[0] == "VIRGULA":
-                self.match("VIRGULA")
+            node.declarations.append(DeclaracaoVariavel(var_name, var_type))
+            if self.current_token and self.current_token[0] == T_VIRGULA:
+                self.match(T_VIRGULA)
             else:
                 break
-        if self.match("PONTO_VIRGULA") is None: 
+        if self.match(T_PONTO_VIRGULA) is None: 
             self.synchronize()
             return
-        self.ast["body"].append(node)
+        self.ast.body.append(node)
 
     def subroutine_declaration(self):
-        node = {"type": "SubroutineDeclaration"}
+        node = SubroutineDeclaration(posicao=self.posicao())
         sub_type_token = self.current_token[0]
         sub_type = self.match(sub_type_token)
         if sub_type is None: 
-            self.synchronize()
+            self.sincronizar_subrotina()
             return
-        node["kind"] = sub_type
+        node.kind = sub_type
         
-        name = self.match("ID")
+        name = self.match(T_ID)
         if name is None: 
-            self.synchronize()
+            self.sincronizar_subrotina()
             return
-        node["name"] = name
+        node.name = name
         
         params = self.parse_parameters()
         if params is None: 
-            self.synchronize()
+            self.sincronizar_subrotina()
             return
-        node["parameters"] = params
+        node.parameters = params
 
         return_type = None
-        if sub_type == "FUNCAO":
-            if self.match("RETORNA") is None: 
+        if sub_type_token == T_FUNCAO:
+            if self.match(T_RETORNA) is None: 
                 self.synchronize()
                 return
-            return_type = self.match("TIPO")
+            return_type = self.match(T_TIPO)
             if return_type is None: 
                 self.synchronize()
                 return
-            node["return_type"] = return_type
+            node.return_type = return_type
         
-        if self.match("ABRE_CHAVE") is None: 
-            self.synchronize()
+        if self.match(T_ABRE_CHAVE) is None: 
+            self.sincronizar_subrotina()
             return
 
-        node["body"] = []
-        original_body = self.ast["body"]
-        self.ast["body"] = node["body"]
-        self.comandos()
-        self.ast["body"] = original_body
+        node.body = self.comandos_em([])
 
         if sub_type == "FUNCAO":
             pass
 
-        if self.match("FECHA_CHAVE") is None: 
+        if self.match(T_FECHA_CHAVE) is None: 
             self.synchronize()
             return
-        self.ast["body"].append(node) # Adicionado esta linha para incluir a sub-rotina na AST principal
+        self.ast.body.append(node) # Adicionado esta linha para incluir a sub-rotina na AST principal
 
     def parse_parameters(self):
         params = []
-        if self.match("ABRE_PAREN") is None: return None
-        if self.current_token and self.current_token[0] == "TIPO":
+        if self.match(T_ABRE_PAREN) is None: return None
+        if self.current_token and self.current_token[0] == T_TIPO:
             while True:
-                param_type = self.match("TIPO")
+                param_type = self.match(T_TIPO)
                 if param_type is None: return None
-                param_name = self.match("ID")
+                param_name = self.match(T_ID)
                 if param_name is None: return None
-                params.append({"name": param_name, "type": param_type})
-                if self.current_token and self.current_token[0] == "VIRGULA":
-                    if self.match("VIRGULA") is None: return None
+                params.append(DeclaracaoVariavel(param_name, param_type))
+                if self.current_token and self.current_token[0] == T_VIRGULA:
+                    if self.match(T_VIRGULA) is None: return None
                 else:
                     break
-        if self.match("FECHA_PAREN") is None: return None
+        if self.match(T_FECHA_PAREN) is None: return None
         return params
 
     def atribuicao(self):
-        node = {"type": "Atribuicao"}
-        var_name = self.match("ID")
+        node = Atribuicao(posicao=self.posicao())
+        var_name = self.match(T_ID)
         if var_name is None: 
             self.synchronize()
             return
-        node["variable"] = var_name
-        if self.match("IGUAL") is None: 
+        node.variable = var_name
+        if self.match(T_IGUAL) is None: 
             self.synchronize()
             return
         value_node = self.expressao()
         if value_node is None: 
             self.synchronize()
             return
-        node["value"] = value_node
-        if self.match("PONTO_VIRGULA") is None: 
+        node.value = value_node
+        if self.match(T_PONTO_VIRGULA) is None: 
             self.synchronize()
             return
-        self.ast["body"].append(node)
+        self.ast.body.append(node)
 
     def estrutura_controle(self):
-        if self.current_token and self.current_token[0] == "SE":
+        if self.current_token and self.current_token[0] == T_SE:
             self.condicional()
-        elif self.current_token and self.current_token[0] == "ENQUANTO":
+        elif self.current_token and self.current_token[0] == T_ENQUANTO:
             self.repeticao()
         else:
             self.error("Erro de sintaxe: Esperado 'se' ou 'enquanto'")
             self.synchronize()
 
     def condicional(self):
-        node = {"type": "Condicional"}
-        if self.match("SE") is None: 
+        node = Condicional(posicao=self.posicao())
+        if self.match(T_SE) is None: 
             self.synchronize()
             return
-        if self.match("ABRE_PAREN") is None: 
+        if self.match(T_ABRE_PAREN) is None: 
             self.synchronize()
             return
         condition_node = self.expressao()
         if condition_node is None: 
             self.synchronize()
             return
-        node["condition"] = condition_node
-        if self.match("FECHA_PAREN") is None: 
+        node.condition = condition_node
+        if self.match(T_FECHA_PAREN) is None: 
             self.synchronize()
             return
-        if self.match("ABRE_CHAVE") is None: 
+        if self.match(T_ABRE_CHAVE) is None: 
             self.synchronize()
             return
-        node["consequent"] = []
-        original_body = self.ast["body"]
-        self.ast["body"] = node["consequent"]
-        self.comandos()
-        self.ast["body"] = original_body
-        if self.match("FECHA_CHAVE") is None: 
+        node.consequent = self.comandos_em([])
+        if self.match(T_FECHA_CHAVE) is None: 
             self.synchronize()
             return
-        if self.current_token and self.current_token[0] == "SENAO":
-            if self.match("SENAO") is None: 
+        if self.current_token and self.current_token[0] == T_SENAO:
+            if self.match(T_SENAO) is None: 
                 self.synchronize()
                 return
-            if self.match("ABRE_CHAVE") is None: 
+            if self.match(T_ABRE_CHAVE) is None: 
                 self.synchronize()
                 return
-            node["alternate"] = []
-            original_body = self.ast["body"]
-            self.ast["body"] = node["alternate"]
-            self.comandos()
-            self.ast["body"] = original_body
-            if self.match("FECHA_CHAVE") is None: 
+            node.alternate = self.comandos_em([])
+            if self.match(T_FECHA_CHAVE) is None: 
                 self.synchronize()
                 return
-        self.ast["body"].append(node)
+        self.ast.body.append(node)
 
     def repeticao(self):
-        node = {"type": "Repeticao"}
-        if self.match("ENQUANTO") is None: 
+        node = Repeticao(posicao=self.posicao())
+        if self.match(T_ENQUANTO) is None: 
             self.synchronize()
             return
-        if self.match("ABRE_PAREN") is None: 
+        if self.match(T_ABRE_PAREN) is None: 
             self.synchronize()
             return
         condition_node = self.expressao()
         if condition_node is None: 
             self.synchronize()
             return
-        node["condition"] = condition_node
-        if self.match("FECHA_PAREN") is None: 
+        node.condition = condition_node
+        if self.match(T_FECHA_PAREN) is None: 
             self.synchronize()
             return
-        if self.match("ABRE_CHAVE") is None: 
+        if self.match(T_ABRE_CHAVE) is None: 
             self.synchronize()
             return
-        node["body"] = []
-        original_body = self.ast["body"]
-        self.ast["body"] = node["body"]
-        self.comandos()
-        self.ast["body"] = original_body
-        if self.match("FECHA_CHAVE") is None: 
+        node.body = self.comandos_em([])
+        if self.match(T_FECHA_CHAVE) is None: 
             self.synchronize()
             return
-        self.ast["body"].append(node)
+        self.ast.body.append(node)
 
     def expressao(self):
-        return self.logica_ou()
-
-    def logica_ou(self):
-        node = self.logica_e()
-        while self.current_token and self.current_token[1] == "||":
-            operator = self.match("OP_LOGICO")
-            if operator is None: return None
-            right = self.logica_e()
-            if right is None: return None
-            node = {"type": "BinaryExpression", "operator": operator, "left": node, "right": right}
-        return node
-
-    def logica_e(self):
-        node = self.comparacao()
-        while self.current_token and self.current_token[1] == "&&":
-            operator = self.match("OP_LOGICO")
-            if operator is None: return None
-            right = self.comparacao()
-            if right is None: return None
-            node = {"type": "BinaryExpression", "operator": operator, "left": node, "right": right}
-        return node
-
-    def comparacao(self):
-        node = self.aritmetica()
-        while self.current_token and self.current_token[0] == "OP_COMP":
-            operator = self.match("OP_COMP")
-            if operator is None: return None
-            right = self.aritmetica()
-            if right is None: return None
-            node = {"type": "BinaryExpression", "operator": operator, "left": node, "right": right}
-        return node
-
-    def aritmetica(self):
-        node = self.termo()
-        while self.current_token and self.current_token[1] in ["+", "-"]:
-            operator = self.match("OP_ARIT")
-            if operator is None: return None
-            right = self.termo()
-            if right is None: return None
-            node = {"type": "BinaryExpression", "operator": operator, "left": node, "right": right}
-        return node
-
-    def termo(self):
-        node = self.fator()
-        while self.current_token and self.current_token[1] in ["*", "/", "%"]:
-            operator = self.match("OP_ARIT")
-            if operator is None: return None
-            right = self.fator()
-            if right is None: return None
-            node = {"type": "BinaryExpression", "operator": operator, "left": node, "right": right}
-        return node
-
-    def fator(self):
-        if self.current_token and self.current_token[0] == "NUMERO":
-            value = self.match("NUMERO")
-            if value is None: return None
-            if "." in value:
-                return {"type": "Literal", "value": value, "_type": "real"}
-            else:
-                return {"type": "Literal", "value": value, "_type": "inteiro"}
-        elif self.current_token and self.current_token[0] == "ID":
-            name = self.current_token[1]
-            self.advance() # Advance for ID
-            if self.current_token and self.current_token[0] == "ABRE_PAREN":
-                return self.chamada_subrotina_expressao(name)
+        """
+        Analisa uma expressão por precedência de operadores, sem recursão.
+
+        Os operadores binários pendentes (com o operando da esquerda), os parênteses
+        e chamadas ainda abertos e os '!' à espera do operando ficam em uma pilha
+        explícita, então nem expressões longas nem aninhamentos profundos consomem a
+        pilha do Python.
+
+        A AST e os erros são os mesmos da antiga descida recursiva (expressao ->
+        logica_ou -> logica_e -> comparacao -> aritmetica -> termo -> fator): um
+        operando inválido vale None; se ele for o operando da direita de um operador,
+        esse nível inteiro vale None e não aceita mais operadores da mesma precedência.
+        """
+        operadores = []  # (precedencia, operador, esquerda), _PARENTESE, _NEGACAO ou (0, ChamadaSubrotina)
+        avancar = self.advance
+        precedencia_de = PRECEDENCIA_BINARIA.get
+        while True:
+            # Espera um operando: '!', '(' e chamadas abertos vão para a pilha até chegar um primário
+            token = self.current_token
+            tipo = token[0] if token else None
+            if tipo == T_ID:
+                avancar()
+                if self.current_token and self.current_token[0] == T_ABRE_PAREN:
+                    avancar()
+                    chamada = ChamadaSubrotina(token[1], [])
+                    if self.current_token and self.current_token[0] != T_FECHA_PAREN:
+                        operadores.append((0, chamada))
+                        continue
+                    operando = chamada if self.match(T_FECHA_PAREN) is not None else None
+                else:
+                    operando = Identifier(token[1])
+            elif tipo == T_NUMERO:
+                avancar()
+                operando = Literal(token[1], "real" if "." in token[1] else "inteiro")
+            elif tipo == T_STRING:
+                avancar()
+                operando = Literal(token[1], "texto")
+            elif tipo == T_ABRE_PAREN:
+                avancar()
+                operadores.append(_PARENTESE)
+                continue
+            elif tipo == T_OP_LOGICO and token[1] == "!":
+                avancar()
+                operadores.append(_NEGACAO)
+                continue
             else:
-                return {"type": "Identifier", "name": name}
-        elif self.current_token and self.current_token[0] == "STRING":
-            value = self.match("STRING")
-            if value is None: return None
-            return {"type": "Literal", "value": value, "_type": "texto"}
-        elif self.current_token and self.current_token[0] == "ABRE_PAREN":
-            if self.match("ABRE_PAREN") is None: return None
-            node = self.expressao()
-            if node is None: return None
-            if self.match("FECHA_PAREN") is None: return None
-            return node
-        elif self.current_token and self.current_token[0] == "OP_LOGICO" and self.current_token[1] == "!":
-            operator = self.match("OP_LOGICO")
-            if operator is None: return None
-            operand = self.fator()
-            if operand is None: return None
-            return {"type": "UnaryExpression", "operator": operator, "operand": operand}
-        else:
-            self.error(f"Erro de sintaxe: Esperado NUMERO, ID, STRING, ABRE_PAREN ou '!', encontrado {self.current_token[0] if self.current_token else 'EOF'}")
-            self.advance() # Advance on unexpected token
-            return None
+                self.error(f"Erro de sintaxe: Esperado NUMERO, ID, STRING, ABRE_PAREN ou '!', encontrado {NOMES_TOKENS[tipo] if token else 'EOF'}")
+                # Um ';', uma chave ou o início de um comando fica para a sincronização:
+                # descartá-lo faria synchronize pular também o comando seguinte
+                if token is not None and tipo not in TOKENS_SINCRONIZACAO:
+                    self.descartar() # Advance on unexpected token
+                operando = None
+
+            while True:
+                # Primário completo: aplica os '!' que o precedem
+                while operadores and operadores[-1] is _NEGACAO:
+                    operadores.pop()
+                    if operando is not None:
+                        operando = UnaryExpression("!", operando)
+
+                token = self.current_token
+                precedencia = precedencia_de((token[0], token[1]), 0) if token else 0
+                # Fecha os operadores pendentes que ligam mais forte que o próximo. Os
+                # marcadores têm precedência 0, então sem operador adiante a redução
+                # vai até o parêntese ou chamada mais próximo.
+                while operadores and operadores[-1][0] > precedencia:
+                    _, operator, left = operadores.pop()
+                    if operando is not None:
+                        operando = BinaryExpression(operator, left, operando)
+                if precedencia:
+                    topo = operadores[-1] if operadores else None
+                    if topo is None or topo[0] != precedencia:
+                        operadores.append((precedencia, token[1], operando))
+                        avancar()
+                        break  # espera o operando da direita
+                    if operando is not None:
+                        # Associatividade à esquerda: fecha o operador anterior do mesmo nível
+                        operadores[-1] = (precedencia, token[1], BinaryExpression(topo[1], topo[2], operando))
+                        avancar()
+                        break
+                    # Operando da direita inválido: o nível falha e a (sub)expressão termina valendo None
+                    while operadores and operadores[-1][0]:
+                        operadores.pop()
+
+                # Fim de uma (sub)expressão: fecha o parêntese ou a chamada mais próximo
+                if not operadores:
+                    return operando
+                aberto = operadores.pop()
+                if aberto is _PARENTESE:
+                    if operando is not None and self.match(T_FECHA_PAREN) is None:
+                        operando = None
+                    continue
+                if operando is None:
+                    continue  # argumento inválido: a chamada inteira vale None
+                chamada = aberto[1]
+                chamada.arguments.append(operando)
+                if self.current_token and self.current_token[0] == T_VIRGULA:
+                    avancar()
+                    operadores.append(aberto)
+                    break  # espera o próximo argumento
+                operando = chamada if self.match(T_FECHA_PAREN) is not None else None
 
     def chamada_subrotina(self):
-        node = {"type": "ChamadaSubrotina"}
-        name = self.match("ID")
+        node = ChamadaSubrotina(posicao=self.posicao())
+        name = self.match(T_ID)
         if name is None: 
             self.synchronize()
             return
-        node["name"] = name
+        node.name = name
         
         args = self.parse_arguments()
         if args is None: 
             self.synchronize()
             return
         
-        node["arguments"] = args
+        node.arguments = args
         
-        if self.match("PONTO_VIRGULA") is None: 
+        if self.match(T_PONTO_VIRGULA) is None: 
             self.synchronize()
             return
-        self.ast["body"].append(node)
-
-    def chamada_subrotina_expressao(self, name):
-        node = {"type": "ChamadaSubrotina"}
-        node["name"] = name
-        
-        args = self.parse_arguments()
-        if args is None: return None
-        node["arguments"] = args
-        
-        return node
+        self.ast.body.append(node)
 
     def parse_arguments(self):
         args = []
-        if self.match("ABRE_PAREN") is None: return None
-        if self.current_token and self.current_token[0] != "FECHA_PAREN":
+        if self.match(T_ABRE_PAREN) is None: return None
+        if self.current_token and self.current_token[0] != T_FECHA_PAREN:
             while True:
                 arg_node = self.expressao()
                 if arg_node is None: return None
                 args.append(arg_node)
-                if self.current_token and self.current_token[0] == "VIRGULA":
-                    if self.match("VIRGULA") is None: return None
+                if self.current_token and self.current_token[0] == T_VIRGULA:
+                    if self.match(T_VIRGULA) is None: return None
                 else:
                     break
-        if self.match("FECHA_PAREN") is None: return None
+        if self.match(T_FECHA_PAREN) is None: return None
         return args
 
     def retorno(self):
-        node = {"type": "Retorno"}
-        if self.match("RETORNA") is None: 
+        node = Retorno(posicao=self.posicao())
+        if self.match(T_RETORNA) is None: 
             self.synchronize()
             return
-        if self.current_token and self.current_token[0] != "PONTO_VIRGULA":
+        if self.current_token and self.current_token[0] != T_PONTO_VIRGULA:
             value_node = self.expressao()
             if value_node is None: 
                 self.synchronize()
                 return
-            node["value"] = value_node
+            node.value = value_node
         
-        if self.match("PONTO_VIRGULA") is None: 
+        if self.match(T_PONTO_VIRGULA) is None: 
             self.synchronize()
             return
-        self.ast["body"].append(node)
+        self.ast.body.append(node)
 
 
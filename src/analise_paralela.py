@@ -0,0 +1,219 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from analisador_semantico import AnalisadorSemantico, _Entrada
+from nos_ast import (ATRIBUICAO, CONDICIONAL, REPETICAO, SUBROUTINE_DECLARATION, CHAMADA_SUBROTINA, RETORNO,
+                     BINARY_EXPRESSION, UNARY_EXPRESSION, IDENTIFIER)
+
+# Abaixo deste número de subrotinas de nível superior, os corpos são analisados no
+# próprio processo: iniciar os processos custaria mais que a análise
+MINIMO_SUBROTINAS_PARALELAS = 64
+
+class _Registro:
+    """
+    Tabela de símbolos e coletor de diagnósticos de um analisador das fases 1 e 2:
+    guarda as operações em ordem, para que sejam repetidas depois no analisador e
+    na tabela da compilação.
+    """
+    __slots__ = ("operacoes",)
+
+    def __init__(self):
+        self.operacoes = []
+
+    def erro(self, fase, mensagem):
+        self.operacoes.append(("error", mensagem))
+
+    def aviso(self, fase, mensagem):
+        self.operacoes.append(("warning", mensagem))
+
+    def definir(self, *args):
+        self.operacoes.append(("definir", args))
+
+    def atualizar_valor(self, *args):
+        self.operacoes.append(("atualizar_valor", args))
+
+    def __contains__(self, nome):
+        # A presença do nome é conferida por TabelaSimbolos.atualizar_valor, na repetição
+        return True
+
+class _AnalisadorAssinaturas(AnalisadorSemantico):
+    """
+    Fase 1: analisa o programa como AnalisadorSemantico, mas das subrotinas de
+    nível superior apenas declara a assinatura. Cada corpo vira uma tarefa com o
+    número de símbolos globais visíveis nesse ponto, e uma operação "corpo" marca
+    onde os seus diagnósticos entram.
+    """
+
+    def __init__(self, registro):
+        super().__init__(tabela_simbolos=registro, diagnosticos=registro)
+        self.registro = registro
+        self.globais = []  # (nome, info, vínculo) definidos no escopo global, na ordem
+        self.tarefas = []  # (nó da subrotina, número de símbolos globais visíveis)
+
+    def _definir(self, name, info):
+        super()._definir(name, info)
+        if len(self.scope_stack) == 1:
+            self.globais.append((name, info, self._indice[name].vinculo))
+
+    def analyze_subroutine_declaration(self, node):
+        if len(self.scope_stack) > 1:
+            return super().analyze_subroutine_declaration(node)
+        self.declare_subroutine(node.name, node.kind, node.parameters, node.return_type)
+        self.registro.operacoes.append(("corpo", len(self.tarefas)))
+        self.tarefas.append((node, len(self.globais)))
+
+class _AnalisadorCorpos:
+    """
+    Fase 2: analisa corpos de subrotinas de nível superior, em ordem, cada um com
+    os primeiros símbolos globais da fase 1 visíveis
+    """
+
+    def __init__(self, globais):
+        self.globais = globais
+        self.registro = _Registro()
+        self.analisador = AnalisadorSemantico(tabela_simbolos=self.registro, diagnosticos=self.registro)
+        self.visiveis = 0
+
+    def analisar(self, node, visiveis):
+        """Retorna as operações registradas na análise do corpo de node"""
+        analisador = self.analisador
+        escopo_global = analisador.scope_stack[0]
+        for name, info, vinculo in self.globais[self.visiveis:visiveis]:
+            escopo_global[name] = info
+            analisador._indice[name] = _Entrada(info, 0, vinculo, None)
+        self.visiveis = visiveis
+        self.registro.operacoes = []
+        analisador.analyze_subroutine_body(node)
+        return self.registro.operacoes
+
+def _nos_com_vinculo(node):
+    """Lista dos nós Atribuicao e Identifier de node, sempre na mesma ordem"""
+    nos = []
+    pilha = [node]
+    while pilha:
+        atual = pilha.pop()
+        if atual is None:  # Partes ausentes em programas com erros de sintaxe
+            continue
+        tag = atual.TAG
+        if tag == IDENTIFIER:
+            nos.append(atual)
+        elif tag == BINARY_EXPRESSION:
+            pilha.append(atual.right)
+            pilha.append(atual.left)
+        elif tag == UNARY_EXPRESSION:
+            pilha.append(atual.operand)
+        elif tag == ATRIBUICAO:
+            nos.append(atual)
+            pilha.append(atual.value)
+        elif tag == CHAMADA_SUBROTINA:
+            pilha.extend(atual.arguments or ())
+        elif tag == CONDICIONAL:
+            if atual.alternate is not None:
+                pilha.extend(atual.alternate)
+            pilha.extend(atual.consequent or ())
+            pilha.append(atual.condition)
+        elif tag == REPETICAO:
+            pilha.extend(atual.body or ())
+            pilha.append(atual.condition)
+        elif tag == SUBROUTINE_DECLARATION:
+            pilha.extend(atual.body or ())
+        elif tag == RETORNO:
+            pilha.append(atual.value)
+    return nos
+
+# Estado dos processos da fase 2, herdado do processo principal (ver _analisar_em_processos)
+_tarefas = None
+_corpos = None
+
+def _iniciar_processo(tarefas, globais):
+    global _tarefas, _corpos
+    _tarefas = tarefas
+    _corpos = _AnalisadorCorpos(globais)
+
+def _analisar_lote(inicio, fim):
+    """
+    Analisa em um processo da fase 2 os corpos das tarefas de inicio a fim. Os
+    vínculos anotados nos nós, que estão na memória deste processo, voltam
+    numa lista na ordem de _nos_com_vinculo.
+    """
+    resultados = []
+    for node, visiveis in _tarefas[inicio:fim]:
+        operacoes = _corpos.analisar(node, visiveis)
+        resultados.append((operacoes, [no.vinculo for no in _nos_com_vinculo(node)]))
+    return resultados
+
+def _analisar_em_processos(tarefas, globais, jobs):
+    """
+    Operações de cada corpo, analisados em um ProcessPoolExecutor; os vínculos são
+    copiados para os nós, mas os tipos guardados nas expressões (um cache da
+    análise) ficam apenas nos processos. Os processos são criados com fork depois da fase 1 e
+    recebem a AST e os símbolos globais pela memória herdada, sem serialização:
+    copiar a AST para outro processo custaria mais que analisá-la.
+    """
+    lotes = min(len(tarefas), jobs * 4)
+    tamanho = -(-len(tarefas) // lotes)
+    inicios = range(0, len(tarefas), tamanho)
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("fork"),
+                             initializer=_iniciar_processo, initargs=(tarefas, globais)) as executor:
+        resultados = []
+        for lote in executor.map(_analisar_lote, inicios, [inicio + tamanho for inicio in inicios]):
+            resultados.extend(lote)
+    operacoes = []
+    for (node, _), (operacoes_corpo, vinculos) in zip(tarefas, resultados):
+        for no, vinculo in zip(_nos_com_vinculo(node), vinculos):
+            no.vinculo = vinculo
+        operacoes.append(operacoes_corpo)
+    return operacoes
+
+def analisar_em_paralelo(ast, jobs=None, tabela_simbolos=None, diagnosticos=None):
+    """
+    Análise semântica em duas fases, com os corpos das subrotinas em paralelo.
+
+    A fase 1 percorre o programa na ordem, declarando variáveis globais e
+    assinaturas de subrotinas e analisando os comandos de nível superior. Na fase
+    2, o corpo de cada subrotina de nível superior é analisado com os símbolos
+    globais que estavam visíveis na sua declaração, independentemente dos demais,
+    em até jobs processos. As operações das duas fases (diagnósticos e alterações
+    da tabela de símbolos) são então repetidas na ordem do código fonte: o
+    resultado, inclusive os vínculos anotados na AST, é o mesmo de
+    AnalisadorSemantico.analyze_ast.
+
+    Args:
+        ast: Programa a analisar.
+        jobs: Número de processos da fase 2 (padrão: número de CPUs). Com 1, com
+            poucas subrotinas ou sem fork (Windows), a fase 2 roda no próprio processo.
+        tabela_simbolos, diagnosticos: Como em AnalisadorSemantico.
+
+    Returns:
+        O AnalisadorSemantico com os erros e avisos da análise.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    registro = _Registro()
+    assinaturas = _AnalisadorAssinaturas(registro)
+    assinaturas.analyze_ast(ast)
+    tarefas = assinaturas.tarefas
+
+    if (jobs > 1 and len(tarefas) >= MINIMO_SUBROTINAS_PARALELAS
+            and "fork" in multiprocessing.get_all_start_methods()):
+        corpos = _analisar_em_processos(tarefas, assinaturas.globais, jobs)
+    else:
+        analisador_corpos = _AnalisadorCorpos(assinaturas.globais)
+        corpos = [analisador_corpos.analisar(node, visiveis) for node, visiveis in tarefas]
+
+    analisador = AnalisadorSemantico(tabela_simbolos=tabela_simbolos, diagnosticos=diagnosticos)
+    _repetir(registro.operacoes, analisador, corpos)
+    return analisador
+
+def _repetir(operacoes, analisador, corpos):
+    """Repete no analisador (e na sua tabela de símbolos) as operações registradas, na ordem"""
+    tabela = analisador.tabela_simbolos
+    for operacao, argumento in operacoes:
+        if operacao == "corpo":
+            _repetir(corpos[argumento], analisador, None)
+        elif operacao == "error":
+            analisador.error(argumento)
+        elif operacao == "warning":
+            analisador.warning(argumento)
+        else:
+            getattr(tabela, operacao)(*argumento)
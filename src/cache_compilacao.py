@@ -0,0 +1,196 @@
+import glob
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import time
+
+from analisador_lexico import FluxoTokens
+from nos_ast import no_from_tuple
+
+# Formato das entradas gravadas; mudá-lo descarta o cache inteiro
+VERSAO_FORMATO_CACHE = 5
+
+# Tamanho máximo padrão do diretório de cache
+TAMANHO_MAXIMO_CACHE = 256 * 1024 * 1024
+
+# As entradas ficam em subdiretórios pelo primeiro dígito do hash; a remoção das
+# entradas antigas considera um subdiretório por vez, com 1/16 do tamanho máximo
+SUBDIRETORIOS = "0123456789abcdef"
+
+# Arquivos temporários mais antigos que isso são restos de processos interrompidos
+IDADE_TEMPORARIO_ABANDONADO = 3600
+
+_versao_compilador = None
+
+def versao_compilador():
+    """
+    Hash do código fonte dos módulos do compilador e da versão do Python. Qualquer
+    alteração no compilador muda a chave das entradas, que deixam de ser usadas.
+    """
+    global _versao_compilador
+    if _versao_compilador is None:
+        h = hashlib.sha256(sys.implementation.cache_tag.encode())
+        diretorio = os.path.dirname(os.path.abspath(__file__))
+        for caminho in sorted(glob.glob(os.path.join(diretorio, "*.py"))):
+            h.update(os.path.basename(caminho).encode())
+            with open(caminho, "rb") as f:
+                h.update(f.read())
+        _versao_compilador = h.hexdigest()
+    return _versao_compilador
+
+def gravar_atomico(caminho, dados):
+    """
+    Grava dados (bytes) em caminho por meio de um arquivo temporário no mesmo
+    diretório e os.replace, de modo que leitores em outros processos vejam o
+    arquivo antigo ou o novo inteiro, nunca um arquivo pela metade.
+
+    Returns:
+        True se o arquivo foi gravado.
+    """
+    diretorio = os.path.dirname(caminho) or "."
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".", suffix=".tmp")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(descritor, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+        return True
+    except OSError:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        return False
+
+class CacheCompilacao:
+    """
+    Cache em disco de compilações inteiras, endereçado pelo conteúdo.
+
+    A chave é o sha256 do código fonte, da versão do compilador e das opções que
+    alteram o resultado. Cada entrada guarda os tokens, a AST, a tabela de
+    símbolos, os diagnósticos e o código (ou bytecode) gerado, de modo que um
+    código já compilado não passa por nenhuma fase.
+
+    Vários processos podem usar o mesmo diretório: as entradas são gravadas de
+    forma atômica e uma entrada removida ou ilegível é tratada como ausente. O
+    tamanho total é limitado por tamanho_maximo; as entradas usadas há mais tempo
+    (pela data de modificação, atualizada a cada uso) são removidas primeiro.
+    """
+
+    def __init__(self, diretorio, tamanho_maximo=TAMANHO_MAXIMO_CACHE):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+
+    @staticmethod
+    def chave(texto, options):
+        """Chave da compilação de texto com options"""
+        # O nome do arquivo fonte só altera o resultado quando fica registrado no mapa de fontes
+        opcoes = (f"{options.generate_code}|{options.max_errors}|{options.optimize}|{options.backend}|"
+                  f"{options.partial_code}|{options.source_map and (options.source_name or '')}|"
+                  f"{options.strip_comments}")
+        h = hashlib.sha256(versao_compilador().encode())
+        h.update(b"\0" + opcoes.encode() + b"\0")
+        h.update(texto.encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def caminho(self, chave):
+        return os.path.join(self.diretorio, chave[0], chave + ".bin")
+
+    def carregar(self, chave, texto, result):
+        """
+        Preenche result (recém-criado por compile_source) com a compilação guardada
+        em chave. Retorna False se a entrada não existir ou não puder ser lida.
+        """
+        caminho = self.caminho(chave)
+        try:
+            with open(caminho, "rb") as f:
+                versao, dados = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+        if versao != VERSAO_FORMATO_CACHE:
+            return False
+        (tipos, inicios, fins, comentarios, ast, simbolos, diagnosticos, result.code, result.bytecode,
+         result.source_map, result.folded, result.stubs) = dados
+
+        result.tokens = FluxoTokens(texto, comentarios=comentarios is not None)
+        result.tokens.tipos.frombytes(tipos)
+        result.tokens.inicios.frombytes(inicios)
+        result.tokens.fins.frombytes(fins)
+        if comentarios is not None:
+            tabela = result.tokens.comentarios
+            for array_tabela, dados_array in zip((tabela.tipos, tabela.inicios, tabela.fins, tabela.antes_de),
+                                                 comentarios):
+                array_tabela.frombytes(dados_array)
+        result.ast = no_from_tuple(ast)
+        for nome, tipo, valor in simbolos:
+            result.symbol_table.definir(nome, tipo, valor)
+        result.diagnostics.restaurar(*diagnosticos)
+        try:
+            os.utime(caminho)  # Marca a entrada como usada recentemente
+        except OSError:
+            pass
+        return True
+
+    def guardar(self, chave, result):
+        """Grava a compilação em result sob chave; ASTs profundas demais para serializar são ignoradas"""
+        coletor = result.diagnostics
+        diagnosticos = ([(d.fase, d.severidade, d.mensagem) for d in coletor.diagnosticos],
+                        [(fase, severidade, total) for (fase, severidade), total in coletor.contagens.items()],
+                        coletor.suprimidos)
+        simbolos = [(nome, entrada.tipo, entrada.valor) for nome, entrada in result.symbol_table.items()]
+        tabela = result.tokens.comentarios
+        comentarios = None
+        if tabela is not None:
+            comentarios = (tabela.tipos.tobytes(), tabela.inicios.tobytes(), tabela.fins.tobytes(),
+                           tabela.antes_de.tobytes())
+        try:
+            dados = marshal.dumps((VERSAO_FORMATO_CACHE, (
+                result.tokens.tipos.tobytes(), result.tokens.inicios.tobytes(), result.tokens.fins.tobytes(),
+                comentarios, result.ast.to_tuple(), simbolos, diagnosticos, result.code, result.bytecode, result.source_map,
+                result.folded, result.stubs)))
+        except (RecursionError, ValueError):
+            return
+        caminho = self.caminho(chave)
+        if gravar_atomico(caminho, dados):
+            self.limpar(os.path.dirname(caminho))
+
+    def limpar(self, subdiretorio):
+        """Remove as entradas usadas há mais tempo até o subdiretório caber na sua parte do limite"""
+        limite = self.tamanho_maximo // len(SUBDIRETORIOS)
+        agora = time.time()
+        entradas = []
+        total = 0
+        try:
+            with os.scandir(subdiretorio) as iterador:
+                for entrada in iterador:
+                    try:
+                        info = entrada.stat()
+                    except OSError:
+                        continue  # Removida por outro processo
+                    if entrada.name.endswith(".tmp"):
+                        if agora - info.st_mtime > IDADE_TEMPORARIO_ABANDONADO:
+                            _remover(entrada.path)
+                        continue
+                    entradas.append((info.st_mtime, info.st_size, entrada.path))
+                    total += info.st_size
+        except OSError:
+            return
+        if total <= limite:
+            return
+        entradas.sort()
+        for _, tamanho, caminho in entradas:
+            if total <= limite:
+                break
+            _remover(caminho)
+            total -= tamanho
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass  # Já removido por outro processo, ou em uso
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente do servidor de compilação (servidor.py).
+
+Uso:
+    python3 src/cliente.py arquivo.coins [--socket /tmp/coins.sock | --host 127.0.0.1 --port 8765]
+                           [-O] [--max-errors N] [--partial-codegen] [--strip-comments]
+                           [--saida codigo_gerado.py]
+"""
+
+import argparse
+import itertools
+import json
+import socket as _socket
+import sys
+
+from servidor import PORTA_PADRAO
+
+class ErroServidor(Exception):
+    """Resposta com "ok": false do servidor de compilação"""
+
+class ClienteCompilacao:
+    """
+    Conexão com um servidor de compilação. Cada chamada envia um pedido e espera a
+    resposta; use várias instâncias (ou conexões) para compilações em paralelo.
+
+    Args:
+        socket: Caminho do socket Unix do servidor. Se None, conecta por TCP em host
+            e porta.
+        timeout: Tempo máximo de espera por uma resposta, em segundos (None: sem limite).
+    """
+
+    def __init__(self, socket=None, host="127.0.0.1", porta=PORTA_PADRAO, timeout=None):
+        if socket is not None:
+            self.conexao = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+            self.conexao.settimeout(timeout)
+            self.conexao.connect(socket)
+        else:
+            self.conexao = _socket.create_connection((host, porta), timeout=timeout)
+        self.arquivo = self.conexao.makefile("rwb")
+        self._ids = itertools.count(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        self.arquivo.close()
+        self.conexao.close()
+
+    def pedir(self, pedido):
+        """Envia um pedido (dicionário do protocolo) e retorna a resposta"""
+        pedido = dict(pedido, id=next(self._ids))
+        self.arquivo.write(json.dumps(pedido, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.arquivo.flush()
+        linha = self.arquivo.readline()
+        if not linha:
+            raise ConnectionError("o servidor fechou a conexão")
+        resposta = json.loads(linha)
+        if not resposta.get("ok"):
+            raise ErroServidor(resposta.get("error"))
+        return resposta
+
+    def compilar(self, texto, **opcoes):
+        """
+        Compila texto no servidor. opcoes são campos de CompileOptions aceitos pelo
+        servidor (ver servidor.OPCOES_PERMITIDAS), como optimize=True.
+
+        Returns:
+            A resposta do servidor: success, code, diagnostics, ...
+        """
+        return self.pedir({"source": texto, "options": opcoes})
+
+    def ping(self):
+        return self.pedir({"op": "ping"})
+
+    def estado(self):
+        """Processos, pedidos na fila, em andamento e atendidos pelo servidor"""
+        return self.pedir({"op": "stats"})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cliente do servidor de compilação da Linguagem-Coins")
+    parser.add_argument("arquivo", help="Arquivo Coins a compilar")
+    parser.add_argument("--socket", default=None, help="Caminho do socket Unix (padrão: TCP em --host e --port)")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço TCP (padrão: %(default)s)")
+    parser.add_argument("--port", type=int, default=PORTA_PADRAO, help="Porta TCP (padrão: %(default)s)")
+    parser.add_argument("-O", "--optimize", action="store_true", help="Como em compilador.py")
+    parser.add_argument("--max-errors", type=int, default=None, help="Como em compilador.py")
+    parser.add_argument("--partial-codegen", action="store_true", help="Como em compilador.py")
+    parser.add_argument("--strip-comments", action="store_true", help="Como em compilador.py")
+    parser.add_argument("--saida", default=None, help="Grava o código gerado neste arquivo (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+
+    with open(args.arquivo, "r", encoding="utf-8") as f:
+        codigo_fonte = f.read()
+    opcoes = {"optimize": args.optimize, "partial_code": args.partial_codegen, "max_errors": args.max_errors,
+              "strip_comments": args.strip_comments}
+    try:
+        with ClienteCompilacao(args.socket, args.host, args.port) as cliente:
+            resposta = cliente.compilar(codigo_fonte, **opcoes)
+    except (OSError, ErroServidor) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    for diagnostico in resposta["diagnostics"]:
+        print(f"{diagnostico['fase']} {diagnostico['severidade']}: {diagnostico['mensagem']}", file=sys.stderr)
+    if resposta["code"] is not None:
+        if args.saida is None:
+            print(resposta["code"])
+        else:
+            with open(args.saida, "w", encoding="utf-8") as f:
+                f.write(resposta["code"])
+    return 0 if resposta["success"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,135 +1,622 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import argparse
+import glob
 import sys
 import os
-from analisador_lexico import analise_lexica, tabela_simbolos, salvar_html
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from json.encoder import encode_basestring
+from analisador_lexico import NOMES_TOKENS, analise_lexica, gerar_tokens, salvar_html
 from analisador_sintatico import Parser
-from analisador_semantico import analise_semantica
+from analisador_semantico import AnalisadorSemantico
+from analise_paralela import analisar_em_paralelo
+from cache_compilacao import CacheCompilacao, TAMANHO_MAXIMO_CACHE
+from formatos_ast import FORMATOS_AST, salvar_ast
+from diagnosticos import (
+    ColetorDiagnosticos, EscritorLog, EscritorJSONL,
+    FASE_LEXICA, FASE_SINTATICA, FASE_SEMANTICA, FASE_GERACAO, ERRO, AVISO
+)
 from gerador_codigo import CodeGenerator
+from gerador_bytecode import ErroGeracaoBytecode, compilar, gerar_bytecode, salvar_pyc
+from geracao_parcial import gerar_codigo_parcial
+from incremental import analisar_incremental
+from instrumentacao import Instrumentacao, EscritorTrace
+from mapa_fontes import gerar_mapa_fontes, salvar_mapa_fontes
+from maquina_virtual import ErroExecucao, executar
+from nos_ast import Programa, contar_nos
+from otimizador import otimizar
+from simbolos import TabelaSimbolos
 
-def main():
+# Extensões reconhecidas como código fonte Coins na compilação em lote
+EXTENSOES_FONTE = (".coins", ".txt")
+
+# Linhas acumuladas antes de cada escrita de listar_tokens
+LINHAS_POR_ESCRITA = 4096
+
+@dataclass
+class CompileOptions:
+    """Opções de compile_source"""
+    output_dir: str = None  # Se informado, os artefatos são gravados nesse diretório
+    generate_code: bool = True  # Gera código Python quando não há erros
+    max_errors: int = None  # Limite de erros reportados (None: sem limite)
+    diagnostics_jsonl: bool = False  # Grava também diagnosticos.jsonl em output_dir
+    optimize: bool = False  # Dobra constantes e simplifica identidades antes da geração de código
+    ast_format: str = "json"  # Formato da AST gravada em output_dir: "json" e "compact" (ast.json) ou "binary" (ast.bin)
+    backend: str = "python"  # "python" gera código fonte (code); "bytecode", um objeto de código (bytecode)
+    partial_code: bool = False  # Com erros, gera o código dos itens sem erros e stubs que levantam RuntimeError para os demais
+    source_map: bool = False  # Com o backend python, gera o mapa de fontes (Source Map v3) do código gerado
+    source_name: str = None  # Nome do arquivo fonte registrado no mapa de fontes (None: "<coins>")
+    strip_comments: bool = False  # Descarta os comentários na análise léxica; o código gerado fica sem eles
+    semantic_jobs: int = None  # Processos da análise semântica dos corpos das subrotinas (None: análise sequencial)
+    incremental_cache: str = None  # Arquivo do cache da compilação incremental (None: desativada)
+    cache_dir: str = None  # Diretório do cache de compilações inteiras (None: desativado)
+    cache_max_size: int = TAMANHO_MAXIMO_CACHE  # Tamanho máximo de cache_dir, em bytes
+    timings: bool = False  # Mede tempo, pico de memória e contagens de cada fase (timings do resultado)
+    hooks: list = None  # GanchoInstrumentacao que recebem os intervalos das fases e de cada subrotina
+
+@dataclass
+class CompileResult:
+    """Resultado em memória de uma compilação"""
+    tokens: object = None  # FluxoTokens produzido pelo analisador léxico
+    ast: Programa = None
+    symbol_table: TabelaSimbolos = None
+    diagnostics: ColetorDiagnosticos = None
+    code: str = None  # Código Python gerado, ou None se a geração foi ignorada
+    bytecode: object = None  # Objeto de código Python (options.backend == "bytecode")
+    source_map: dict = None  # Mapa de fontes do código gerado (options.source_map)
+    folded: int = 0  # Nós da AST substituídos pelo otimizador (options.optimize)
+    stubs: int = 0  # Itens com erros substituídos por stubs na geração parcial (options.partial_code)
+    incremental_stats: dict = None  # Itens reaproveitados do cache incremental, se ele foi usado
+    cache_hit: bool = False  # True se o resultado veio de options.cache_dir, sem executar as fases
+    timings: list = None  # Intervalo de cada fase executada (options.timings)
+
+    @property
+    def lexical_errors(self):
+        return self.diagnostics.mensagens(FASE_LEXICA, ERRO)
+
+    @property
+    def syntax_errors(self):
+        return self.diagnostics.mensagens(FASE_SINTATICA, ERRO)
+
+    @property
+    def semantic_errors(self):
+        return self.diagnostics.mensagens(FASE_SEMANTICA, ERRO)
+
+    @property
+    def semantic_warnings(self):
+        return self.diagnostics.mensagens(FASE_SEMANTICA, AVISO)
+
+    @property
+    def success(self):
+        return not self.diagnostics.tem_erros()
+
+def compile_source(text, options=None):
     """
-    Função principal do compilador da Linguagem-Coins
-    Executa todas as fases de compilação: léxica, sintática e semântica
+    Compila um código fonte Coins inteiramente em memória.
+
+    Executa as fases léxica, sintática e semântica e, se não houver erros, a
+    otimização (se options.optimize) e a geração de código. Nada é impresso;
+    arquivos só são gravados se options.output_dir for informado, e os logs de
+    diagnóstico são gravados uma única vez, ao final. Com options.cache_dir, um
+    código já compilado com as mesmas opções é lido do cache. Com options.timings
+    ou options.hooks, cada fase é medida (ver instrumentacao).
+
+    Args:
+        text: Código fonte na linguagem Coins.
+        options: CompileOptions. Se None, usa as opções padrão.
+
+    Returns:
+        CompileResult com tokens, AST, diagnósticos, tabela de símbolos e código gerado.
+    """
+    if options is None:
+        options = CompileOptions()
+
+    diagnostics = ColetorDiagnosticos(max_erros=options.max_errors)
+    if options.output_dir is not None:
+        caminhos = caminhos_artefatos(options.output_dir)
+        diagnostics.adicionar_destino(EscritorLog(caminhos["errors_log"], secoes=True))
+        diagnostics.adicionar_destino(EscritorLog(caminhos["semantic_errors_log"], fases=(FASE_SEMANTICA,)))
+        if options.diagnostics_jsonl:
+            diagnostics.adicionar_destino(EscritorJSONL(caminhos["diagnosticos_jsonl"]))
+    result = CompileResult(symbol_table=TabelaSimbolos(), diagnostics=diagnostics)
+    instrumentacao = Instrumentacao(options.hooks)
+
+    if options.cache_dir is None:
+        executar_fases(text, options, result, instrumentacao)
+    else:
+        cache = CacheCompilacao(options.cache_dir, options.cache_max_size)
+        chave = cache.chave(text, options)
+        with instrumentacao.fase("cache"):
+            result.cache_hit = cache.carregar(chave, text, result)
+        if not result.cache_hit:
+            executar_fases(text, options, result, instrumentacao)
+            cache.guardar(chave, result)
+
+    if options.output_dir is not None:
+        with instrumentacao.fase("artefatos"):
+            escrever_artefatos(result, options.output_dir, options.ast_format)
+    instrumentacao.fechar()
+    if options.timings:
+        result.timings = instrumentacao.fases
+    return result
+
+def executar_fases(text, options, result, instrumentacao=None):
+    """Executa as fases de compile_source sobre text, preenchendo result"""
+    diagnostics = result.diagnostics
+    if instrumentacao is None:
+        instrumentacao = Instrumentacao()
+    # Contagens caras (nós da AST) só são feitas quando alguém vai lê-las
+    medir = options.timings or bool(instrumentacao.ganchos)
+    # Intervalos por subrotina, só para os ganchos
+    detalhes = instrumentacao if instrumentacao.ganchos else None
+
+    # Fase 1: Análise Léxica
+    with instrumentacao.fase(FASE_LEXICA) as intervalo:
+        result.tokens, erros_lexicos = analise_lexica(text, result.symbol_table,
+                                                      comentarios=not options.strip_comments)
+        for erro in erros_lexicos:
+            diagnostics.erro(FASE_LEXICA, erro)
+        intervalo.contagens.update(tokens=len(result.tokens), erros=diagnostics.contagem(FASE_LEXICA))
+
+    # Fases 2 e 3: reaproveitam o cache incremental, se houver; com erros de sintaxe
+    # o código é analisado inteiro, como sem cache
+    incremental = False
+    if options.incremental_cache is not None:
+        with instrumentacao.fase("incremental") as intervalo:
+            incremental = analisar_incremental(result, options.incremental_cache)
+            if incremental:
+                intervalo.contagens.update(result.incremental_stats)
+    if not incremental:
+        # Fase 2: Análise Sintática
+        with instrumentacao.fase(FASE_SINTATICA) as intervalo:
+            parser = Parser(result.tokens, max_erros=options.max_errors)
+            result.ast = parser.parse()
+            for erro in parser.errors:
+                diagnostics.erro(FASE_SINTATICA, erro)
+            if parser.interrompido:
+                diagnostics.aviso(FASE_SINTATICA, f"Análise sintática interrompida após {len(parser.errors)} erros "
+                                                  f"(limite de erros); o restante do código não foi analisado.")
+            intervalo.contagens.update(erros=diagnostics.contagem(FASE_SINTATICA, ERRO), cascata=parser.suprimidos)
+        if medir:
+            intervalo.contagens.update(itens=len(result.ast.body), nos=contar_nos(result.ast))
+
+        # Fase 3: Análise Semântica
+        with instrumentacao.fase(FASE_SEMANTICA) as intervalo:
+            if options.semantic_jobs is None:
+                analisador = AnalisadorSemantico(tabela_simbolos=result.symbol_table, diagnosticos=diagnostics,
+                                                 instrumentacao=detalhes)
+                analisador.analyze_ast(result.ast)
+            else:
+                analisar_em_paralelo(result.ast, options.semantic_jobs, tabela_simbolos=result.symbol_table,
+                                     diagnosticos=diagnostics)
+            intervalo.contagens.update(erros=diagnostics.contagem(FASE_SEMANTICA, ERRO),
+                                       avisos=diagnostics.contagem(FASE_SEMANTICA, AVISO),
+                                       simbolos=len(result.symbol_table))
+
+    # Fase 4: Otimização e Geração de Código (se não houver erros, ou parcial)
+    if options.generate_code and result.success:
+        if options.optimize:
+            with instrumentacao.fase("otimizacao") as intervalo:
+                result.ast, result.folded = otimizar(result.ast)
+                intervalo.contagens["simplificados"] = result.folded
+        with instrumentacao.fase("geracao") as intervalo:
+            if options.backend == "bytecode":
+                try:
+                    result.bytecode = gerar_bytecode(result.ast)
+                except ErroGeracaoBytecode as e:
+                    diagnostics.erro(FASE_GERACAO, str(e))
+            else:
+                gerador = CodeGenerator(result.ast, instrumentacao=detalhes, fluxo=result.tokens)
+                result.code = gerador.generate()
+                if options.source_map:
+                    result.source_map = mapa_do_codigo(gerador.linhas_fonte(), options)
+                intervalo.contagens["linhas"] = result.code.count("\n") + 1
+    elif options.generate_code and options.partial_code:
+        with instrumentacao.fase("geracao") as intervalo:
+            posicoes = [] if options.source_map and options.backend != "bytecode" else None
+            code, result.stubs = gerar_codigo_parcial(result.tokens, erros_lexicos=bool(erros_lexicos),
+                                                      posicoes=posicoes)
+            if options.backend == "bytecode":
+                try:
+                    result.bytecode = compilar(code)
+                except ErroGeracaoBytecode as e:
+                    diagnostics.erro(FASE_GERACAO, str(e))
+            else:
+                result.code = code
+                if posicoes is not None:
+                    result.source_map = mapa_do_codigo(posicoes, options)
+                intervalo.contagens["linhas"] = code.count("\n") + 1
+            intervalo.contagens["stubs"] = result.stubs
+
+def mapa_do_codigo(posicoes, options):
+    """Mapa de fontes de codigo_gerado.py a partir da posição Coins de cada linha"""
+    return gerar_mapa_fontes(posicoes, options.source_name or "<coins>", "codigo_gerado.py")
+
+def caminhos_artefatos(output_dir):
+    """Caminhos dos arquivos gerados por uma compilação dentro de output_dir"""
+    return {
+        "errors_log": os.path.join(output_dir, "errors.log"),
+        "semantic_errors_log": os.path.join(output_dir, "semantic_errors.log"),
+        "diagnosticos_jsonl": os.path.join(output_dir, "diagnosticos.jsonl"),
+        "ast_json": os.path.join(output_dir, "ast.json"),
+        "ast_bin": os.path.join(output_dir, "ast.bin"),
+        "tabela_simbolos_html": os.path.join(output_dir, "tabela_simbolos.html"),
+        "codigo_gerado_py": os.path.join(output_dir, "codigo_gerado.py"),
+        "codigo_gerado_pyc": os.path.join(output_dir, "codigo_gerado.pyc"),
+        "mapa_fontes": os.path.join(output_dir, "codigo_gerado.py.map"),
+        "cache_incremental": os.path.join(output_dir, "cache_incremental.bin"),
+    }
+
+def escrever_artefatos(result, output_dir, ast_format="json"):
+    """Grava os artefatos de uma compilação em output_dir e descarrega os logs de diagnóstico"""
+    os.makedirs(output_dir, exist_ok=True)
+    caminhos = caminhos_artefatos(output_dir)
+
+    result.diagnostics.fechar()
+
+    salvar_ast(result.ast, caminho_ast(caminhos, ast_format), ast_format)
+
+    salvar_html(caminhos["tabela_simbolos_html"], result.symbol_table)
+
+    if result.code is not None:
+        with open(caminhos["codigo_gerado_py"], "w", encoding="utf-8") as f:
+            f.write(result.code)
+    if result.source_map is not None:
+        salvar_mapa_fontes(result.source_map, caminhos["mapa_fontes"])
+    if result.bytecode is not None:
+        salvar_pyc(result.bytecode, caminhos["codigo_gerado_pyc"], result.tokens.codigo)
+
+def caminho_ast(caminhos, ast_format):
+    """Arquivo da AST entre os caminhos de caminhos_artefatos, conforme o formato"""
+    return caminhos["ast_bin"] if ast_format == "binary" else caminhos["ast_json"]
+
+def coletar_arquivos(entradas):
     """
+    Expande as entradas da linha de comando em uma lista ordenada de arquivos.
+
+    Cada entrada pode ser um arquivo, um diretório (percorrido recursivamente em
+    busca de arquivos .coins e .txt) ou um padrão glob.
+    """
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for raiz, _, nomes in os.walk(entrada):
+                for nome in nomes:
+                    if nome.endswith(EXTENSOES_FONTE):
+                        arquivos.append(os.path.join(raiz, nome))
+        elif glob.has_magic(entrada):
+            arquivos.extend(c for c in glob.glob(entrada, recursive=True) if os.path.isfile(c))
+        else:
+            arquivos.append(entrada)
+    return sorted(set(os.path.abspath(a) for a in arquivos))
+
+def _compilar_arquivo(tarefa):
+    """Compila um arquivo em um processo do pool e retorna um resumo serializável"""
+    caminho, options = tarefa
+    resumo = {"arquivo": caminho, "output_dir": options.output_dir, "sucesso": False,
+              "erros_lexicos": 0, "erros_sintaticos": 0, "erros_semanticos": 0,
+              "avisos": 0, "cache": False, "falha": None}
     try:
-        # Define caminhos relativos para os arquivos
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(script_dir)
-        codigo_path = os.path.join(project_root, "examples", "codigo.txt")
-        output_dir = os.path.join(project_root, "output")
-        
-        # Cria diretório de saída se não existir
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Caminhos para arquivos de saída
-        errors_log = os.path.join(output_dir, "errors.log")
-        semantic_errors_log = os.path.join(output_dir, "semantic_errors.log")
-        ast_json = os.path.join(output_dir, "ast.json")
-        tabela_simbolos_html = os.path.join(output_dir, "tabela_simbolos.html")
-        codigo_gerado_py = os.path.join(output_dir, "codigo_gerado.py")
-        
-        # Limpa os arquivos de log antes de cada execução
-        with open(errors_log, "w", encoding="utf-8") as f:
-            f.write("")
-        with open(semantic_errors_log, "w", encoding="utf-8") as f:
-            f.write("")
+        with open(caminho, "r", encoding="utf-8") as f:
+            codigo_fonte = f.read()
+        result = compile_source(codigo_fonte, options)
+    except Exception as e:
+        resumo["falha"] = f"{type(e).__name__}: {e}"
+        return resumo
+    contagem = result.diagnostics.contagem
+    resumo["sucesso"] = result.success
+    resumo["cache"] = result.cache_hit
+    resumo["erros_lexicos"] = contagem(FASE_LEXICA, ERRO)
+    resumo["erros_sintaticos"] = contagem(FASE_SINTATICA, ERRO)
+    resumo["erros_semanticos"] = contagem(FASE_SEMANTICA, ERRO)
+    resumo["erros_geracao"] = contagem(FASE_GERACAO, ERRO)
+    resumo["avisos"] = contagem(FASE_SEMANTICA, AVISO)
+    return resumo
+
+def compilar_lote(arquivos, output_dir, jobs=None, options=None):
+    """
+    Compila vários arquivos em paralelo com um ProcessPoolExecutor.
+
+    Cada arquivo tem sua própria compilação (e tabela de símbolos) e seus artefatos
+    em um subdiretório de output_dir que espelha o caminho relativo do arquivo, sem
+    a extensão; arquivos que só diferem na extensão (a.coins e a.txt) a mantêm, para
+    que não gravem no mesmo subdiretório (a.coins/ e a.txt/). As
+    demais opções de compilação vêm de options; com options.incremental_cache, cada
+    arquivo usa o cache incremental do seu subdiretório.
+
+    Returns:
+        Lista de resumos, na mesma ordem de arquivos.
+    """
+    if not arquivos:
+        return []
+    if options is None:
+        options = CompileOptions()
+    base = os.path.commonpath([os.path.dirname(a) for a in arquivos])
+    relativos = [os.path.relpath(arquivo, base) for arquivo in arquivos]
+    sem_extensao = Counter(os.path.normcase(os.path.splitext(relativo)[0]) for relativo in relativos)
+    tarefas = []
+    for arquivo, relativo in zip(arquivos, relativos):
+        if sem_extensao[os.path.normcase(os.path.splitext(relativo)[0])] == 1:
+            relativo = os.path.splitext(relativo)[0]
+        destino = os.path.join(output_dir, relativo)
+        # semantic_jobs=None: os arquivos já são compilados em paralelo; hooks=None: os
+        # ganchos não voltam dos processos do pool
+        opcoes_arquivo = replace(options, output_dir=destino, semantic_jobs=None, source_name=arquivo, hooks=None)
+        if options.incremental_cache is not None:
+            opcoes_arquivo.incremental_cache = caminhos_artefatos(destino)["cache_incremental"]
+        tarefas.append((arquivo, opcoes_arquivo))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        return [_compilar_arquivo(tarefa) for tarefa in tarefas]
+    chunksize = max(1, len(tarefas) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_compilar_arquivo, tarefas, chunksize=chunksize))
+
+def imprimir_resumo_lote(resumos):
+    """Imprime o resumo agregado de uma compilação em lote"""
+    falhas = [r for r in resumos if not r["sucesso"]]
+    print("=== RESUMO DA COMPILAÇÃO EM LOTE ===")
+    for r in falhas:
+        if r["falha"]:
+            print(f"❌ {r['arquivo']}: {r['falha']}")
+        else:
+            geracao = f", {r['erros_geracao']} erros de geração de código" if r["erros_geracao"] else ""
+            print(f"⚠ {r['arquivo']}: {r['erros_lexicos']} erros léxicos, {r['erros_sintaticos']} erros sintáticos, {r['erros_semanticos']} erros semânticos{geracao}")
+    print(f"Arquivos: {len(resumos)}  Sucesso: {len(resumos) - len(falhas)}  Falhas: {len(falhas)}")
+    reaproveitados = sum(r["cache"] for r in resumos)
+    if reaproveitados:
+        print(f"Reaproveitados do cache: {reaproveitados}")
+    print(f"Total: {sum(r['erros_lexicos'] for r in resumos)} erros léxicos, "
+          f"{sum(r['erros_sintaticos'] for r in resumos)} erros sintáticos, "
+          f"{sum(r['erros_semanticos'] for r in resumos)} erros semânticos, "
+          f"{sum(r['avisos'] for r in resumos)} avisos")
+
+def imprimir_tempos(intervalos):
+    """Imprime o tempo, o pico de memória e as contagens de cada fase"""
+    print("\n=== TEMPOS ===")
+    total = 0
+    for intervalo in intervalos:
+        total += intervalo.duracao
+        memoria = ""
+        if intervalo.memoria_pico is not None:
+            memoria = f"  pico {intervalo.memoria_pico / (1024 * 1024):8.2f} MB"
+        contagens = "  ".join(f"{nome}={valor}" for nome, valor in intervalo.contagens.items())
+        print(f"{intervalo.nome:12} {intervalo.duracao / 1e6:10.2f} ms{memoria}  {contagens}")
+    print(f"{'total':12} {total / 1e6:10.2f} ms")
+
+def compilar_arquivo_unico(codigo_path, options, executar_programa=False):
+    """
+    Compila um arquivo, grava os artefatos em options.output_dir e imprime o relatório
+    de cada fase. Com executar_programa, executa o programa compilado na máquina
+    virtual e imprime o valor final das variáveis globais. Com options.timings, imprime
+    também o tempo de cada fase.
+    """
+    try:
+        caminhos = caminhos_artefatos(options.output_dir)
+        errors_log = caminhos["errors_log"]
+        semantic_errors_log = caminhos["semantic_errors_log"]
 
         # Lê o código fonte
         with open(codigo_path, "r", encoding="utf-8") as file:
             codigo_fonte = file.read()
-            if not codigo_fonte.strip():
-                print(f"⚠ O arquivo {codigo_path} está vazio!")
-                return
-            
-            print("=== COMPILADOR LINGUAGEM-COINS ===")
-            print(f"Lendo código fonte de: {codigo_path}")
-            print("Iniciando análise do código fonte...\n")
-            
-            # Fase 1: Análise Léxica
-            print("=== ANÁLISE LÉXICA ===")
-            tokens, erros_lexicos = analise_lexica(codigo_fonte)
-            if erros_lexicos:
-                print(f"⚠ {len(erros_lexicos)} erros léxicos encontrados.")
-                for erro in erros_lexicos:
-                    print(f"  - {erro}")
-                with open(errors_log, "a", encoding="utf-8") as f:
-                    f.write("\n--- Erros Léxicos ---\n")
-                    for erro in erros_lexicos:
-                        f.write(erro + "\n")
-            else:
-                print("✅ Nenhum erro léxico encontrado.")
-            print(f"✅ {len(tokens)} tokens gerados.")
-            
-            # Fase 2: Análise Sintática
-            print("\n=== ANÁLISE SINTÁTICA ===")
-            parser = Parser(tokens)
-            ast = parser.parse()
-            
-            # Salva a AST em JSON
-            with open(ast_json, "w", encoding="utf-8") as f:
-                json.dump(ast, f, indent=4)
-            print(f"✅ AST salva em {ast_json}")
-            
-            # Verifica erros sintáticos e os escreve no log
-            if parser.errors:
-                print(f"⚠ {len(parser.errors)} erros sintáticos encontrados. Verifique o arquivo {errors_log} para detalhes.")
-                with open(errors_log, "a", encoding="utf-8") as f:
-                    f.write("\n--- Erros Sintáticos ---\n")
-                    for erro in parser.errors:
-                        f.write(erro + "\n")
-            else:
-                print("✅ Nenhum erro sintático encontrado.")
-            
-            # Fase 3: Análise Semântica
-            print("\n=== ANÁLISE SEMÂNTICA ===")
-            resultado, erros, avisos = analise_semantica(ast, semantic_errors_log_path=semantic_errors_log)
-            
-            if erros:
-                print(f"⚠ {len(erros)} erros semânticos encontrados:")
-                for erro in erros:
-                    print(f"  - {erro}")
-            
-            if avisos:
-                print(f"⚠ {len(avisos)} avisos semânticos encontrados:")
-                for aviso in avisos:
-                    print(f"  - {aviso}")
-            
-            if not erros and not avisos:
-                print("✅ Nenhum erro ou aviso semântico encontrado.")
-            
-            # Salva a tabela de símbolos em HTML APÓS a análise semântica
-            # para garantir que os tipos e valores estejam atualizados
-            salvar_html(tabela_simbolos_html)
-            print(f"✅ Tabela de símbolos atualizada salva em {tabela_simbolos_html}")
-            
-            # Fase 4: Geração de Código (se não houver erros)
-            if not parser.errors and not erros and not erros_lexicos:
-                print("\n=== GERAÇÃO DE CÓDIGO ===")
-                generator = CodeGenerator(ast)
-                python_code = generator.generate()
-                with open(codigo_gerado_py, "w", encoding="utf-8") as f:
-                    f.write(python_code)
-                print(f"✅ Código Python gerado e salvo em {codigo_gerado_py}")
-            else:
-                print("⚠ Geração de código ignorada devido a erros léxicos, sintáticos ou semânticos.")
-            
-            # Resumo final
-            print("\n=== RESUMO DA COMPILAÇÃO ===")
-            if not parser.errors and not erros and not erros_lexicos:
-                print("✅ Compilação concluída com sucesso!")
+        if not codigo_fonte.strip():
+            print(f"⚠ O arquivo {codigo_path} está vazio!")
+            return 0
+
+        print("=== COMPILADOR LINGUAGEM-COINS ===")
+        print(f"Lendo código fonte de: {codigo_path}")
+        print("Iniciando análise do código fonte...\n")
+
+        result = compile_source(codigo_fonte, options)
+        contagem = result.diagnostics.contagem
+        if result.cache_hit:
+            print(f"✅ Resultado reaproveitado do cache de compilação ({options.cache_dir}).\n")
+
+        # Fase 1: Análise Léxica
+        print("=== ANÁLISE LÉXICA ===")
+        if result.lexical_errors:
+            print(f"⚠ {contagem(FASE_LEXICA, ERRO)} erros léxicos encontrados.")
+            for erro in result.lexical_errors:
+                print(f"  - {erro}")
+        else:
+            print("✅ Nenhum erro léxico encontrado.")
+        print(f"✅ {len(result.tokens)} tokens gerados.")
+        if result.incremental_stats is not None:
+            stats = result.incremental_stats
+            print(f"✅ Compilação incremental: {stats['asts_reaproveitadas']} de {stats['itens']} itens sem nova análise sintática, "
+                  f"{stats['semanticas_reaproveitadas']} sem nova análise semântica.")
+
+        # Fase 2: Análise Sintática
+        print("\n=== ANÁLISE SINTÁTICA ===")
+        print(f"✅ AST salva em {caminho_ast(caminhos, options.ast_format)}")
+        if result.syntax_errors:
+            print(f"⚠ {contagem(FASE_SINTATICA, ERRO)} erros sintáticos encontrados. Verifique o arquivo {errors_log} para detalhes.")
+        else:
+            print("✅ Nenhum erro sintático encontrado.")
+
+        # Fase 3: Análise Semântica
+        print("\n=== ANÁLISE SEMÂNTICA ===")
+        if result.semantic_errors:
+            print(f"⚠ {contagem(FASE_SEMANTICA, ERRO)} erros semânticos encontrados:")
+            for erro in result.semantic_errors:
+                print(f"  - {erro}")
+
+        if result.semantic_warnings:
+            print(f"⚠ {len(result.semantic_warnings)} avisos semânticos encontrados:")
+            for aviso in result.semantic_warnings:
+                print(f"  - {aviso}")
+
+        if not result.semantic_errors and not result.semantic_warnings:
+            print("✅ Nenhum erro ou aviso semântico encontrado.")
+        print(f"✅ Tabela de símbolos atualizada salva em {caminhos['tabela_simbolos_html']}")
+
+        # Fase 4: Geração de Código
+        if result.code is not None or result.bytecode is not None:
+            print("\n=== GERAÇÃO DE CÓDIGO ===")
+            if result.stubs:
+                print(f"⚠ Geração parcial: {result.stubs} itens com erros substituídos por stubs que levantam RuntimeError")
+            elif options.optimize:
+                print(f"✅ Otimização: {result.folded} expressões simplificadas")
+            if result.bytecode is not None:
+                print(f"✅ Bytecode Python gerado e salvo em {caminhos['codigo_gerado_pyc']}")
             else:
-                print(f"⚠ Compilação concluída com {len(erros_lexicos)} erros léxicos, {len(parser.errors)} erros sintáticos e {len(erros)} erros semânticos.")
-                print(f"Verifique os arquivos {errors_log} e {semantic_errors_log} para detalhes.")
-    
+                print(f"✅ Código Python gerado e salvo em {caminhos['codigo_gerado_py']}")
+            if result.source_map is not None:
+                print(f"✅ Mapa de fontes salvo em {caminhos['mapa_fontes']}")
+        elif contagem(FASE_GERACAO, ERRO):
+            print("\n=== GERAÇÃO DE CÓDIGO ===")
+            for erro in result.diagnostics.mensagens(FASE_GERACAO, ERRO):
+                print(f"❌ {erro}")
+        else:
+            print("⚠ Geração de código ignorada devido a erros léxicos, sintáticos ou semânticos.")
+
+        # Execução na máquina virtual
+        if executar_programa and result.success:
+            print("\n=== EXECUÇÃO ===")
+            try:
+                variaveis = executar(result.ast)
+            except ErroExecucao as e:
+                print(f"❌ Erro de execução: {e}")
+                return 1
+            for nome, valor in variaveis.items():
+                print(f"  {nome} = {valor!r}")
+
+        if result.timings is not None:
+            imprimir_tempos(result.timings)
+
+        # Resumo final
+        print("\n=== RESUMO DA COMPILAÇÃO ===")
+        if result.success:
+            print("✅ Compilação concluída com sucesso!")
+            return 0
+        if contagem(FASE_GERACAO, ERRO):
+            print("⚠ Compilação concluída com erro na geração de código.")
+        else:
+            print(f"⚠ Compilação concluída com {contagem(FASE_LEXICA, ERRO)} erros léxicos, {contagem(FASE_SINTATICA, ERRO)} erros sintáticos e {contagem(FASE_SEMANTICA, ERRO)} erros semânticos.")
+        if result.diagnostics.suprimidos:
+            print(f"⚠ {result.diagnostics.suprimidos} erros não foram reportados (limite de {options.max_errors} erros).")
+        print(f"Verifique os arquivos {errors_log} e {semantic_errors_log} para detalhes.")
+        return 1
+
     except FileNotFoundError as e:
         print(f"❌ Arquivo não encontrado: {e}")
     except Exception as e:
         print(f"❌ Erro durante a compilação: {str(e)}")
+    return 1
 
-if __name__ == "__main__":
-    main()
+def listar_tokens(codigo_path, saida=None):
+    """
+    Escreve em saida (padrão: sys.stdout) os tokens do arquivo, um objeto JSON por
+    linha com tipo, valor, linha e coluna, à medida que gerar_tokens os produz: nem
+    a lista de tokens nem o FluxoTokens são montados, de modo que a memória não
+    cresce com o número de tokens. Os comentários não são listados, e os erros
+    léxicos vão para sys.stderr.
 
+    Returns:
+        0, ou 1 se houver erros léxicos.
+    """
+    saida = saida or sys.stdout
+    with open(codigo_path, "r", encoding="utf-8") as f:
+        codigo_fonte = f.read()
+    # O texto de cada linha é montado à mão: json.dumps de um dicionário por token
+    # custa mais que a própria análise léxica
+    prefixos = [f'{{"tipo": "{nome}", "valor": ' for nome in NOMES_TOKENS]
+    erros_lexicos = []
+    linhas = []
+    for tipo, valor, linha, coluna in gerar_tokens(codigo_fonte, erros_lexicos):
+        linhas.append(f'{prefixos[tipo]}{encode_basestring(valor)}, "linha": {linha}, "coluna": {coluna}}}\n')
+        if len(linhas) >= LINHAS_POR_ESCRITA:
+            saida.write("".join(linhas))
+            linhas.clear()
+    saida.write("".join(linhas))
+    for erro in erros_lexicos:
+        print(erro, file=sys.stderr)
+    return 1 if erros_lexicos else 0
 
+def main(argv=None):
+    """
+    Função principal do compilador da Linguagem-Coins
+    Executa todas as fases de compilação: léxica, sintática e semântica
+
+    Sem argumentos, compila examples/codigo.txt. Com um diretório, um padrão glob
+    ou vários arquivos, compila todos em paralelo e imprime um resumo agregado.
+    Retorna 0 em caso de sucesso e 1 se alguma compilação falhar.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+
+    parser = argparse.ArgumentParser(description="Compilador da Linguagem-Coins")
+    parser.add_argument("entradas", nargs="*",
+                        help="Arquivos, diretórios ou padrões glob de arquivos .coins/.txt (padrão: examples/codigo.txt)")
+    parser.add_argument("--output-dir", default=os.path.join(project_root, "output"),
+                        help="Diretório de saída dos artefatos (padrão: output/)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Número de processos na compilação em lote (padrão: número de CPUs)")
+    parser.add_argument("--semantic-jobs", type=int, default=None, metavar="N",
+                        help="Analisa os corpos das subrotinas em N processos, depois das declarações globais e assinaturas (0: número de CPUs)")
+    parser.add_argument("--max-errors", type=int, default=None,
+                        help="Número máximo de erros reportados por arquivo")
+    parser.add_argument("--diagnostics-jsonl", action="store_true",
+                        help="Grava também os diagnósticos em diagnosticos.jsonl (JSON Lines)")
+    parser.add_argument("-O", "--optimize", action="store_true",
+                        help="Dobra constantes e simplifica identidades (x*1, x+0) antes da geração de código")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reaproveita a análise dos trechos não alterados desde a última compilação (cache_incremental.bin)")
+    parser.add_argument("--backend", choices=("python", "bytecode"), default="python",
+                        help="python: gera codigo_gerado.py; bytecode: compila a AST direto para codigo_gerado.pyc, sem código fonte intermediário")
+    parser.add_argument("--ast-format", choices=FORMATOS_AST, default="json",
+                        help="json: ast.json indentado; compact: ast.json sem espaços; binary: ast.bin, lido sob demanda com formatos_ast.AstBinaria")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Diretório de cache: arquivos já compilados com as mesmas opções não passam por nenhuma fase")
+    parser.add_argument("--cache-max-size", type=int, default=TAMANHO_MAXIMO_CACHE // (1024 * 1024),
+                        help="Tamanho máximo do diretório de cache em MB; as entradas usadas há mais tempo são removidas (padrão: %(default)s)")
+    parser.add_argument("--run", action="store_true",
+                        help="Executa o programa compilado na máquina virtual e imprime as variáveis globais (apenas com um arquivo)")
+    parser.add_argument("--partial-codegen", action="store_true",
+                        help="Com erros, gera o código das subrotinas e comandos sem erros e stubs que levantam RuntimeError para os demais")
+    parser.add_argument("--strip-comments", action="store_true",
+                        help="Descarta os comentários já na análise léxica; o código gerado sai sem eles")
+    parser.add_argument("--source-map", action="store_true",
+                        help="Grava codigo_gerado.py.map (Source Map v3) com a linha e a coluna Coins de cada linha do código gerado")
+    parser.add_argument("--timings", action="store_true",
+                        help="Imprime o tempo, o pico de memória e as contagens de cada fase (apenas com um arquivo)")
+    parser.add_argument("--tokens", action="store_true",
+                        help="Só executa a análise léxica e escreve os tokens na saída padrão, um objeto JSON por linha (apenas com um arquivo)")
+    parser.add_argument("--trace", default=None, metavar="ARQUIVO",
+                        help="Grava em ARQUIVO um trace no formato do Chrome com as fases e cada subrotina (apenas com um arquivo)")
+    args = parser.parse_args(argv)
+    options = CompileOptions(output_dir=args.output_dir, max_errors=args.max_errors,
+                             diagnostics_jsonl=args.diagnostics_jsonl, optimize=args.optimize, backend=args.backend,
+                             ast_format=args.ast_format,
+                             partial_code=args.partial_codegen, source_map=args.source_map,
+                             strip_comments=args.strip_comments,
+                             semantic_jobs=args.semantic_jobs,
+                             cache_dir=args.cache_dir, cache_max_size=args.cache_max_size * 1024 * 1024)
+    if args.incremental:
+        options.incremental_cache = caminhos_artefatos(args.output_dir)["cache_incremental"]
+
+    entradas = args.entradas or [os.path.join(project_root, "examples", "codigo.txt")]
+    if len(entradas) == 1 and os.path.isfile(entradas[0]):
+        if args.tokens:
+            return listar_tokens(entradas[0])
+        options.source_name = os.path.abspath(entradas[0])
+        options.timings = args.timings
+        if args.trace:
+            options.hooks = [EscritorTrace(args.trace)]
+        return compilar_arquivo_unico(entradas[0], options, executar_programa=args.run)
+
+    arquivos = coletar_arquivos(entradas)
+    if not arquivos:
+        print("⚠ Nenhum arquivo .coins ou .txt encontrado.")
+        return 1
+    print(f"=== COMPILANDO {len(arquivos)} ARQUIVOS ===")
+    resumos = compilar_lote(arquivos, args.output_dir, args.jobs, options)
+    imprimir_resumo_lote(resumos)
+    return 0 if all(r["sucesso"] for r in resumos) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
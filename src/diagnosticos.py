@@ -0,0 +1,176 @@
+import json
+import os
+
+# Fases do compilador que produzem diagnósticos, na ordem em que são executadas
+FASE_LEXICA = "lexica"
+FASE_SINTATICA = "sintatica"
+FASE_SEMANTICA = "semantica"
+FASE_GERACAO = "geracao"
+FASES = (FASE_LEXICA, FASE_SINTATICA, FASE_SEMANTICA, FASE_GERACAO)
+
+ERRO = "erro"
+AVISO = "aviso"
+
+TITULOS_FASES = {
+    FASE_LEXICA: "Erros Léxicos",
+    FASE_SINTATICA: "Erros Sintáticos",
+    FASE_SEMANTICA: "Diagnósticos Semânticos",
+    FASE_GERACAO: "Erros de Geração de Código",
+}
+
+class Diagnostico:
+    """Um erro ou aviso reportado por uma fase do compilador"""
+    __slots__ = ("fase", "severidade", "mensagem")
+
+    def __init__(self, fase, severidade, mensagem):
+        self.fase = fase
+        self.severidade = severidade
+        self.mensagem = mensagem
+
+    def formatar(self):
+        """Texto do diagnóstico como aparece nos arquivos de log"""
+        if self.fase == FASE_SEMANTICA:
+            rotulo = "ERRO SEMÂNTICO" if self.severidade == ERRO else "AVISO SEMÂNTICO"
+            return f"{rotulo}: {self.mensagem}"
+        # As mensagens das demais fases já trazem o prefixo ("Erro léxico: ...")
+        return self.mensagem
+
+    def to_dict(self):
+        return {"fase": self.fase, "severidade": self.severidade, "mensagem": self.mensagem}
+
+class ColetorDiagnosticos:
+    """
+    Coleta em memória os diagnósticos de uma compilação e os repassa aos destinos.
+
+    Os destinos (EscritorLog, EscritorJSONL) apenas acumulam o que recebem; nada é
+    gravado até fechar(), que descarrega cada destino uma única vez.
+
+    Args:
+        max_erros: Número máximo de erros reportados. Erros além do limite são
+            apenas contados (ver suprimidos). None desativa o limite.
+        destinos: Lista inicial de destinos.
+    """
+
+    def __init__(self, max_erros=None, destinos=None):
+        self.max_erros = max_erros
+        self.destinos = list(destinos or [])
+        self.diagnosticos = []
+        self.suprimidos = 0
+        self.contagens = {}  # (fase, severidade) -> total, incluindo os suprimidos
+        self._erros_reportados = 0
+
+    def adicionar_destino(self, destino):
+        self.destinos.append(destino)
+
+    def reportar(self, fase, severidade, mensagem):
+        """Registra um diagnóstico. Retorna False se ele foi suprimido pelo limite de erros"""
+        chave = (fase, severidade)
+        self.contagens[chave] = self.contagens.get(chave, 0) + 1
+        if severidade == ERRO:
+            if self.max_erros is not None and self._erros_reportados >= self.max_erros:
+                self.suprimidos += 1
+                return False
+            self._erros_reportados += 1
+        diagnostico = Diagnostico(fase, severidade, mensagem)
+        self.diagnosticos.append(diagnostico)
+        for destino in self.destinos:
+            destino.receber(diagnostico)
+        return True
+
+    def erro(self, fase, mensagem):
+        return self.reportar(fase, ERRO, mensagem)
+
+    def aviso(self, fase, mensagem):
+        return self.reportar(fase, AVISO, mensagem)
+
+    def restaurar(self, diagnosticos, contagens, suprimidos):
+        """
+        Repassa aos destinos os diagnósticos de uma compilação guardada no cache,
+        como (fase, severidade, mensagem), e restaura suas contagens.
+        """
+        for fase, severidade, mensagem in diagnosticos:
+            diagnostico = Diagnostico(fase, severidade, mensagem)
+            self.diagnosticos.append(diagnostico)
+            for destino in self.destinos:
+                destino.receber(diagnostico)
+            if severidade == ERRO:
+                self._erros_reportados += 1
+        for fase, severidade, total in contagens:
+            self.contagens[(fase, severidade)] = self.contagens.get((fase, severidade), 0) + total
+        self.suprimidos += suprimidos
+
+    def mensagens(self, fase=None, severidade=None):
+        """Mensagens reportadas, filtradas opcionalmente por fase e severidade"""
+        return [d.mensagem for d in self.diagnosticos
+                if (fase is None or d.fase == fase) and (severidade is None or d.severidade == severidade)]
+
+    def contagem(self, fase=None, severidade=None):
+        """Total de diagnósticos, incluindo os suprimidos pelo limite de erros"""
+        return sum(total for (f, s), total in self.contagens.items()
+                   if (fase is None or f == fase) and (severidade is None or s == severidade))
+
+    def tem_erros(self):
+        return self.contagem(severidade=ERRO) > 0
+
+    def fechar(self):
+        """Descarrega todos os destinos"""
+        for destino in self.destinos:
+            destino.fechar(self)
+
+def _garantir_diretorio(caminho):
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+
+class EscritorLog:
+    """
+    Destino que grava os diagnósticos em um arquivo texto, de uma só vez, em fechar().
+
+    Args:
+        caminho: Arquivo de saída (sobrescrito).
+        fases: Fases aceitas. None aceita todas.
+        secoes: Se True, agrupa os diagnósticos por fase com um título por seção.
+    """
+
+    def __init__(self, caminho, fases=None, secoes=False):
+        self.caminho = caminho
+        self.fases = fases
+        self.secoes = secoes
+        self._linhas = {}  # fase -> linhas formatadas
+
+    def receber(self, diagnostico):
+        if self.fases is None or diagnostico.fase in self.fases:
+            self._linhas.setdefault(diagnostico.fase, []).append(diagnostico.formatar())
+
+    def fechar(self, coletor=None):
+        partes = []
+        for fase in FASES:
+            linhas = self._linhas.get(fase)
+            if not linhas:
+                continue
+            if self.secoes:
+                partes.append(f"\n--- {TITULOS_FASES[fase]} ---\n")
+            partes.append("\n".join(linhas) + "\n")
+        if coletor is not None and coletor.suprimidos:
+            partes.append(f"... {coletor.suprimidos} erros adicionais suprimidos (limite de {coletor.max_erros} erros).\n")
+        _garantir_diretorio(self.caminho)
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            f.write("".join(partes))
+        self._linhas = {}
+
+class EscritorJSONL:
+    """Destino que grava um diagnóstico por linha em JSON (JSON Lines), de uma só vez, em fechar()"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._linhas = []
+
+    def receber(self, diagnostico):
+        self._linhas.append(json.dumps(diagnostico.to_dict(), ensure_ascii=False))
+
+    def fechar(self, coletor=None):
+        _garantir_diretorio(self.caminho)
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            if self._linhas:
+                f.write("\n".join(self._linhas) + "\n")
+        self._linhas = []
@@ -0,0 +1,265 @@
+import json
+import marshal
+import mmap
+import struct
+from json.encoder import encode_basestring_ascii
+
+from nos_ast import No, DeclaracaoVariavel, Programa, NOS_POR_TAG, SUBROUTINE_DECLARATION
+
+# Valores de --ast-format: JSON indentado (ast.json), JSON compacto (ast.json) e binário (ast.bin)
+FORMATOS_AST = ("json", "compact", "binary")
+
+# Arquivo binário: MAGICO, os registros (um por item de nível superior do programa),
+# o índice dos registros e, nos últimos 8 bytes, a posição do índice
+MAGICO_AST_BINARIA = b"COINSAST\x01"
+_POSICAO_INDICE = struct.Struct("<Q")
+
+# Marcadores da forma plana de um nó (ver _achatar); inteiros >= 0 são TAGs de nós
+LISTA = -1
+DECLARACAO_VARIAVEL = -2
+INTEIRO = -3
+
+# Bytes de texto acumulados antes de cada escrita no arquivo
+BYTES_POR_ESCRITA = 1 << 20
+
+# Profundidades cuja quebra de linha com indentação fica em cache; as mais fundas são
+# montadas a cada uso, para que o cache não cresça com o quadrado da profundidade
+PROFUNDIDADE_CACHE_QUEBRAS = 256
+
+def escrever_json(ast, arquivo, indent=4):
+    """
+    Escreve ast em arquivo (aberto em modo texto) no formato de ast.json, nó por
+    nó, sem montar to_dict() da árvore inteira. O texto é o mesmo de
+    json.dump(ast.to_dict(), arquivo, indent=indent); com indent None, o JSON é
+    compacto, sem espaços. A árvore é percorrida com uma pilha explícita, como em
+    No.repr_dict, para que expressões longas não estourem o limite de recursão.
+
+    A pilha guarda só a profundidade de cada quebra de linha, não a indentação
+    pronta, e o texto é escrito a cada BYTES_POR_ESCRITA: árvores profundas têm um
+    ast.json grande, mas a memória usada não cresce com ele.
+    """
+    if indent is None:
+        separador_item, separador_chave = ",", ":"
+    else:
+        separador_item, separador_chave = ",", ": "
+    quebras = {}  # Profundidade -> quebra de linha seguida da indentação
+
+    def quebra(profundidade):
+        if indent is None:
+            return ""
+        texto = quebras.get(profundidade)
+        if texto is None:
+            texto = "\n" + " " * (indent * profundidade)
+            if profundidade < PROFUNDIDADE_CACHE_QUEBRAS:
+                quebras[profundidade] = texto
+        return texto
+
+    partes = []
+    tamanho = 0
+    # (texto antes da quebra, item, profundidade): com texto None, item é um valor a
+    # escrever; do contrário, escreve o texto, a quebra da profundidade e item
+    pilha = [(None, ast, 0)]
+    while pilha:
+        antes, item, profundidade = pilha.pop()
+        if antes is not None:
+            texto = antes + quebra(profundidade) + item
+        elif type(item) is str:
+            texto = encode_basestring_ascii(item)
+        elif isinstance(item, No):
+            itens = [("type", item.TYPE)]
+            for atributo, chave, opcional in item.CAMPOS:
+                valor = getattr(item, atributo)
+                if valor is None and opcional:
+                    continue
+                itens.append((chave, valor))
+            pilha.append(("", "}", profundidade))
+            for indice in range(len(itens) - 1, -1, -1):
+                chave, valor = itens[indice]
+                pilha.append((None, valor, profundidade + 1))
+                pilha.append(("{" if indice == 0 else separador_item, encode_basestring_ascii(chave) + separador_chave,
+                              profundidade + 1))
+            continue
+        elif isinstance(item, list):
+            if not item:
+                texto = "[]"
+            else:
+                pilha.append(("", "]", profundidade))
+                for indice in range(len(item) - 1, -1, -1):
+                    pilha.append((None, item[indice], profundidade + 1))
+                    pilha.append(("[" if indice == 0 else separador_item, "", profundidade + 1))
+                continue
+        elif isinstance(item, DeclaracaoVariavel):
+            pilha.append(("", "}", profundidade))
+            pilha.append((None, item.var_type, 0))
+            pilha.append((separador_item, '"type"' + separador_chave, profundidade + 1))
+            pilha.append((None, item.name, 0))
+            pilha.append(("{", '"name"' + separador_chave, profundidade + 1))
+            continue
+        else:
+            texto = json.dumps(item)
+        partes.append(texto)
+        tamanho += len(texto)
+        if tamanho >= BYTES_POR_ESCRITA:
+            arquivo.write("".join(partes))
+            partes.clear()
+            tamanho = 0
+    arquivo.write("".join(partes))
+
+def _achatar(node):
+    """
+    Forma plana de um nó: uma lista em pré-ordem com a TAG de cada nó seguida dos
+    valores de CAMPOS e EXTRAS, LISTA e o tamanho antes dos itens de cada lista,
+    DECLARACAO_VARIAVEL antes do nome e do tipo e INTEIRO antes de valores inteiros.
+    Ao contrário de No.to_tuple, não tem aninhamento, então marshal a grava
+    qualquer que seja a profundidade da árvore.
+    """
+    valores = []
+    pilha = [node]
+    while pilha:
+        item = pilha.pop()
+        if isinstance(item, No):
+            valores.append(item.TAG)
+            for atributo in reversed(item.ATRIBUTOS):
+                pilha.append(getattr(item, atributo))
+        elif type(item) is list:
+            valores.append(LISTA)
+            valores.append(len(item))
+            pilha.extend(reversed(item))
+        elif type(item) is DeclaracaoVariavel:
+            valores.append(DECLARACAO_VARIAVEL)
+            valores.append(item.name)
+            valores.append(item.var_type)
+        elif type(item) is int:
+            valores.append(INTEIRO)
+            valores.append(item)
+        else:
+            valores.append(item)
+    return valores
+
+def _reconstruir(valores):
+    """Nó a partir da forma plana produzida por _achatar"""
+    pilha = []  # [classe ou list, argumentos, valores que faltam]
+    indice = 0
+    while True:
+        valor = valores[indice]
+        indice += 1
+        if type(valor) is int:
+            if valor >= 0:
+                classe = NOS_POR_TAG[valor]
+                if classe.ATRIBUTOS:
+                    pilha.append([classe, [], len(classe.ATRIBUTOS)])
+                    continue
+                valor = classe()
+            elif valor == LISTA:
+                tamanho = valores[indice]
+                indice += 1
+                if tamanho:
+                    pilha.append([list, [], tamanho])
+                    continue
+                valor = []
+            elif valor == DECLARACAO_VARIAVEL:
+                valor = DeclaracaoVariavel(valores[indice], valores[indice + 1])
+                indice += 2
+            else:
+                valor = valores[indice]
+                indice += 1
+        # Entrega o valor ao nó ou lista em construção, fechando os que ficarem completos
+        while pilha:
+            quadro = pilha[-1]
+            quadro[1].append(valor)
+            quadro[2] -= 1
+            if quadro[2]:
+                break
+            pilha.pop()
+            valor = quadro[1] if quadro[0] is list else quadro[0](*quadro[1])
+        else:
+            return valor
+
+def escrever_binario(ast, arquivo):
+    """
+    Escreve ast em arquivo (aberto em modo binário) no formato lido por AstBinaria:
+    cada item de nível superior do programa é um registro independente, gravado
+    com marshal assim que é convertido
+    """
+    arquivo.write(MAGICO_AST_BINARIA)
+    posicao = len(MAGICO_AST_BINARIA)
+    indice = []
+    for node in ast.body:
+        registro = marshal.dumps(_achatar(node))
+        arquivo.write(registro)
+        nome = node.name if node.TAG == SUBROUTINE_DECLARATION else None
+        indice.append((posicao, posicao + len(registro), node.TYPE, nome))
+        posicao += len(registro)
+    arquivo.write(marshal.dumps(indice))
+    arquivo.write(_POSICAO_INDICE.pack(posicao))
+
+class AstBinaria:
+    """
+    AST gravada por escrever_binario, mapeada em memória e lida sob demanda.
+
+    Abrir o arquivo lê apenas o índice; cada item de nível superior só é
+    reconstruído quando pedido, de modo que ferramentas podem inspecionar uma
+    subrotina sem carregar a árvore inteira:
+
+        with AstBinaria("output/ast.bin") as arquivo:
+            funcao = arquivo.subrotina("fatorial")
+            programa = arquivo.programa()
+
+    Raises:
+        ValueError: Se o arquivo não estiver no formato de escrever_binario.
+    """
+
+    def __init__(self, caminho):
+        with open(caminho, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            tamanho = len(self._mapa)
+            if (tamanho < len(MAGICO_AST_BINARIA) + _POSICAO_INDICE.size
+                    or self._mapa[:len(MAGICO_AST_BINARIA)] != MAGICO_AST_BINARIA):
+                raise ValueError(f"{caminho} não é uma AST binária da linguagem Coins")
+            fim_indice = tamanho - _POSICAO_INDICE.size
+            (inicio_indice,) = _POSICAO_INDICE.unpack(self._mapa[fim_indice:])
+            # Itens de nível superior: (início, fim, tipo do nó, nome da subrotina ou None)
+            self.itens = marshal.loads(self._mapa[inicio_indice:fim_indice])
+        except Exception:
+            self._mapa.close()
+            raise
+        self._posicoes_por_nome = {}
+        for posicao, (_, _, _, nome) in enumerate(self.itens):
+            if nome is not None:
+                self._posicoes_por_nome.setdefault(nome, posicao)
+
+    def __len__(self):
+        return len(self.itens)
+
+    def __getitem__(self, posicao):
+        """Nó do item de nível superior na posição dada"""
+        inicio, fim, _, _ = self.itens[posicao]
+        return _reconstruir(marshal.loads(self._mapa[inicio:fim]))
+
+    def subrotina(self, nome):
+        """Primeira subrotina de nível superior com esse nome, ou None"""
+        posicao = self._posicoes_por_nome.get(nome)
+        return self[posicao] if posicao is not None else None
+
+    def programa(self):
+        """Programa com todos os itens"""
+        return Programa([self[posicao] for posicao in range(len(self.itens))])
+
+    def fechar(self):
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+def salvar_ast(ast, caminho, formato="json"):
+    """Grava ast em caminho no formato dado (um de FORMATOS_AST)"""
+    if formato == "binary":
+        with open(caminho, "wb") as f:
+            escrever_binario(ast, f)
+    else:
+        with open(caminho, "w", encoding="utf-8") as f:
+            escrever_json(ast, f, indent=4 if formato == "json" else None)
@@ -0,0 +1,95 @@
+from analisador_lexico import varrer, T_MISMATCH, T_FUNCAO, T_PROCEDIMENTO, T_ID, T_ABRE_PAREN, T_ABRE_CHAVE
+from analisador_sintatico import Parser
+from analisador_semantico import AnalisadorSemantico
+from gerador_codigo import CodeGenerator
+from incremental import dividir_itens
+from nos_ast import Programa, SUBROUTINE_DECLARATION
+
+def _posicoes_invalidas(fluxo):
+    """Posições dos caracteres descartados pelo analisador léxico"""
+    return [inicio for tipo, inicio, _ in varrer(fluxo.codigo) if tipo == T_MISMATCH]
+
+def _stub(fluxo, primeiro, ultimo):
+    """Código Python que substitui um item com erros: uma subrotina ou um comando que levanta RuntimeError"""
+    indice = primeiro
+    linha = fluxo[indice].linha
+    # Nome da subrotina: o primeiro ID depois de funcao/procedimento
+    nome_indice = indice + 1
+    while nome_indice < ultimo and fluxo.tipos[nome_indice] not in (T_ID, T_ABRE_PAREN, T_ABRE_CHAVE):
+        nome_indice += 1
+    if (indice < ultimo and fluxo.tipos[indice] in (T_FUNCAO, T_PROCEDIMENTO)
+            and nome_indice < ultimo and fluxo.tipos[nome_indice] == T_ID):
+        nome = fluxo[nome_indice].valor
+        mensagem = f"Subrotina '{nome}' não compilada devido a erros (linha {linha})"
+        return f"\ndef {nome}(*args):\n    raise RuntimeError({mensagem!r})"
+    mensagem = f"Comando não compilado devido a erros (linha {linha})"
+    return f"raise RuntimeError({mensagem!r})"
+
+def gerar_codigo_parcial(fluxo, erros_lexicos=False, posicoes=None):
+    """
+    Gera o código Python de um programa com erros, item de nível superior por item.
+
+    Cada item (declaração, subrotina ou comando, como em incremental.dividir_itens)
+    é analisado sozinho, na ordem do arquivo, com os símbolos declarados pelos
+    itens anteriores. Itens sem erros geram o mesmo código que CodeGenerator; itens
+    com erros léxicos, sintáticos ou semânticos são substituídos por um stub: uma
+    subrotina com o mesmo nome que levanta RuntimeError quando chamada, ou um
+    comando que levanta RuntimeError. Os comentários antes de um stub são mantidos,
+    e os de dentro dele, descartados. Nenhum diagnóstico é reportado; os da
+    compilação normal continuam valendo.
+
+    Args:
+        fluxo: FluxoTokens do programa inteiro.
+        erros_lexicos: Se True, procura os caracteres inválidos para marcar os itens
+            que os contêm.
+        posicoes: Se informada, uma lista que recebe a posição no código Coins de
+            cada linha do código gerado, como CodeGenerator.linhas_fonte; as linhas
+            de um stub ficam com a posição do início do item.
+
+    Returns:
+        (código gerado, número de itens substituídos por stubs)
+    """
+    invalidas = _posicoes_invalidas(fluxo) if erros_lexicos else []
+    analisador = AnalisadorSemantico()
+    partes = []
+    stubs = 0
+
+    def acrescentar(gerador):
+        codigo = gerador.generate()
+        if codigo:
+            partes.append(codigo)
+            if posicoes is not None:
+                posicoes.extend(gerador.linhas_fonte())
+
+    for primeiro, ultimo in dividir_itens(fluxo.tipos):
+        inicio, fim = fluxo.inicios[primeiro], fluxo.fins[ultimo - 1]
+        parser = Parser(fluxo.iterar(primeiro, ultimo))
+        parser.parse()
+        nos = parser.ast.body
+        if parser.errors or any(inicio <= posicao < fim for posicao in invalidas):
+            # Uma subrotina reconhecida continua declarada para os itens seguintes,
+            # que chamam o stub
+            for node in nos:
+                if node.TAG == SUBROUTINE_DECLARATION and node.name is not None and node.parameters is not None:
+                    analisador.declare_subroutine(node.name, node.kind, node.parameters, node.return_type)
+            valido = False
+        else:
+            erros = len(analisador.errors)
+            for node in nos:
+                analisador.analyze_node(node)
+            valido = len(analisador.errors) == erros
+        if valido:
+            acrescentar(CodeGenerator(Programa(nos), fluxo=fluxo, intervalo=(primeiro, ultimo),
+                                      globais=analisador.scope_stack[0]))
+        else:
+            # Apenas os comentários antes do item, que têm antes_de == primeiro
+            acrescentar(CodeGenerator(Programa([]), fluxo=fluxo, intervalo=(primeiro, primeiro + 1)))
+            stub = _stub(fluxo, primeiro, ultimo)
+            partes.append(stub)
+            stubs += 1
+            if posicoes is not None:
+                posicao = fluxo.posicao(inicio)
+                posicoes.extend(posicao if linha else None for linha in stub.split("\n"))
+    # Comentários depois do último token
+    acrescentar(CodeGenerator(Programa([]), fluxo=fluxo, intervalo=(len(fluxo), len(fluxo) + 1)))
+    return "\n".join(partes), stubs
@@ -0,0 +1,311 @@
+import ast
+import gc
+import importlib.util
+import marshal
+
+from cache_compilacao import gravar_atomico
+from gerador_codigo import NomesVariaveis, nomes_externos
+from nos_ast import (PROGRAMA, DECLARACAO, ATRIBUICAO, CONDICIONAL, REPETICAO, SUBROUTINE_DECLARATION,
+                     CHAMADA_SUBROTINA, RETORNO, BINARY_EXPRESSION, UNARY_EXPRESSION, LITERAL,
+                     IDENTIFIER, COMENTARIO)
+
+# Nós do módulo ast do Python para cada operador da linguagem Coins. Operadores e
+# contextos não têm campos, então uma única instância é compartilhada pela árvore
+# inteira, como faz o próprio ast.parse
+OPERADORES_ARITMETICOS = {"+": ast.Add(), "-": ast.Sub(), "*": ast.Mult(), "/": ast.Div(), "%": ast.Mod()}
+OPERADORES_COMPARACAO = {"==": ast.Eq(), "!=": ast.NotEq(), ">": ast.Gt(), "<": ast.Lt(), ">=": ast.GtE(),
+                         "<=": ast.LtE()}
+OPERADORES_LOGICOS = {"&&": ast.And(), "||": ast.Or()}
+OPERADORES_UNARIOS = {"!": ast.Not(), "-": ast.USub()}
+CARREGAR = ast.Load()
+ARMAZENAR = ast.Store()
+
+def valor_literal(node):
+    """Valor Python de um Literal: o do texto que CodeGenerator.visit_Literal escreve"""
+    if node.value_type == "texto":
+        texto = "\"" + node.value.replace("\"", "") + "\""
+    else:
+        texto = str(node.value)
+    return ast.literal_eval(texto)
+
+def _com_posicao(classe):
+    """
+    Subclasse de um nó do ast com uma posição padrão (linha 1, coluna 0, sem fim)
+    como atributo de classe, que compile() exige em todo nó. GeradorBytecode
+    substitui linha e coluna, nó a nó, pelas do comando Coins de que o nó vem;
+    só os nós fora de qualquer comando ficam com a padrão.
+    """
+    return type(classe.__name__, (classe,), {"lineno": 1, "col_offset": 0, "end_lineno": None,
+                                             "end_col_offset": None})
+
+(Assign, If, While, FunctionDef, Expr, Return, Pass, Global, Nonlocal, Name, Constant, Call, BoolOp, Compare, BinOp,
+ UnaryOp, arg) = (
+    _com_posicao(classe) for classe in (
+        ast.Assign, ast.If, ast.While, ast.FunctionDef, ast.Expr, ast.Return, ast.Pass, ast.Global, ast.Nonlocal,
+        ast.Name, ast.Constant, ast.Call, ast.BoolOp, ast.Compare, ast.BinOp, ast.UnaryOp, ast.arg))
+
+# Valor inicial das variáveis declaradas, como em CodeGenerator.visit_Declaracao
+VALORES_INICIAIS = {"inteiro": 0, "real": 0.0, "texto": ""}
+
+# Flags do cabeçalho .pyc (PEP 552): baseado em hash, sem verificação pelo importador
+FLAGS_PYC_HASH = 0b01
+
+class ErroGeracaoBytecode(Exception):
+    """O compilador do CPython não conseguiu compilar o programa gerado"""
+
+def compilar(fonte, nome_arquivo="<coins>"):
+    """
+    compile() de fonte (ast.Module ou código Python) para exec. O compilador do
+    CPython é recursivo e tem limites próprios de aninhamento: expressões que a
+    análise Coins aceita (ex.: uma soma de 100 mil operandos) podem excedê-los, o
+    que vira ErroGeracaoBytecode com a mensagem do diagnóstico.
+    """
+    try:
+        return compile(fonte, nome_arquivo, "exec")
+    except (RecursionError, SyntaxError) as e:
+        raise ErroGeracaoBytecode(
+            f"Erro de geração de código: o compilador do CPython recusou o programa gerado ({e}). "
+            "Expressões aninhadas demais excedem os seus limites; divida a expressão em atribuições menores.") from None
+
+class GeradorBytecode:
+    """
+    Traduz a AST da linguagem Coins para um ast.Module do Python, que compile()
+    transforma diretamente em um objeto de código, sem passar por texto.
+
+    O programa gerado é o mesmo que CodeGenerator escreve como código fonte:
+    literais têm o valor que teriam no texto gerado e toda expressão binária fica
+    aninhada como se estivesse entre parênteses. Comentários não geram nada, e
+    blocos vazios recebem um pass. Cada nó tem a linha e a coluna (a partir de 0)
+    do comando Coins de que vem, de modo que tracebacks e depuradores mostram a
+    linha do código Coins.
+    """
+
+    def __init__(self, ast_coins):
+        self.ast = ast_coins
+        self._valores_literais = {}  # (tipo, texto do literal) -> valor Python
+        self.profundidade = 0  # Quadro atual: 0 no programa, +1 por subrotina aninhada
+        self.nomes = NomesVariaveis(ast_coins)
+        self.linha = 1  # Posição do comando atual, posta nos nós criados para ele
+        self.coluna = 0
+        # Métodos visit_* indexados pela TAG do nó; comandos retornam uma lista de nós
+        self._visitantes = {
+            DECLARACAO: self.visit_Declaracao,
+            ATRIBUICAO: self.visit_Atribuicao,
+            CONDICIONAL: self.visit_Condicional,
+            REPETICAO: self.visit_Repeticao,
+            SUBROUTINE_DECLARATION: self.visit_SubroutineDeclaration,
+            CHAMADA_SUBROTINA: self.visit_ChamadaSubrotina,
+            RETORNO: self.visit_Retorno,
+            COMENTARIO: self.visit_Comentario,
+        }
+
+    def gerar(self):
+        """Retorna o ast.Module do programa"""
+        if self.ast.TAG != PROGRAMA:
+            raise Exception("A raiz da AST deve ser um Programa.")
+        return ast.Module(body=self.visit_bloco(self.ast.body, vazio_permitido=True, novo_escopo=False),
+                          type_ignores=[])
+
+    def visit_bloco(self, comandos, vazio_permitido=False, novo_escopo=True):
+        if novo_escopo:
+            self.nomes.entrar_bloco()
+        corpo = []
+        for node in comandos:
+            visitor = self._visitantes.get(node.TAG)
+            if visitor is None:
+                raise Exception("Nenhum método visit_" + node.type + " implementado.")
+            if node.posicao is not None:
+                self.linha = node.posicao[0]
+                self.coluna = node.posicao[1] - 1
+            linha, coluna = self.linha, self.coluna
+            for comando in visitor(node):
+                comando.lineno = linha
+                comando.col_offset = coluna
+                corpo.append(comando)
+        if not corpo and not vazio_permitido:
+            corpo.append(self.posicionar(Pass()))
+        if novo_escopo:
+            self.nomes.sair()
+        return corpo
+
+    def posicionar(self, no):
+        """Põe em no a posição do comando atual e o retorna"""
+        no.lineno = self.linha
+        no.col_offset = self.coluna
+        return no
+
+    def visit_Declaracao(self, node):
+        posicionar = self.posicionar
+        return [Assign(targets=[posicionar(Name(id=self.nomes.declarar(declaration.name), ctx=ARMAZENAR))],
+                           value=posicionar(Constant(VALORES_INICIAIS[declaration.var_type])))
+                for declaration in node.declarations if declaration.var_type in VALORES_INICIAIS]
+
+    def visit_Atribuicao(self, node):
+        return [Assign(targets=[self.posicionar(Name(id=self.nomes.nome(node.variable), ctx=ARMAZENAR))],
+                           value=self.visit_expression(node.value))]
+
+    def visit_Condicional(self, node):
+        # A condição é montada antes dos blocos, que mudam a posição atual
+        test = self.visit_expression(node.condition)
+        body = self.visit_bloco(node.consequent)
+        orelse = self.visit_bloco(node.alternate) if node.alternate is not None else []
+        return [If(test=test, body=body, orelse=orelse)]
+
+    def visit_Repeticao(self, node):
+        return [While(test=self.visit_expression(node.condition), body=self.visit_bloco(node.body),
+                          orelse=[])]
+
+    def visit_SubroutineDeclaration(self, node):
+        linha, coluna = self.linha, self.coluna
+        argumentos = ast.arguments(posonlyargs=[], args=[self.posicionar(arg(arg=p.name)) for p in node.parameters],
+                                   kwonlyargs=[], kw_defaults=[], defaults=[])
+        self.profundidade += 1
+        globais, nao_locais = nomes_externos(node, self.profundidade)
+        globais = [self.nomes.nome(nome) for nome in globais]
+        nao_locais = [self.nomes.nome(nome) for nome in nao_locais]
+        self.nomes.entrar_subrotina(node)
+        corpo = self.visit_bloco(node.body, novo_escopo=False)
+        self.nomes.sair()
+        self.profundidade -= 1
+        self.linha, self.coluna = linha, coluna
+        if nao_locais:
+            corpo.insert(0, self.posicionar(Nonlocal(names=nao_locais)))
+        if globais:
+            corpo.insert(0, self.posicionar(Global(names=globais)))
+        funcao = FunctionDef(name=node.name, args=argumentos, body=corpo, decorator_list=[], returns=None)
+        if "type_params" in ast.FunctionDef._fields:  # Python 3.12+
+            funcao.type_params = []
+        return [funcao]
+
+    def visit_ChamadaSubrotina(self, node):
+        return [Expr(value=self.visit_call_expression(node))]
+
+    def visit_Retorno(self, node):
+        value = self.visit_expression(node.value) if node.value is not None else None
+        return [Return(value=value)]
+
+    def visit_Comentario(self, node):
+        return []
+
+    def visit_Literal(self, node):
+        chave = (node.value_type, node.value)
+        valor = self._valores_literais.get(chave, self)
+        if valor is self:
+            valor = self._valores_literais[chave] = valor_literal(node)
+        return self.posicionar(Constant(valor))
+
+    def visit_Identifier(self, node):
+        return self.posicionar(Name(id=self.nomes.nome(node.name), ctx=CARREGAR))
+
+    def visit_call_expression(self, node):
+        return self.posicionar(Call(func=self.posicionar(Name(id=node.name, ctx=CARREGAR)),
+                                    args=[self.visit_expression(arg) for arg in node.arguments], keywords=[]))
+
+    def visit_expression(self, node):
+        """
+        Monta a expressão em pós-ordem com uma pilha explícita, como o analisador
+        semântico, para que expressões longas não estourem o limite de recursão
+        """
+        tag = node.TAG
+        if tag == IDENTIFIER:  # Casos mais comuns, sem montar a pilha
+            return self.visit_Identifier(node)
+        if tag == LITERAL:
+            return self.visit_Literal(node)
+        nomes_python = self.nomes.python
+        linha, coluna = self.linha, self.coluna
+        resultados = []
+        empilhar_resultado = resultados.append
+        desempilhar_resultado = resultados.pop
+        pilha = [(node, False)]
+        empilhar = pilha.append
+        desempilhar = pilha.pop
+        while pilha:
+            atual, filhos_prontos = desempilhar()
+            tag = atual.TAG
+            if tag == IDENTIFIER:
+                resultado = Name(nomes_python.get(atual.name, atual.name), CARREGAR)
+                resultado.lineno = linha
+                resultado.col_offset = coluna
+                empilhar_resultado(resultado)
+            elif tag == LITERAL:
+                empilhar_resultado(self.visit_Literal(atual))
+            elif tag == BINARY_EXPRESSION:
+                if not filhos_prontos:
+                    empilhar((atual, True))
+                    empilhar((atual.right, False))
+                    empilhar((atual.left, False))
+                    continue
+                right = desempilhar_resultado()
+                left = desempilhar_resultado()
+                operator = atual.operator
+                if operator in OPERADORES_ARITMETICOS:
+                    resultado = BinOp(left, OPERADORES_ARITMETICOS[operator], right)
+                elif operator in OPERADORES_COMPARACAO:
+                    resultado = Compare(left, [OPERADORES_COMPARACAO[operator]], [right])
+                elif operator in OPERADORES_LOGICOS:
+                    resultado = BoolOp(OPERADORES_LOGICOS[operator], [left, right])
+                else:
+                    raise Exception("Operador desconhecido: " + operator)
+                resultado.lineno = linha
+                resultado.col_offset = coluna
+                empilhar_resultado(resultado)
+            elif tag == UNARY_EXPRESSION:
+                if not filhos_prontos:
+                    empilhar((atual, True))
+                    empilhar((atual.operand, False))
+                    continue
+                operator = OPERADORES_UNARIOS.get(atual.operator)
+                if operator is None:
+                    raise Exception("Operador desconhecido: " + atual.operator)
+                resultado = UnaryOp(operator, desempilhar_resultado())
+                resultado.lineno = linha
+                resultado.col_offset = coluna
+                empilhar_resultado(resultado)
+            elif tag == CHAMADA_SUBROTINA:
+                empilhar_resultado(self.visit_call_expression(atual))
+            else:
+                raise Exception("Tipo de expressão desconhecido: " + atual.type)
+        return resultados[0]
+
+def gerar_bytecode(ast_coins, nome_arquivo="<coins>"):
+    """
+    Compila a AST da linguagem Coins diretamente para um objeto de código Python,
+    pronto para exec(), sem gerar código fonte intermediário. Levanta
+    ErroGeracaoBytecode se o compilador do CPython não aceitar o programa.
+    """
+    # A árvore do ast cria muitos objetos de uma vez e nenhum ciclo; com o coletor de
+    # lixo ativo, as coletas disparadas durante a montagem, a compilação e a liberação
+    # da árvore custam mais que as três juntas
+    coletor_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        return compilar(GeradorBytecode(ast_coins).gerar(), nome_arquivo)
+    finally:
+        if coletor_ativo:
+            gc.enable()
+
+def _cabecalho_pyc(fonte):
+    return (importlib.util.MAGIC_NUMBER + FLAGS_PYC_HASH.to_bytes(4, "little")
+            + importlib.util.source_hash(fonte.encode("utf-8", "surrogatepass")))
+
+def salvar_pyc(codigo, caminho, fonte):
+    """
+    Grava o objeto de código em um arquivo .pyc (executável com python arquivo.pyc).
+    O cabeçalho guarda o hash do código fonte Coins, conferido por carregar_pyc.
+    """
+    return gravar_atomico(caminho, _cabecalho_pyc(fonte) + marshal.dumps(codigo))
+
+def carregar_pyc(caminho, fonte):
+    """Objeto de código de um .pyc gravado por salvar_pyc para fonte, ou None se ausente ou desatualizado"""
+    cabecalho = _cabecalho_pyc(fonte)
+    try:
+        with open(caminho, "rb") as f:
+            dados = f.read()
+    except OSError:
+        return None
+    if not dados.startswith(cabecalho):
+        return None
+    try:
+        return marshal.loads(dados[len(cabecalho):])
+    except (EOFError, ValueError, TypeError):
+        return None
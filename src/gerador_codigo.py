@@ -1,8 +1,259 @@
+import re
+
+from analisador_lexico import NOMES_TOKENS, T_ABRE_CHAVE, T_FECHA_CHAVE
+from nos_ast import (PROGRAMA, DECLARACAO, ATRIBUICAO, CONDICIONAL, REPETICAO, SUBROUTINE_DECLARATION,
+                     CHAMADA_SUBROTINA, RETORNO, BINARY_EXPRESSION, UNARY_EXPRESSION, LITERAL,
+                     IDENTIFIER, COMENTARIO, Comentario, No, DeclaracaoVariavel)
+from instrumentacao import CATEGORIA_SUBROTINA
+
+# Operadores lógicos da linguagem Coins e seus equivalentes em Python
+OPERADORES_PYTHON = {"&&": "and", "||": "or", "!": "not"}
+
+# Chaves nos bytes de FluxoTokens.tipos, para parear os blocos sem percorrer os tokens em Python
+_ABRE_CHAVE = bytes([T_ABRE_CHAVE])
+_re_chaves = re.compile(b"[" + re.escape(bytes([T_ABRE_CHAVE, T_FECHA_CHAVE])) + b"]")
+
+# Palavras do código Coins, que os nomes criados por NomesVariaveis evitam
+_re_palavras = re.compile(r"\w+")
+
+def nomes_externos(node, profundidade):
+    """
+    Variáveis de quadros externos que recebem valor no corpo da subrotina node,
+    cujo quadro tem a profundidade informada, pelos vínculos da análise semântica.
+    Em Python elas precisam de global (programa) ou nonlocal (outra subrotina) para
+    não virarem variáveis locais.
+
+    Returns:
+        (nomes globais, nomes nonlocal), na ordem da primeira atribuição.
+    """
+    globais = {}
+    nao_locais = {}
+    pilha = list(reversed(node.body))
+    while pilha:
+        atual = pilha.pop()
+        tag = atual.TAG
+        if tag == ATRIBUICAO:
+            if atual.vinculo is not None and atual.vinculo[0] < profundidade:
+                (globais if atual.vinculo[0] == 0 else nao_locais)[atual.variable] = True
+        elif tag == CONDICIONAL:
+            pilha.extend(reversed(atual.alternate or []))
+            pilha.extend(reversed(atual.consequent))
+        elif tag == REPETICAO:
+            pilha.extend(reversed(atual.body))
+    return list(globais), list(nao_locais)
+
+def nomes_de_fora(node, profundidade):
+    """
+    Nomes das variáveis de quadros externos (profundidade menor que a informada)
+    lidas ou atribuídas no corpo da subrotina node, inclusive pelas subrotinas
+    aninhadas nele, pelos vínculos da análise semântica.
+    """
+    nomes = set()
+    pilha = list(node.body)
+    while pilha:
+        atual = pilha.pop()
+        tag = atual.TAG
+        if tag == IDENTIFIER or tag == ATRIBUICAO:
+            if atual.vinculo is not None and atual.vinculo[0] < profundidade:
+                nomes.add(atual.name if tag == IDENTIFIER else atual.variable)
+            if tag == ATRIBUICAO:
+                pilha.append(atual.value)
+        elif tag == BINARY_EXPRESSION:
+            pilha.append(atual.left)
+            pilha.append(atual.right)
+        elif tag == UNARY_EXPRESSION:
+            pilha.append(atual.operand)
+        elif tag == CHAMADA_SUBROTINA:
+            pilha.extend(atual.arguments)
+        elif tag == RETORNO:
+            if atual.value is not None:
+                pilha.append(atual.value)
+        elif tag == CONDICIONAL:
+            pilha.append(atual.condition)
+            pilha.extend(atual.consequent)
+            pilha.extend(atual.alternate or [])
+        elif tag == REPETICAO:
+            pilha.append(atual.condition)
+            pilha.extend(atual.body)
+        elif tag == SUBROUTINE_DECLARATION:
+            pilha.extend(atual.body)
+    return nomes
+
+def _nomes_ast(raiz):
+    """Nomes de variáveis e subrotinas que aparecem na AST"""
+    nomes = set()
+    pilha = [raiz]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, list):
+            pilha.extend(atual)
+        elif isinstance(atual, DeclaracaoVariavel):
+            nomes.add(atual.name)
+        elif isinstance(atual, No):
+            for atributo in atual.ATRIBUTOS:
+                valor = getattr(atual, atributo)
+                if atributo in ("name", "variable"):
+                    nomes.add(valor)
+                elif isinstance(valor, (No, list, DeclaracaoVariavel)):
+                    pilha.append(valor)
+    return nomes
+
+class NomesVariaveis:
+    """
+    Nome Python de cada variável Coins visível durante a geração de código.
+
+    Blocos Coins não são escopos Python: uma variável de bloco com o nome de outra
+    ainda visível no mesmo quadro, ou de uma variável de quadro externo usada no
+    quadro (ver nomes_de_fora), seria a mesma variável Python que ela. Essas
+    variáveis recebem o nome nome_profundidade_nível, em que nível é o número de
+    blocos abertos no quadro (dois escopos visíveis ao mesmo tempo no mesmo quadro
+    têm níveis diferentes); as demais mantêm o nome Coins. O nome só depende do
+    quadro em que a variável é declarada.
+
+    globais, se informado, contém os nomes das variáveis do programa declaradas
+    antes de ast, quando ast é só um trecho do programa (geracao_parcial): o
+    trecho recebe os mesmos nomes que teria no programa inteiro.
+    """
+
+    def __init__(self, ast, codigo=None, globais=None):
+        self.ast = ast
+        self.codigo = codigo  # Código Coins, cujas palavras os nomes criados evitam; sem ele, os nomes da AST
+        self.globais = globais
+        self._evitados = None
+        self.python = {}  # nome Coins -> nome Python da variável visível, quando diferentes
+        self._quadros = {}  # nome Coins -> quadro da variável visível
+        self._escopos = [[]]  # Por escopo, a partir do programa: [(nome, nome Python e quadro anteriores)]
+        self._inicios = [0]  # Posição em _escopos do primeiro escopo de cada quadro (programa e subrotinas)
+        self._subrotinas = [None]  # Subrotina de cada quadro
+        self._de_fora = [None]  # nomes_de_fora de cada quadro, calculados quando necessários
+
+    def nome(self, nome):
+        """Nome Python da variável visível pelo nome Coins (self.python.get(nome, nome))"""
+        return self.python.get(nome, nome)
+
+    def entrar_bloco(self):
+        self._escopos.append([])
+
+    def entrar_subrotina(self, node):
+        """Abre o quadro da subrotina node, com os parâmetros, que mantêm o nome Coins"""
+        self._inicios.append(len(self._escopos))
+        self._escopos.append([])
+        self._subrotinas.append(node)
+        self._de_fora.append(None)
+        for param in node.parameters:
+            self._definir(param.name, param.name)
+
+    def sair(self):
+        """Sai do bloco ou da subrotina aberto por último"""
+        python = self.python
+        quadros = self._quadros
+        for nome, python_anterior, quadro_anterior in reversed(self._escopos.pop()):
+            if python_anterior is None:
+                python.pop(nome, None)
+            else:
+                python[nome] = python_anterior
+            if quadro_anterior is None:
+                del quadros[nome]
+            else:
+                quadros[nome] = quadro_anterior
+        if len(self._escopos) == self._inicios[-1]:
+            self._inicios.pop()
+            self._subrotinas.pop()
+            self._de_fora.pop()
+
+    def declarar(self, nome):
+        """Declara a variável no escopo atual e retorna o seu nome Python"""
+        quadro = len(self._inicios) - 1
+        externo = self._quadros.get(nome)
+        if externo is None and self.globais is not None and len(self._escopos) > 1 and nome in self.globais:
+            externo = 0
+        if externo is None:
+            renomear = False
+        elif externo == quadro:
+            renomear = True
+        else:
+            de_fora = self._de_fora[quadro]
+            if de_fora is None:
+                de_fora = self._de_fora[quadro] = nomes_de_fora(self._subrotinas[quadro], quadro)
+            renomear = nome in de_fora
+        if renomear:
+            nome_python = f"{nome}_{quadro}_{len(self._escopos) - 1 - self._inicios[quadro]}"
+            evitados = self.evitados()
+            while nome_python in evitados:
+                nome_python += "_"
+        else:
+            nome_python = nome
+        self._definir(nome, nome_python)
+        return nome_python
+
+    def evitados(self):
+        if self._evitados is None:
+            self._evitados = set(_re_palavras.findall(self.codigo)) if self.codigo is not None else _nomes_ast(self.ast)
+        return self._evitados
+
+    def _definir(self, nome, nome_python):
+        self._escopos[-1].append((nome, self.python.get(nome), self._quadros.get(nome)))
+        if nome_python != nome:
+            self.python[nome] = nome_python
+        else:
+            self.python.pop(nome, None)
+        self._quadros[nome] = len(self._inicios) - 1
+
 class CodeGenerator:
-    def __init__(self, ast):
+    """
+    Gera o código Python de uma AST.
+
+    A AST não tem comentários: eles ficam na TabelaComentarios do FluxoTokens. Se
+    fluxo for informado, os comentários com antes_de no intervalo de tokens
+    (primeiro, ultimo), ultimo exclusive, viram comentários Python antes do
+    comando que os segue no código Coins, ou no fim do bloco em que aparecem. Sem
+    intervalo, todos os comentários do fluxo são gerados.
+
+    Os nomes das variáveis vêm de NomesVariaveis; globais é repassado a ela quando
+    ast é só um trecho do programa.
+    """
+
+    def __init__(self, ast, instrumentacao=None, fluxo=None, intervalo=None, globais=None):
         self.ast = ast
+        self.instrumentacao = instrumentacao  # Recebe um intervalo por subrotina gerada (opcional)
+        self.fluxo = fluxo
+        self.comentarios = fluxo.comentarios if fluxo is not None and fluxo.comentarios else None
+        if self.comentarios is not None:
+            primeiro, ultimo = intervalo if intervalo is not None else (0, len(fluxo) + 1)
+            self._intervalo = (primeiro, min(ultimo, len(fluxo)))
+            self._proximo_comentario = self.comentarios.primeiro_antes_de(primeiro)
+            self._fim_comentarios = self.comentarios.primeiro_antes_de(ultimo)
+            self._tipos = None  # bytes de fluxo.tipos, criados no primeiro bloco
+            self._pares = None  # índice de cada '{' -> índice da '}' correspondente
+            self._atualizar_pendente()
         self.code = []
         self.indent_level = 0
+        self.profundidade = 0  # Quadro atual: 0 no programa, +1 por subrotina aninhada
+        self.nomes = NomesVariaveis(ast, fluxo.codigo if fluxo is not None else None, globais)
+        self.posicao = None  # Posição no código Coins do comando sendo gerado
+        # (índice em code, posição): as linhas a partir do índice vêm do comando na posição
+        self.marcas = []
+        # Métodos visit_* indexados pela TAG do nó
+        self._visitantes = {
+            PROGRAMA: self.visit_Programa,
+            DECLARACAO: self.visit_Declaracao,
+            ATRIBUICAO: self.visit_Atribuicao,
+            CONDICIONAL: self.visit_Condicional,
+            REPETICAO: self.visit_Repeticao,
+            SUBROUTINE_DECLARATION: self.visit_SubroutineDeclaration,
+            CHAMADA_SUBROTINA: self.visit_ChamadaSubrotina,
+            RETORNO: self.visit_Retorno,
+            BINARY_EXPRESSION: self.visit_BinaryExpression,
+            UNARY_EXPRESSION: self.visit_UnaryExpression,
+            LITERAL: self.visit_Literal,
+            IDENTIFIER: self.visit_Identifier,
+            COMENTARIO: self.visit_Comentario,
+        }
+        self._visitantes_expressoes = {
+            LITERAL: self.visit_Literal,
+            IDENTIFIER: self.visit_Identifier,
+            CHAMADA_SUBROTINA: self.visit_call_expression,
+        }
 
     def generate(self):
         self.visit(self.ast)
@@ -12,21 +263,105 @@ class CodeGenerator:
         return "    " * self.indent_level
 
     def visit(self, node):
-        method_name = "visit_" + node["type"]
-        visitor = getattr(self, method_name, self.generic_visit)
+        visitor = self._visitantes.get(node.TAG, self.generic_visit)
+        posicao = node.posicao
+        if posicao is None:
+            visitor(node)
+            return
+        # Linhas geradas depois dos comandos internos (else, pass) voltam ao comando externo
+        externa = self.posicao
+        self.posicao = posicao
+        self.marcas.append((len(self.code), posicao))
         visitor(node)
+        self.posicao = externa
+        self.marcas.append((len(self.code), externa))
+
+    def linhas_fonte(self):
+        """
+        Posição (linha, coluna) no código Coins de cada linha do código retornado por
+        generate(), ou None nas linhas que não vêm de um comando, como as linhas em
+        branco antes de cada def
+        """
+        posicoes = []
+        marcas = self.marcas
+        proxima = 0
+        posicao = None
+        for indice, linha in enumerate(self.code):
+            while proxima < len(marcas) and marcas[proxima][0] <= indice:
+                posicao = marcas[proxima][1]
+                proxima += 1
+            if "\n" in linha:
+                posicoes.extend(posicao if parte.strip() else None for parte in linha.split("\n"))
+            else:
+                posicoes.append(posicao)
+        return posicoes
 
     def generic_visit(self, node):
-        raise Exception("Nenhum método visit_" + node["type"] + " implementado.")
+        raise Exception("Nenhum método visit_" + node.type + " implementado.")
+
+    def _atualizar_pendente(self):
+        # Posição do próximo comentário a gerar (None se não há mais), comparada com
+        # a posição de cada comando sem consultar os tokens
+        indice = self._proximo_comentario
+        self._pendente = (self.fluxo.posicao(self.comentarios.inicios[indice])
+                          if indice < self._fim_comentarios else None)
+
+    def gerar_comentarios(self, token):
+        """Gera os comentários ainda não gerados que vêm antes do token de índice token"""
+        comentarios = self.comentarios
+        antes_de = comentarios.antes_de
+        indice = self._proximo_comentario
+        while indice < self._fim_comentarios and antes_de[indice] <= token:
+            posicao = self.fluxo.posicao(comentarios.inicios[indice])
+            self.visit(Comentario(comentarios.valor(indice), NOMES_TOKENS[comentarios.tipos[indice]], posicao))
+            indice += 1
+        if indice != self._proximo_comentario:
+            self._proximo_comentario = indice
+            self._atualizar_pendente()
+
+    def comentarios_antes(self, node):
+        pendente = self._pendente
+        if pendente is not None and node.posicao is not None and pendente < node.posicao:
+            self.gerar_comentarios(self.fluxo.indice_token(*node.posicao))
+
+    def fechamentos(self, node, blocos):
+        """
+        Índices dos tokens '}' que fecham os blocos de node (o consequente e o
+        alternativo, ou o corpo), ou None para cada bloco se não houver comentários
+        """
+        if self.comentarios is None or self._pendente is None or node.posicao is None:
+            return [None] * blocos
+        primeiro, fim = self._intervalo
+        if self._pares is None:
+            self._tipos = self.fluxo.tipos.tobytes()
+            pares = {}
+            abertas = []
+            for chave in _re_chaves.finditer(self._tipos, primeiro, fim):
+                if chave.group() == _ABRE_CHAVE:
+                    abertas.append(chave.start())
+                elif abertas:
+                    pares[abertas.pop()] = chave.start()
+            self._pares = pares
+        indice = self.fluxo.indice_token(*node.posicao)
+        resultado = []
+        for _ in range(blocos):
+            indice = self._pares.get(self._tipos.find(_ABRE_CHAVE, indice, fim), fim)
+            resultado.append(indice)
+        return resultado
 
     def visit_Programa(self, node):
-        for child_node in node["body"]:
+        comentarios = self.comentarios is not None
+        for child_node in node.body:
+            if comentarios:
+                self.comentarios_antes(child_node)
             self.visit(child_node)
+        if comentarios:
+            self.gerar_comentarios(len(self.fluxo))
 
     def visit_Declaracao(self, node):
-        for declaration in node["declarations"]:
-            var_name = declaration["name"]
-            var_type = declaration["type"]
+        for declaration in node.declarations:
+            var_name = self.nomes.declarar(declaration.name)
+            var_type = declaration.var_type
             if var_type == "inteiro":
                 self.code.append(f"{self.indent()}{var_name} = 0")
             elif var_type == "real":
@@ -35,116 +370,147 @@ class CodeGenerator:
                 self.code.append(f"{self.indent()}{var_name} = \"\"")
 
     def visit_Atribuicao(self, node):
-        var_name = node["variable"]
-        value = self.visit_expression(node["value"])
+        var_name = self.nomes.nome(node.variable)
+        value = self.visit_expression(node.value)
         self.code.append(f"{self.indent()}{var_name} = {value}")
 
     def visit_BinaryExpression(self, node):
-        left = self.visit_expression(node["left"])
-        right = self.visit_expression(node["right"])
-        operator = node["operator"]
-        # Mapear operadores lógicos da linguagem Coins para Python
-        if operator == "&&":
-            operator = "and"
-        elif operator == "||":
-            operator = "or"
-        return f"({left} {operator} {right})"
+        return self.visit_expression(node)
 
     def visit_UnaryExpression(self, node):
-        operand = self.visit_expression(node["operand"])
-        operator = node["operator"]
-        # Mapear operadores lógicos da linguagem Coins para Python
-        if operator == "!":
-            operator = "not"
-        return f"({operator} {operand})"
+        return self.visit_expression(node)
 
     def visit_Literal(self, node):
-        if node["_type"] == "texto":
-            return f"\"" + node["value"].replace("\"", "") + f"\"" # Remove aspas extras se já houver
-        return str(node["value"])
+        if node.value_type == "texto":
+            return f"\"" + node.value.replace("\"", "") + f"\"" # Remove aspas extras se já houver
+        return str(node.value)
 
     def visit_Identifier(self, node):
-        return node["name"]
+        return self.nomes.nome(node.name)
 
-    def visit_Condicional(self, node):
-        condition = self.visit_expression(node["condition"])
-        self.code.append(f"{self.indent()}if {condition}:")
+    def visit_bloco(self, nodes, fechamento=None, novo_escopo=True):
+        """
+        Gera um bloco indentado; um bloco sem comandos (vazio ou só com comentários)
+        recebe um pass. fechamento é o índice do token '}' do bloco, até onde vão os
+        comentários gerados dentro dele. Sem novo_escopo, as declarações do bloco
+        ficam no escopo já aberto (corpo de subrotina).
+        """
+        if novo_escopo:
+            self.nomes.entrar_bloco()
         self.indent_level += 1
-        for consequent_node in node["consequent"]:
-            self.visit(consequent_node)
+        inicio = len(self.code)
+        comentarios = self.comentarios is not None
+        for child_node in nodes:
+            if comentarios:
+                self.comentarios_antes(child_node)
+            self.visit(child_node)
+        if fechamento is not None:
+            self.gerar_comentarios(fechamento)
+        if all(not linha.strip() or linha.lstrip().startswith("#") for linha in self.code[inicio:]):
+            self.code.append(f"{self.indent()}pass")
         self.indent_level -= 1
-        if "alternate" in node:
+        if novo_escopo:
+            self.nomes.sair()
+
+    def visit_Condicional(self, node):
+        condition = self.visit_expression(node.condition)
+        fechamentos = self.fechamentos(node, 1 if node.alternate is None else 2)
+        self.code.append(f"{self.indent()}if {condition}:")
+        self.visit_bloco(node.consequent, fechamentos[0])
+        if node.alternate is not None:
             self.code.append(f"{self.indent()}else:")
-            self.indent_level += 1
-            for alternate_node in node["alternate"]:
-                self.visit(alternate_node)
-            self.indent_level -= 1
+            self.visit_bloco(node.alternate, fechamentos[1])
 
     def visit_Repeticao(self, node):
-        condition = self.visit_expression(node["condition"])
+        condition = self.visit_expression(node.condition)
         self.code.append(f"{self.indent()}while {condition}:")
-        self.indent_level += 1
-        for body_node in node["body"]:
-            self.visit(body_node)
-        self.indent_level -= 1
+        self.visit_bloco(node.body, self.fechamentos(node, 1)[0])
 
     def visit_SubroutineDeclaration(self, node):
-        sub_kind = node["kind"]
-        name = node["name"]
-        params = ", ".join([f"{p['name']}" for p in node["parameters"]])
+        if self.instrumentacao is None:
+            self.gerar_subrotina(node)
+            return
+        intervalo = self.instrumentacao.abrir(node.name, CATEGORIA_SUBROTINA, {"fase": "geracao"})
+        self.gerar_subrotina(node)
+        self.instrumentacao.encerrar(intervalo)
+
+    def gerar_subrotina(self, node):
+        sub_kind = node.kind
+        name = node.name
+        params = ", ".join([f"{p.name}" for p in node.parameters])
         
-        if sub_kind == "PROCEDIMENTO":
-            self.code.append(f"\ndef {name}({params}):")
-        elif sub_kind == "FUNCAO":
-            self.code.append(f"\ndef {name}({params}):")
+        if sub_kind == "procedimento":
+            self.code.append(f"\n{self.indent()}def {name}({params}):")
+        elif sub_kind == "funcao":
+            self.code.append(f"\n{self.indent()}def {name}({params}):")
         
-        self.indent_level += 1
-        for body_node in node["body"]:
-            self.visit(body_node)
-        self.indent_level -= 1
-        # Adicionar um \'pass\' se o corpo estiver vazio para evitar erro de sintaxe em Python
-        if not node["body"]:
-            self.code.append(f"{self.indent()}pass")
+        self.profundidade += 1
+        globais, nao_locais = nomes_externos(node, self.profundidade)
+        if globais:
+            self.code.append(f"{self.indent()}    global {', '.join(map(self.nomes.nome, globais))}")
+        if nao_locais:
+            self.code.append(f"{self.indent()}    nonlocal {', '.join(map(self.nomes.nome, nao_locais))}")
+        self.nomes.entrar_subrotina(node)
+        self.visit_bloco(node.body, self.fechamentos(node, 1)[0], novo_escopo=False)
+        self.nomes.sair()
+        self.profundidade -= 1
 
     def visit_ChamadaSubrotina(self, node):
-        func_name = node["name"]
-        args = ", ".join([self.visit_expression(arg) for arg in node["arguments"]])
+        func_name = node.name
+        args = ", ".join([self.visit_expression(arg) for arg in node.arguments])
         self.code.append(f"{self.indent()}{func_name}({args})")
 
     def visit_Retorno(self, node):
-        if "value" in node:
-            value = self.visit_expression(node["value"])
+        if node.value is not None:
+            value = self.visit_expression(node.value)
             self.code.append(f"{self.indent()}return {value}")
         else:
             self.code.append(f"{self.indent()}return")
 
     def visit_Comentario(self, node):
         # Adiciona o comentário como um comentário Python
-        comment_text = node["value"]
-        if node["kind"] == "COMENTARIO_LINHA":
-            self.code.append(f"{self.indent()}# {comment_text.strip().lstrip('//').strip()}")
-        elif node["kind"] == "COMENTARIO_BLOCO":
+        comment_text = node.value
+        # splitlines também separa um \r solto, que o Python trataria como fim de linha
+        if node.kind == "COMENTARIO_LINHA":
+            lines = comment_text.strip().lstrip('/').strip().splitlines() or [""]
+        elif node.kind == "COMENTARIO_BLOCO":
             # Para comentários de bloco, pode-se usar strings de múltiplas linhas em Python
             # Ou converter para múltiplas linhas de comentários de linha
-            lines = comment_text.strip().lstrip('/*').rstrip('*/').strip().split('\n')
-            for line in lines:
-                self.code.append(f"{self.indent()}# {line.strip()}")
-
-    def visit_expression(self, node):
-        if node["type"] == "BinaryExpression":
-            return self.visit_BinaryExpression(node)
-        elif node["type"] == "UnaryExpression":
-            return self.visit_UnaryExpression(node)
-        elif node["type"] == "Literal":
-            return self.visit_Literal(node)
-        elif node["type"] == "Identifier":
-            return self.visit_Identifier(node)
-        elif node["type"] == "ChamadaSubrotina":
-            # Chamadas de subrotina como parte de uma expressão (ex: em atribuição)
-            func_name = node["name"]
-            args = ", ".join([self.visit_expression(arg) for arg in node["arguments"]])
-            return f"{func_name}({args})"
+            lines = comment_text.strip().lstrip('/*').rstrip('*/').strip().splitlines() or [""]
         else:
-            raise Exception("Tipo de expressão desconhecido: " + node["type"])
+            lines = []
+        for line in lines:
+            self.code.append(f"{self.indent()}# {line.strip()}")
 
+    def visit_call_expression(self, node):
+        # Chamadas de subrotina como parte de uma expressão (ex: em atribuição)
+        func_name = node.name
+        args = ", ".join([self.visit_expression(arg) for arg in node.arguments])
+        return f"{func_name}({args})"
 
+    def visit_expression(self, node):
+        # Percorre a expressão em ordem com uma pilha explícita, juntando os pedaços
+        # no final, para que expressões longas não estourem o limite de recursão
+        nomes_python = self.nomes.python
+        partes = []
+        pilha = [node]
+        while pilha:
+            atual = pilha.pop()
+            if isinstance(atual, str):
+                partes.append(atual)
+                continue
+            tag = atual.TAG
+            if tag == IDENTIFIER:
+                partes.append(nomes_python.get(atual.name, atual.name))
+            elif tag == BINARY_EXPRESSION:
+                operator = OPERADORES_PYTHON.get(atual.operator, atual.operator)
+                pilha.extend((")", atual.right, f" {operator} ", atual.left, "("))
+            elif tag == UNARY_EXPRESSION:
+                operator = OPERADORES_PYTHON.get(atual.operator, atual.operator)
+                pilha.extend((")", atual.operand, f"({operator} "))
+            else:
+                visitor = self._visitantes_expressoes.get(tag)
+                if visitor is None:
+                    raise Exception("Tipo de expressão desconhecido: " + atual.type)
+                partes.append(visitor(atual))
+        return "".join(partes)
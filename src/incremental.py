@@ -0,0 +1,377 @@
+import hashlib
+import marshal
+import sys
+
+from analisador_lexico import T_ABRE_CHAVE, T_FECHA_CHAVE, T_PONTO_VIRGULA, T_SENAO
+from analisador_sintatico import Parser
+from analisador_semantico import AnalisadorSemantico
+from cache_compilacao import gravar_atomico
+from diagnosticos import ERRO, AVISO
+from nos_ast import (Programa, DeclaracaoVariavel, no_from_tuple, DECLARACAO, ATRIBUICAO, CONDICIONAL, REPETICAO,
+                     SUBROUTINE_DECLARATION, CHAMADA_SUBROTINA, RETORNO, BINARY_EXPRESSION, UNARY_EXPRESSION,
+                     IDENTIFIER)
+
+# Deve mudar sempre que o formato do cache ou o resultado das fases sintática e
+# semântica mudar, para que caches antigos sejam descartados
+VERSAO_CACHE_INCREMENTAL = 6
+
+# Gravações semânticas guardadas por item: o mesmo texto pode aparecer em pontos
+# do arquivo com escopos globais diferentes (ex.: uma declaração repetida)
+MAX_VARIANTES = 4
+
+def dividir_itens(tipos):
+    """
+    Divide a sequência de tipos de token nos itens de nível superior do programa.
+
+    Um item termina em ';' ou no '}' que volta à profundidade 0 (exceto quando
+    seguido de 'senao'). Os comentários não estão em tipos (ver TabelaComentarios).
+
+    Returns:
+        Lista de (primeiro, ultimo) com índices de token, ultimo exclusive.
+    """
+    itens = []
+    inicio = 0
+    profundidade = 0
+    total = len(tipos)
+    for indice, tipo in enumerate(tipos):
+        if tipo == T_PONTO_VIRGULA:
+            if profundidade == 0:
+                itens.append((inicio, indice + 1))
+                inicio = indice + 1
+        elif tipo == T_ABRE_CHAVE:
+            profundidade += 1
+        elif tipo == T_FECHA_CHAVE:
+            profundidade -= 1
+            if profundidade <= 0:
+                profundidade = 0
+                if indice + 1 >= total or tipos[indice + 1] != T_SENAO:
+                    itens.append((inicio, indice + 1))
+                    inicio = indice + 1
+    if inicio < total:
+        itens.append((inicio, total))
+    return itens
+
+def chave_item(fluxo, primeiro, ultimo):
+    """Hash do texto do item e dos tipos dos seus tokens"""
+    texto = fluxo.codigo[fluxo.inicios[primeiro]:fluxo.fins[ultimo - 1]]
+    h = hashlib.blake2b(texto.encode("utf-8"), digest_size=16)
+    h.update(fluxo.tipos[primeiro:ultimo].tobytes())
+    return h.digest()
+
+def _deslocar_posicoes(nos, origem, destino):
+    """
+    Move as posições dos comandos de um item analisado com o primeiro token em
+    origem (linha, coluna) para um item de mesmo texto que começa em destino. A
+    coluna só muda na primeira linha do item.
+    """
+    linha_origem = origem[0]
+    linhas = destino[0] - linha_origem
+    colunas = destino[1] - origem[1]
+    pilha = list(nos)
+    while pilha:
+        node = pilha.pop()
+        linha, coluna = node.posicao
+        node.posicao = (linha + linhas, coluna + colunas if linha == linha_origem else coluna)
+        tag = node.TAG
+        if tag == CONDICIONAL:
+            pilha.extend(node.consequent)
+            if node.alternate is not None:
+                pilha.extend(node.alternate)
+        elif tag in (REPETICAO, SUBROUTINE_DECLARATION):
+            pilha.extend(node.body)
+
+def _resumo_simbolo(info):
+    """Forma comparável e serializável de uma entrada do escopo global (None se ausente)"""
+    if info is None:
+        return None
+    if info["kind"] == "variable":
+        return ("variable", info["type"])
+    params = tuple((p.name, p.var_type) for p in info["params"])
+    return (info["kind"], info["type"], params, info["return_type"])
+
+def _simbolo_de_resumo(resumo):
+    if resumo[0] == "variable":
+        return {"type": resumo[1], "kind": "variable"}
+    kind, tipo, params, return_type = resumo
+    return {"type": tipo, "kind": kind, "params": [DeclaracaoVariavel(*p) for p in params],
+            "return_type": return_type}
+
+class _TabelaGravada:
+    """Repassa as operações do analisador semântico à tabela de símbolos e as grava"""
+    __slots__ = ("tabela", "operacoes")
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        self.operacoes = None
+
+    def __contains__(self, nome):
+        return nome in self.tabela
+
+    def definir(self, nome, tipo, valor=""):
+        if self.operacoes is not None:
+            self.operacoes.append(("definir", nome, tipo, valor))
+        self.tabela.definir(nome, tipo, valor)
+
+    def atualizar_valor(self, nome, valor):
+        if self.operacoes is not None:
+            self.operacoes.append(("atualizar_valor", nome, valor))
+        self.tabela.atualizar_valor(nome, valor)
+
+class AnalisadorIncremental(AnalisadorSemantico):
+    """
+    Analisador semântico que trabalha item a item e grava o efeito de cada um.
+
+    A gravação de um item guarda as entradas do escopo global que a análise leu
+    (suas dependências), as que ela criou, os diagnósticos e as operações na tabela
+    de símbolos. Ela pode ser reaplicada no lugar da análise sempre que as
+    dependências tiverem o mesmo valor no escopo global atual.
+
+    Os vínculos (profundidade, slot) dependem das declarações anteriores no arquivo
+    e não são gravados: ao reaproveitar uma gravação, o item é percorrido de novo
+    apenas para declarar as suas variáveis e anotar os vínculos.
+    """
+
+    # As leituras de variáveis globais passam por get_symbol_info, que as grava
+    LEITURA_DIRETA = False
+
+    def __init__(self, tabela_simbolos, diagnosticos=None):
+        super().__init__(tabela_simbolos=_TabelaGravada(tabela_simbolos), diagnosticos=diagnosticos)
+        self._gravacao = None
+        self._escritos = set()
+
+    def analisar_item(self, nos):
+        """Analisa os nós de um item de nível superior e retorna a gravação"""
+        gravacao = {"leituras": {}, "escritas": [], "diagnosticos": [], "tabela": []}
+        self._gravacao = gravacao
+        self._escritos = set()
+        self.tabela_simbolos.operacoes = gravacao["tabela"]
+        for node in nos:
+            self.analyze_node(node)
+        self.tabela_simbolos.operacoes = None
+        self._gravacao = None
+        return gravacao
+
+    def reaproveitar(self, nos, gravacoes):
+        """
+        Reaplica ao item com os nós nos a primeira gravação cujas dependências não
+        mudaram. Retorna False se nenhuma serve.
+        """
+        escopo_global = self.scope_stack[0]
+        for gravacao in gravacoes:
+            if any(_resumo_simbolo(escopo_global.get(nome)) != resumo
+                   for nome, resumo in gravacao["leituras"].items()):
+                continue
+            for severidade, mensagem in gravacao["diagnosticos"]:
+                if severidade == ERRO:
+                    self.error(mensagem)
+                else:
+                    self.warning(mensagem)
+            for nome, resumo in gravacao["escritas"]:
+                self._definir(nome, _simbolo_de_resumo(resumo))
+            tabela = self.tabela_simbolos.tabela
+            for operacao in gravacao["tabela"]:
+                getattr(tabela, operacao[0])(*operacao[1:])
+            self._vincular(nos)
+            return True
+        return False
+
+    def _vincular(self, nos):
+        """
+        Anota os vínculos dos nós repetindo apenas os escopos e as declarações da
+        análise; as declarações do escopo global já vêm das escritas da gravação
+        """
+        for node in nos:
+            tag = node.TAG
+            if tag == DECLARACAO:
+                if len(self.scope_stack) > 1:
+                    for decl in node.declarations:
+                        self._declarar_de_novo(decl.name, {"type": decl.var_type, "kind": "variable"})
+            elif tag == ATRIBUICAO:
+                node.vinculo = self.vinculo(node.variable)
+                self._vincular_expressao(node.value)
+            elif tag == CONDICIONAL:
+                self._vincular_expressao(node.condition)
+                self._vincular_bloco(node.consequent)
+                if node.alternate is not None:
+                    self._vincular_bloco(node.alternate)
+            elif tag == REPETICAO:
+                self._vincular_expressao(node.condition)
+                self._vincular_bloco(node.body)
+            elif tag == SUBROUTINE_DECLARATION:
+                if len(self.scope_stack) > 1:
+                    self._declarar_de_novo(node.name, {"type": node.kind, "kind": node.kind, "params": node.parameters,
+                                                       "return_type": node.return_type})
+                funcao_externa = self.current_function
+                self.current_function = node.name
+                self.enter_scope(novo_quadro=True)
+                for param in node.parameters:
+                    self._declarar_de_novo(param.name, {"type": param.var_type, "kind": "variable"})
+                self._vincular(node.body)
+                self.exit_scope()
+                self.current_function = funcao_externa
+            elif tag == RETORNO:
+                # analyze_return não analisa o valor de um 'retorna' fora de função
+                if node.value is not None and self.current_function is not None:
+                    self._vincular_expressao(node.value)
+            elif tag in (CHAMADA_SUBROTINA, BINARY_EXPRESSION, UNARY_EXPRESSION, IDENTIFIER):
+                self._vincular_expressao(node)
+
+    def _vincular_bloco(self, nos):
+        self.enter_scope()
+        self._vincular(nos)
+        self.exit_scope()
+
+    def _declarar_de_novo(self, name, info):
+        # Como declare_*, que não redeclara um nome do mesmo escopo (a análise reportou o erro)
+        if name not in self.scope_stack[-1]:
+            self._definir(name, info)
+
+    def _vincular_expressao(self, node):
+        pilha = [node]
+        while pilha:
+            atual = pilha.pop()
+            tag = atual.TAG
+            if tag == IDENTIFIER:
+                atual.vinculo = self.vinculo(atual.name)
+            elif tag == BINARY_EXPRESSION:
+                pilha.append(atual.right)
+                pilha.append(atual.left)
+            elif tag == UNARY_EXPRESSION:
+                pilha.append(atual.operand)
+            elif tag == CHAMADA_SUBROTINA:
+                # Como analyze_subroutine_call, que só analisa os argumentos que
+                # correspondem a parâmetros de uma subrotina declarada
+                entrada = self._indice.get(atual.name)
+                if entrada is not None and entrada.info["kind"] in ("procedimento", "funcao"):
+                    pilha.extend(reversed(atual.arguments[:len(entrada.info["params"])]))
+
+    def error(self, message):
+        if self._gravacao is not None:
+            self._gravacao["diagnosticos"].append((ERRO, message))
+        super().error(message)
+
+    def warning(self, message):
+        if self._gravacao is not None:
+            self._gravacao["diagnosticos"].append((AVISO, message))
+        super().warning(message)
+
+    def _ler_global(self, name):
+        if self._gravacao is not None and name not in self._escritos:
+            leituras = self._gravacao["leituras"]
+            if name not in leituras:
+                leituras[name] = _resumo_simbolo(self.scope_stack[0].get(name))
+
+    def _declarar(self, declarar, name, *args):
+        if self._gravacao is None or len(self.scope_stack) > 1:
+            return declarar(name, *args)
+        escopo_global = self.scope_stack[0]
+        self._ler_global(name)
+        anterior = escopo_global.get(name)
+        resultado = declarar(name, *args)
+        atual = escopo_global.get(name)
+        if atual is not anterior:
+            self._escritos.add(name)
+            self._gravacao["escritas"].append((name, _resumo_simbolo(atual)))
+        return resultado
+
+    def declare_variable(self, name, var_type):
+        return self._declarar(super().declare_variable, name, var_type)
+
+    def declare_subroutine(self, name, sub_type, params, return_type=None):
+        return self._declarar(super().declare_subroutine, name, sub_type, params, return_type)
+
+    def get_symbol_info(self, name):
+        if self._gravacao is not None:
+            entrada = self._indice.get(name)
+            if entrada is None or entrada.escopo == 0:
+                self._ler_global(name)
+        return super().get_symbol_info(name)
+
+def _cabecalho():
+    return (VERSAO_CACHE_INCREMENTAL, sys.implementation.cache_tag)
+
+def carregar_cache(caminho):
+    """Itens do cache incremental em caminho, ou {} se ele não existir ou for de outra versão"""
+    try:
+        with open(caminho, "rb") as f:
+            # marshal.load lendo direto do arquivo é várias vezes mais lento que loads
+            dados = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(dados, dict) or dados.get("versao") != _cabecalho():
+        return {}
+    return dados["itens"]
+
+def salvar_cache(caminho, itens):
+    """Grava o cache de forma atômica; falhas apenas deixam de atualizá-lo"""
+    try:
+        dados = marshal.dumps({"versao": _cabecalho(), "itens": itens})
+    except ValueError:
+        return
+    gravar_atomico(caminho, dados)
+
+def analisar_incremental(result, caminho_cache):
+    """
+    Fases sintática e semântica de compile_source, reaproveitando o cache incremental.
+
+    Cada item de nível superior (declaração, subrotina ou comando) é
+    identificado pelo hash do seu texto. Itens já vistos reaproveitam a AST do cache
+    em vez de serem analisados sintaticamente (com as posições dos comandos movidas
+    para onde o item está agora), e a gravação semântica quando as
+    entradas do escopo global de que ela depende não mudaram. O cache é regravado
+    apenas com os itens do código atual.
+
+    Espera result.tokens, result.symbol_table e result.diagnostics preenchidos pela
+    fase léxica e preenche result.ast e result.incremental_stats.
+
+    Returns:
+        False, sem efeitos em result, se algum item tiver erro de sintaxe; nesse caso
+        o código deve ser analisado inteiro da forma normal, para que a recuperação
+        de erros e as mensagens sejam as mesmas.
+    """
+    fluxo = result.tokens
+    anteriores = carregar_cache(caminho_cache)
+    itens = {}
+    analisados = []
+    asts_reaproveitadas = 0
+    for primeiro, ultimo in dividir_itens(fluxo.tipos):
+        chave = chave_item(fluxo, primeiro, ultimo)
+        posicao = fluxo.posicao(fluxo.inicios[primeiro])
+        entrada = itens.get(chave) or anteriores.get(chave)
+        if entrada is not None:
+            nos = [no_from_tuple(tupla) for tupla in entrada["ast"]]
+            if entrada["posicao"] != posicao:
+                _deslocar_posicoes(nos, entrada["posicao"], posicao)
+            asts_reaproveitadas += 1
+        else:
+            parser = Parser(fluxo.iterar(primeiro, ultimo))
+            parser.parse()
+            if parser.errors:
+                return False
+            nos = parser.ast.body
+            try:
+                entrada = {"ast": [node.to_tuple() for node in nos], "semantica": [], "posicao": posicao}
+            except RecursionError:
+                entrada = {"ast": None, "semantica": [], "posicao": posicao}  # profundo demais para o cache
+        if entrada["ast"] is not None:
+            itens[chave] = entrada
+        analisados.append((nos, entrada))
+
+    result.ast = Programa([node for nos, _ in analisados for node in nos])
+    analisador = AnalisadorIncremental(result.symbol_table, result.diagnostics)
+    semanticas_reaproveitadas = 0
+    for nos, entrada in analisados:
+        gravacoes = entrada["semantica"]
+        if analisador.reaproveitar(nos, gravacoes):
+            semanticas_reaproveitadas += 1
+            continue
+        gravacoes.insert(0, analisador.analisar_item(nos))
+        del gravacoes[MAX_VARIANTES:]
+
+    salvar_cache(caminho_cache, itens)
+    result.incremental_stats = {
+        "itens": len(analisados),
+        "asts_reaproveitadas": asts_reaproveitadas,
+        "semanticas_reaproveitadas": semanticas_reaproveitadas,
+    }
+    return True
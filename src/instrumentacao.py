@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss vem em bytes no macOS e em KiB nos demais sistemas
+_ESCALA_MAXRSS = 1 if sys.platform == "darwin" else 1024
+
+def memoria_pico():
+    """Pico de memória residente do processo até agora, em bytes (None se indisponível)"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _ESCALA_MAXRSS
+
+# Categorias dos intervalos medidos
+CATEGORIA_FASE = "fase"
+CATEGORIA_SUBROTINA = "subrotina"
+
+class Intervalo:
+    """
+    Trecho medido de uma compilação: uma fase (lexica, sintatica, ...) ou a análise
+    ou geração de uma subrotina.
+
+    inicio e duracao estão em nanossegundos, com inicio contado a partir da criação
+    da Instrumentacao. memoria_pico é o pico de memória residente do processo até o
+    fim de uma fase, em bytes: como o pico nunca diminui, uma fase que aumenta o
+    valor em relação à anterior é a que mais usou memória até ali. É None nos
+    intervalos das subrotinas e onde o módulo resource não existe (Windows).
+    contagens guarda os números da fase, como tokens, nós ou diagnósticos.
+    """
+    __slots__ = ("nome", "categoria", "inicio", "duracao", "memoria_pico", "contagens")
+
+    def __init__(self, nome, categoria, inicio, contagens=None):
+        self.nome = nome
+        self.categoria = categoria
+        self.inicio = inicio
+        self.duracao = None  # Preenchida no fim do intervalo
+        self.memoria_pico = None
+        self.contagens = contagens if contagens is not None else {}
+
+    def to_dict(self):
+        return {"nome": self.nome, "categoria": self.categoria, "inicio": self.inicio, "duracao": self.duracao,
+                "memoria_pico": self.memoria_pico, "contagens": self.contagens}
+
+class GanchoInstrumentacao:
+    """
+    Base dos ganchos registrados em Instrumentacao (ou em CompileOptions.hooks).
+    inicio e fim recebem cada Intervalo ao abrir e ao fechar, na ordem em que
+    acontecem; fechar é chamado uma vez, ao final da compilação. As subclasses
+    sobrescrevem apenas os métodos de que precisam.
+    """
+
+    def inicio(self, intervalo):
+        pass
+
+    def fim(self, intervalo):
+        pass
+
+    def fechar(self, instrumentacao):
+        pass
+
+class Instrumentacao:
+    """
+    Mede as fases de uma compilação e repassa os intervalos aos ganchos.
+
+    Os intervalos das fases ficam em fases, na ordem em que terminaram. As fases não
+    se sobrepõem; os intervalos das subrotinas ficam dentro da fase que as analisa.
+
+    Args:
+        ganchos: Lista inicial de GanchoInstrumentacao.
+        memoria: Se True, mede o pico de memória do processo no fim de cada fase.
+    """
+
+    def __init__(self, ganchos=None, memoria=True):
+        self.ganchos = list(ganchos or [])
+        self.memoria = memoria
+        self.fases = []
+        self._origem = time.perf_counter_ns()
+
+    def adicionar_gancho(self, gancho):
+        self.ganchos.append(gancho)
+
+    def abrir(self, nome, categoria, contagens=None):
+        intervalo = Intervalo(nome, categoria, time.perf_counter_ns() - self._origem, contagens)
+        for gancho in self.ganchos:
+            gancho.inicio(intervalo)
+        return intervalo
+
+    def encerrar(self, intervalo):
+        intervalo.duracao = time.perf_counter_ns() - self._origem - intervalo.inicio
+        for gancho in self.ganchos:
+            gancho.fim(intervalo)
+
+    @contextmanager
+    def fase(self, nome):
+        """Mede o bloco como a fase nome; o Intervalo recebido aceita contagens"""
+        intervalo = self.abrir(nome, CATEGORIA_FASE)
+        try:
+            yield intervalo
+        finally:
+            if self.memoria:
+                intervalo.memoria_pico = memoria_pico()
+            self.encerrar(intervalo)
+            self.fases.append(intervalo)
+
+    def fechar(self):
+        """Avisa os ganchos do fim da compilação"""
+        for gancho in self.ganchos:
+            gancho.fechar(self)
+
+class EscritorTrace(GanchoInstrumentacao):
+    """
+    Gancho que grava os intervalos no formato Chrome Trace (aberto em
+    chrome://tracing ou no Perfetto), de uma só vez, em fechar(). Contagens
+    acrescentadas a um intervalo depois de ele terminar também são gravadas.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.intervalos = []
+
+    def fim(self, intervalo):
+        self.intervalos.append(intervalo)
+
+    def fechar(self, instrumentacao):
+        pid = os.getpid()
+        eventos = []
+        for intervalo in self.intervalos:
+            argumentos = dict(intervalo.contagens)
+            if intervalo.memoria_pico is not None:
+                argumentos["memoria_pico"] = intervalo.memoria_pico
+            # Eventos completos ("X"), com tempos em microssegundos
+            eventos.append({"name": intervalo.nome, "cat": intervalo.categoria, "ph": "X",
+                            "ts": intervalo.inicio / 1000, "dur": intervalo.duracao / 1000,
+                            "pid": pid, "tid": 1, "args": argumentos})
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,97 @@
+import json
+
+# Dígitos base64 do formato Source Map v3: cada um carrega 5 bits e um bit de continuação
+_BASE64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_VALORES_BASE64 = {digito: valor for valor, digito in enumerate(_BASE64)}
+
+def _vlq(valor):
+    """Codifica um inteiro em VLQ base64: o bit menos significativo é o sinal"""
+    valor = (-valor << 1) | 1 if valor < 0 else valor << 1
+    digitos = []
+    while True:
+        digito = valor & 31
+        valor >>= 5
+        digitos.append(_BASE64[digito | 32 if valor else digito])
+        if not valor:
+            return "".join(digitos)
+
+def _ler_vlq(texto):
+    """Inteiros codificados em sequência por _vlq em texto"""
+    valores = []
+    valor = deslocamento = 0
+    for digito in texto:
+        bits = _VALORES_BASE64[digito]
+        valor |= (bits & 31) << deslocamento
+        if bits & 32:
+            deslocamento += 5
+            continue
+        valores.append(-(valor >> 1) if valor & 1 else valor >> 1)
+        valor = deslocamento = 0
+    return valores
+
+def gerar_mapa_fontes(posicoes, fonte="<coins>", arquivo=None):
+    """
+    Mapa de fontes, no formato Source Map v3, de um código gerado.
+
+    Cada linha mapeada do código gerado tem um segmento na coluna 0 com a linha e
+    a coluna no código Coins, codificadas em VLQ base64 como diferenças para o
+    segmento anterior: linhas seguidas do mesmo comando custam 4 caracteres
+    ("AAAA"), e o mapa cresce pouco mesmo em códigos gerados grandes.
+
+    Args:
+        posicoes: (linha, coluna) de cada linha do código gerado, ou None nas linhas
+            sem origem (ver CodeGenerator.linhas_fonte).
+        fonte: Nome do arquivo Coins, guardado em "sources".
+        arquivo: Nome do arquivo gerado, guardado em "file" se informado.
+
+    Returns:
+        Dicionário pronto para json.dump.
+    """
+    segmentos = []
+    codigos = {}  # Diferença -> VLQ, já que quase todas as diferenças se repetem
+    linha_anterior = coluna_anterior = 0
+    for posicao in posicoes:
+        if posicao is None:
+            segmentos.append("")
+            continue
+        linha, coluna = posicao[0] - 1, posicao[1] - 1
+        diferenca_linha = linha - linha_anterior
+        diferenca_coluna = coluna - coluna_anterior
+        codigo_linha = codigos.get(diferenca_linha)
+        if codigo_linha is None:
+            codigo_linha = codigos[diferenca_linha] = _vlq(diferenca_linha)
+        codigo_coluna = codigos.get(diferenca_coluna)
+        if codigo_coluna is None:
+            codigo_coluna = codigos[diferenca_coluna] = _vlq(diferenca_coluna)
+        # Coluna gerada 0 e fonte 0 (o único arquivo em "sources")
+        segmentos.append("AA" + codigo_linha + codigo_coluna)
+        linha_anterior, coluna_anterior = linha, coluna
+    mapa = {"version": 3, "sources": [fonte], "names": [], "mappings": ";".join(segmentos)}
+    if arquivo is not None:
+        mapa["file"] = arquivo
+    return mapa
+
+def ler_mapa_fontes(mapa):
+    """
+    Posição (linha, coluna) no código Coins de cada linha do código gerado, ou
+    None nas linhas sem segmento; o inverso de gerar_mapa_fontes. Aceita mapas de
+    outras ferramentas, usando o primeiro segmento de cada linha.
+    """
+    posicoes = []
+    linha = coluna = 0
+    for segmentos in mapa["mappings"].split(";"):
+        posicao = None
+        for segmento in segmentos.split(","):
+            valores = _ler_vlq(segmento)
+            if len(valores) < 4:
+                continue  # Segmento vazio ou sem posição no código fonte
+            linha += valores[2]
+            coluna += valores[3]
+            if posicao is None:
+                posicao = (linha + 1, coluna + 1)
+        posicoes.append(posicao)
+    return posicoes
+
+def salvar_mapa_fontes(mapa, caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(mapa, f, separators=(",", ":"))
@@ -0,0 +1,598 @@
+from gerador_bytecode import VALORES_INICIAIS, valor_literal
+from nos_ast import (PROGRAMA, DECLARACAO, ATRIBUICAO, CONDICIONAL, REPETICAO, SUBROUTINE_DECLARATION,
+                     CHAMADA_SUBROTINA, RETORNO, BINARY_EXPRESSION, UNARY_EXPRESSION, LITERAL,
+                     IDENTIFIER, COMENTARIO)
+
+# Códigos das instruções. Cada instrução é uma tupla (código, a, b, c) de inteiros;
+# a, b e c são registradores do quadro atual (negativos para constantes) ou
+# posições no código, conforme a instrução.
+(MOVER,                 # regs[a] = regs[b]
+ SOMAR, SUBTRAIR, MULTIPLICAR, DIVIDIR, RESTO,  # regs[a] = regs[b] <op> regs[c]
+ IGUAL, DIFERENTE, MAIOR, MENOR, MAIOR_IGUAL, MENOR_IGUAL,
+ NAO, NEGATIVO,         # regs[a] = not regs[b] / -regs[b]
+ SALTAR,                # pc = a
+ SALTAR_SE_FALSO, SALTAR_SE_VERDADEIRO,  # se regs[a] é falso / verdadeiro: pc = b
+ # Comparação e salto juntos (condições de se e enquanto): se regs[a] <op> regs[b]
+ # é falso (SE_NAO_*) ou verdadeiro (SE_*): pc = c
+ SE_NAO_IGUAL, SE_NAO_DIFERENTE, SE_NAO_MAIOR, SE_NAO_MENOR, SE_NAO_MAIOR_IGUAL, SE_NAO_MENOR_IGUAL,
+ SE_IGUAL, SE_DIFERENTE, SE_MAIOR, SE_MENOR, SE_MAIOR_IGUAL, SE_MENOR_IGUAL,
+ LER_GLOBAL, ESCREVER_GLOBAL,  # regs[a] = globais[b] / globais[a] = regs[b]
+ # Variáveis de subrotinas externas: externos[n - 1] é o quadro da subrotina de nível n
+ LER_EXTERNO, ESCREVER_EXTERNO,  # regs[a] = externos[b][c] / externos[a][b] = regs[c]
+ CHAMAR,                # regs[a] = funcoes[b](regs[c], regs[c + 1], ...)
+ RETORNAR, RETORNAR_NADA,  # retorna regs[a] / None ao quadro anterior
+ FIM) = range(37)
+
+OPERACOES_BINARIAS = {"+": SOMAR, "-": SUBTRAIR, "*": MULTIPLICAR, "/": DIVIDIR, "%": RESTO,
+                      "==": IGUAL, "!=": DIFERENTE, ">": MAIOR, "<": MENOR, ">=": MAIOR_IGUAL,
+                      "<=": MENOR_IGUAL}
+OPERACOES_UNARIAS = {"!": NAO, "-": NEGATIVO}
+SALTOS_SE_FALSO = {IGUAL: SE_NAO_IGUAL, DIFERENTE: SE_NAO_DIFERENTE, MAIOR: SE_NAO_MAIOR, MENOR: SE_NAO_MENOR,
+                   MAIOR_IGUAL: SE_NAO_MAIOR_IGUAL, MENOR_IGUAL: SE_NAO_MENOR_IGUAL}
+SALTOS_SE_VERDADEIRO = {IGUAL: SE_IGUAL, DIFERENTE: SE_DIFERENTE, MAIOR: SE_MAIOR, MENOR: SE_MENOR,
+                        MAIOR_IGUAL: SE_MAIOR_IGUAL, MENOR_IGUAL: SE_MENOR_IGUAL}
+
+# Chamadas aninhadas permitidas antes de a execução ser interrompida
+LIMITE_CHAMADAS = 100000
+
+class ErroExecucao(Exception):
+    """Erro na tradução ou na execução de um programa pela máquina virtual"""
+
+class FuncaoVM:
+    """
+    Código de uma subrotina (ou do programa principal) traduzido para a máquina virtual.
+
+    registros é o modelo do quadro de registradores: os registradores de
+    variáveis e temporários (None) seguidos das constantes, em ordem inversa, de
+    modo que a constante k é o registrador -(k + 1). Os parâmetros ocupam os
+    primeiros registradores. nivel é o do quadro da subrotina: 1 para as
+    declaradas no programa principal, +1 a cada aninhamento.
+    """
+    __slots__ = ("nome", "parametros", "codigo", "registros", "nivel")
+
+    def __init__(self, nome, parametros, codigo, registros, nivel=0):
+        self.nome = nome
+        self.parametros = parametros
+        self.codigo = codigo
+        self.registros = registros
+        self.nivel = nivel
+
+class ProgramaVM:
+    """Programa traduzido: o código principal, as subrotinas e o registrador de cada variável global"""
+    __slots__ = ("principal", "funcoes", "globais")
+
+    def __init__(self, principal, funcoes, globais):
+        self.principal = principal
+        self.funcoes = funcoes
+        self.globais = globais
+
+class _Quadro:
+    """Estado da tradução de uma subrotina: código, alocação de registradores e constantes"""
+    __slots__ = ("nivel", "codigo", "topo", "maximo", "constantes", "indices_constantes", "aninhadas")
+
+    def __init__(self, nivel):
+        self.nivel = nivel  # 0 no programa principal, +1 a cada subrotina aninhada
+        self.aninhadas = False  # Se já declarou uma subrotina, que pode alterar as suas variáveis
+        self.codigo = []
+        self.topo = 0  # Primeiro registrador livre
+        self.maximo = 0
+        self.constantes = []
+        self.indices_constantes = {}
+
+    def alocar(self):
+        registrador = self.topo
+        self.topo += 1
+        if self.topo > self.maximo:
+            self.maximo = self.topo
+        return registrador
+
+    def constante(self, valor):
+        chave = (type(valor), repr(valor))
+        indice = self.indices_constantes.get(chave)
+        if indice is None:
+            self.constantes.append(valor)
+            indice = self.indices_constantes[chave] = len(self.constantes)
+        return -indice
+
+    def funcao(self, nome, parametros):
+        registros = [None] * self.maximo + self.constantes[::-1]
+        return FuncaoVM(nome, parametros, self.codigo, registros, self.nivel)
+
+class TradutorVM:
+    """
+    Traduz a AST da linguagem Coins para o código linear da máquina virtual.
+
+    Cada variável ocupa o registrador do slot do seu vínculo (profundidade, slot),
+    anotado pela análise semântica, e a máquina virtual não consulta nenhum nome
+    durante a execução. Os temporários ficam acima das variáveis vivas. Em uma AST
+    sem vínculos, os nomes são resolvidos aqui com os mesmos escopos e a mesma
+    alocação de slots da análise. Variáveis do programa principal são lidas e
+    escritas por LER_GLOBAL e ESCREVER_GLOBAL, e as de subrotinas externas por
+    LER_EXTERNO e ESCREVER_EXTERNO, com o nível e o slot do vínculo.
+    """
+
+    def __init__(self, ast_coins):
+        self.ast = ast_coins
+        self.funcoes = []
+        self.aridades = []  # Parâmetros de cada subrotina, conhecidos antes de o corpo ser traduzido
+        self.escopos = []  # Lista de (nível do quadro, {nome: ("variavel", registrador) ou ("funcao", índice)})
+        self.quadro = None
+        self._com_chamada = {}  # id do nó de expressão: se contém uma chamada (ver contem_chamada)
+        self._tradutores = {
+            DECLARACAO: self.traduzir_declaracao,
+            ATRIBUICAO: self.traduzir_atribuicao,
+            CONDICIONAL: self.traduzir_condicional,
+            REPETICAO: self.traduzir_repeticao,
+            SUBROUTINE_DECLARATION: self.traduzir_subrotina,
+            CHAMADA_SUBROTINA: self.traduzir_chamada,
+            RETORNO: self.traduzir_retorno,
+        }
+
+    def traduzir(self):
+        """Retorna o ProgramaVM da AST"""
+        if self.ast.TAG != PROGRAMA:
+            raise ErroExecucao("A raiz da AST deve ser um Programa.")
+        self.quadro = _Quadro(0)
+        self.escopos.append((0, {}))
+        self.traduzir_bloco(self.ast.body, novo_escopo=False)
+        self.quadro.codigo.append((FIM, 0, 0, 0))
+        globais = {nome: simbolo[1] for nome, simbolo in self.escopos[0][1].items() if simbolo[0] == "variavel"}
+        return ProgramaVM(self.quadro.funcao("<programa>", 0), self.funcoes, globais)
+
+    def traduzir_bloco(self, comandos, novo_escopo=True):
+        quadro = self.quadro
+        topo = quadro.topo
+        if novo_escopo:
+            self.escopos.append((quadro.nivel, {}))
+        for node in comandos:
+            if node.TAG == COMENTARIO:
+                continue
+            tradutor = self._tradutores.get(node.TAG)
+            if tradutor is None:
+                raise ErroExecucao("Comando não suportado pela máquina virtual: " + node.type)
+            inicio_comando = quadro.topo
+            tradutor(node)
+            if node.TAG != DECLARACAO:
+                quadro.topo = inicio_comando  # Libera os temporários do comando
+        if novo_escopo:
+            self.escopos.pop()
+            quadro.topo = topo  # Libera as variáveis do bloco
+
+    def resolver(self, nome):
+        """
+        Retorna ("local", registrador), ("global", registrador), ("externo", (nível,
+        registrador)) ou ("funcao", índice)
+        """
+        for nivel, escopo in reversed(self.escopos):
+            simbolo = escopo.get(nome)
+            if simbolo is None:
+                continue
+            if simbolo[0] == "funcao":
+                return simbolo
+            if nivel == self.quadro.nivel:
+                return ("local", simbolo[1])
+            if nivel == 0:
+                return ("global", simbolo[1])
+            return ("externo", (nivel, simbolo[1]))
+        raise ErroExecucao(f"Nome '{nome}' não declarado.")
+
+    def resolver_variavel(self, nome, vinculo):
+        """Como resolver, usando o vínculo anotado pela análise semântica se houver"""
+        if vinculo is None:
+            return self.resolver(nome)
+        profundidade, slot = vinculo
+        if profundidade == self.quadro.nivel:
+            return ("local", slot)
+        if profundidade == 0:
+            return ("global", slot)
+        return ("externo", vinculo)
+
+    def traduzir_declaracao(self, node):
+        quadro = self.quadro
+        escopo = self.escopos[-1][1]
+        for declaration in node.declarations:
+            registrador = quadro.alocar()
+            escopo[declaration.name] = ("variavel", registrador)
+            valor = VALORES_INICIAIS.get(declaration.var_type)
+            quadro.codigo.append((MOVER, registrador, quadro.constante(valor), 0))
+
+    def traduzir_atribuicao(self, node):
+        tipo, registrador = self.resolver_variavel(node.variable, node.vinculo)
+        if tipo == "local":
+            self.traduzir_expressao(node.value, registrador)
+        elif tipo == "global":
+            valor = self.traduzir_expressao(node.value)
+            self.quadro.codigo.append((ESCREVER_GLOBAL, registrador, valor, 0))
+        elif tipo == "externo":
+            valor = self.traduzir_expressao(node.value)
+            nivel, slot = registrador
+            self.quadro.codigo.append((ESCREVER_EXTERNO, nivel - 1, slot, valor))
+        else:
+            raise ErroExecucao(f"'{node.variable}' é uma subrotina e não pode receber valor.")
+
+    def traduzir_condicao(self, condicao, se_verdadeiro):
+        """
+        Emite o teste de uma condição com o destino do salto a preencher. Retorna a
+        posição da instrução de salto, tomado se a condição for falsa ou, com
+        se_verdadeiro, verdadeira.
+        """
+        quadro = self.quadro
+        operacao = OPERACOES_BINARIAS.get(condicao.operator) if condicao.TAG == BINARY_EXPRESSION else None
+        saltos = SALTOS_SE_VERDADEIRO if se_verdadeiro else SALTOS_SE_FALSO
+        if operacao in saltos:
+            esquerda = self.traduzir_expressao(condicao.left, self.destino_operando(condicao.left, condicao.right))
+            direita = self.traduzir_expressao(condicao.right)
+            quadro.codigo.append((saltos[operacao], esquerda, direita, None))
+        else:
+            valor = self.traduzir_expressao(condicao)
+            quadro.codigo.append((SALTAR_SE_VERDADEIRO if se_verdadeiro else SALTAR_SE_FALSO, valor, None, 0))
+        return len(quadro.codigo) - 1
+
+    def preencher_salto(self, posicao, destino):
+        codigo = self.quadro.codigo
+        operacao, a, b, c = codigo[posicao]
+        if operacao == SALTAR:
+            codigo[posicao] = (operacao, destino, b, c)
+        elif operacao in (SALTAR_SE_FALSO, SALTAR_SE_VERDADEIRO):
+            codigo[posicao] = (operacao, a, destino, c)
+        else:
+            codigo[posicao] = (operacao, a, b, destino)
+
+    def traduzir_condicional(self, node):
+        quadro = self.quadro
+        topo = quadro.topo
+        salto_senao = self.traduzir_condicao(node.condition, se_verdadeiro=False)
+        quadro.topo = topo
+        self.traduzir_bloco(node.consequent)
+        if node.alternate is None:
+            self.preencher_salto(salto_senao, len(quadro.codigo))
+            return
+        quadro.codigo.append((SALTAR, None, 0, 0))
+        salto_fim = len(quadro.codigo) - 1
+        self.preencher_salto(salto_senao, len(quadro.codigo))
+        self.traduzir_bloco(node.alternate)
+        self.preencher_salto(salto_fim, len(quadro.codigo))
+
+    def traduzir_repeticao(self, node):
+        # O teste fica no fim do laço: cada volta executa um único salto
+        quadro = self.quadro
+        quadro.codigo.append((SALTAR, None, 0, 0))
+        salto_teste = len(quadro.codigo) - 1
+        inicio = len(quadro.codigo)
+        self.traduzir_bloco(node.body)
+        self.preencher_salto(salto_teste, len(quadro.codigo))
+        self.preencher_salto(self.traduzir_condicao(node.condition, se_verdadeiro=True), inicio)
+
+    def traduzir_subrotina(self, node):
+        # Registrada antes do corpo, para permitir chamadas recursivas
+        indice = len(self.funcoes)
+        self.funcoes.append(None)
+        self.aridades.append(len(node.parameters))
+        self.escopos[-1][1][node.name] = ("funcao", indice)
+
+        externo = self.quadro
+        externo.aninhadas = True
+        self.quadro = _Quadro(externo.nivel + 1)
+        escopo = {}
+        for param in node.parameters:
+            escopo[param.name] = ("variavel", self.quadro.alocar())
+        self.escopos.append((self.quadro.nivel, escopo))
+        self.traduzir_bloco(node.body, novo_escopo=False)
+        self.quadro.codigo.append((RETORNAR_NADA, 0, 0, 0))
+        self.escopos.pop()
+        self.funcoes[indice] = self.quadro.funcao(node.name, len(node.parameters))
+        self.quadro = externo
+
+    def traduzir_chamada(self, node):
+        self.traduzir_expressao(node)
+
+    def traduzir_retorno(self, node):
+        if node.value is None:
+            self.quadro.codigo.append((RETORNAR_NADA, 0, 0, 0))
+        else:
+            self.quadro.codigo.append((RETORNAR, self.traduzir_expressao(node.value), 0, 0))
+
+    def contem_chamada(self, node):
+        """Diz se a expressão contém uma chamada de subrotina; o resultado de cada nó percorrido é memorizado"""
+        memoria = self._com_chamada
+        pilha = [(node, False)]
+        while pilha:
+            atual, visitado = pilha.pop()
+            chave = id(atual)
+            if chave in memoria:
+                continue
+            tag = atual.TAG
+            if tag == BINARY_EXPRESSION:
+                filhos = (atual.left, atual.right)
+            elif tag == UNARY_EXPRESSION:
+                filhos = (atual.operand,)
+            else:
+                memoria[chave] = tag == CHAMADA_SUBROTINA
+                continue
+            if visitado:
+                memoria[chave] = any(memoria[id(filho)] for filho in filhos)
+            else:
+                pilha.append((atual, True))
+                pilha.extend((filho, False) for filho in filhos)
+        return memoria[id(node)]
+
+    def destino_operando(self, esquerda, direita):
+        """
+        Registrador em que o operando esquerdo deve ser copiado, ou None para lê-lo
+        no seu próprio registrador. No programa principal, os registradores das
+        variáveis são o quadro global, e em uma subrotina com subrotinas aninhadas,
+        o quadro externo delas: uma chamada no operando direito poderia alterar a
+        variável por ESCREVER_GLOBAL ou ESCREVER_EXTERNO antes de a operação lê-la.
+        """
+        quadro = self.quadro
+        if ((quadro.nivel == 0 or quadro.aninhadas) and esquerda.TAG == IDENTIFIER
+                and self.contem_chamada(direita)):
+            return self.quadro.alocar()
+        return None
+
+    def traduzir_expressao(self, node, destino=None):
+        """
+        Emite o código da expressão e retorna o registrador com o seu valor: destino,
+        se informado, ou um registrador de variável, constante ou temporário.
+        Temporários continuam alocados até o fim do comando.
+
+        Percorre a expressão em pós-ordem com uma pilha explícita, como o analisador
+        semântico. Cada nó libera os temporários dos seus filhos antes de alocar o
+        seu; a instrução lê os operandos antes de escrever o resultado.
+        """
+        quadro = self.quadro
+        codigo = quadro.codigo
+        resultados = []
+        pilha = [(node, destino, 0, None)]  # (nó, destino, etapa, dado da etapa)
+        while pilha:
+            atual, destino_atual, etapa, dado = pilha.pop()
+            tag = atual.TAG
+            if tag == LITERAL:
+                registrador = quadro.constante(valor_literal(atual))
+            elif tag == IDENTIFIER:
+                tipo, registrador = self.resolver_variavel(atual.name, atual.vinculo)
+                if tipo == "global":
+                    temporario = quadro.alocar() if destino_atual is None else destino_atual
+                    codigo.append((LER_GLOBAL, temporario, registrador, 0))
+                    registrador = temporario
+                elif tipo == "externo":
+                    temporario = quadro.alocar() if destino_atual is None else destino_atual
+                    codigo.append((LER_EXTERNO, temporario, registrador[0] - 1, registrador[1]))
+                    registrador = temporario
+                elif tipo == "funcao":
+                    raise ErroExecucao(f"Subrotina '{atual.name}' usada como valor.")
+            elif tag == BINARY_EXPRESSION and atual.operator in ("&&", "||"):
+                # O resultado é o valor de um dos operandos, como and/or do Python
+                if etapa == 0:
+                    temporario = quadro.alocar()
+                    pilha.append((atual, destino_atual, 1, temporario))
+                    pilha.append((atual.left, temporario, 0, None))
+                    continue
+                if etapa == 1:
+                    resultados.pop()
+                    salto = SALTAR_SE_FALSO if atual.operator == "&&" else SALTAR_SE_VERDADEIRO
+                    codigo.append((salto, dado, None, 0))
+                    pilha.append((atual, destino_atual, 2, (dado, len(codigo) - 1)))
+                    pilha.append((atual.right, dado, 0, None))
+                    continue
+                resultados.pop()
+                registrador, salto = dado
+                self.preencher_salto(salto, len(codigo))
+                quadro.topo = registrador + 1
+            elif tag == BINARY_EXPRESSION or tag == UNARY_EXPRESSION:
+                if etapa == 0:
+                    pilha.append((atual, destino_atual, 1, quadro.topo))
+                    if tag == BINARY_EXPRESSION:
+                        esquerda = self.destino_operando(atual.left, atual.right)
+                        pilha.append((atual.right, None, 0, None))
+                        pilha.append((atual.left, esquerda, 0, None))
+                    else:
+                        pilha.append((atual.operand, None, 0, None))
+                    continue
+                quadro.topo = dado
+                registrador = quadro.alocar() if destino_atual is None else destino_atual
+                if tag == BINARY_EXPRESSION:
+                    operacao = OPERACOES_BINARIAS.get(atual.operator)
+                    if operacao is None:
+                        raise ErroExecucao("Operador desconhecido: " + atual.operator)
+                    direita = resultados.pop()
+                    codigo.append((operacao, registrador, resultados.pop(), direita))
+                else:
+                    operacao = OPERACOES_UNARIAS.get(atual.operator)
+                    if operacao is None:
+                        raise ErroExecucao("Operador desconhecido: " + atual.operator)
+                    codigo.append((operacao, registrador, resultados.pop(), 0))
+                resultados.append(registrador)
+                continue
+            elif tag == CHAMADA_SUBROTINA:
+                # Os argumentos ficam em temporários consecutivos a partir de base
+                if etapa == 0:
+                    tipo, indice = self.resolver(atual.name)
+                    if tipo != "funcao":
+                        raise ErroExecucao(f"'{atual.name}' não é um procedimento ou função.")
+                    esperados = self.aridades[indice]
+                    if esperados != len(atual.arguments):
+                        raise ErroExecucao(f"'{atual.name}' espera {esperados} argumentos.")
+                    topo = quadro.topo
+                    base = topo
+                    for _ in atual.arguments:
+                        quadro.alocar()
+                    pilha.append((atual, destino_atual, 1, (topo, base, indice)))
+                    for posicao in range(len(atual.arguments) - 1, -1, -1):
+                        pilha.append((atual.arguments[posicao], base + posicao, 0, None))
+                    continue
+                del resultados[len(resultados) - len(atual.arguments):]
+                topo, base, indice = dado
+                quadro.topo = topo
+                registrador = quadro.alocar() if destino_atual is None else destino_atual
+                codigo.append((CHAMAR, registrador, indice, base))
+                resultados.append(registrador)
+                continue
+            else:
+                raise ErroExecucao("Tipo de expressão desconhecido: " + atual.type)
+            if destino_atual is not None and registrador != destino_atual:
+                codigo.append((MOVER, destino_atual, registrador, 0))
+                registrador = destino_atual
+            resultados.append(registrador)
+        return resultados[0]
+
+def traduzir(ast_coins):
+    """Traduz a AST para um ProgramaVM (ver TradutorVM)"""
+    return TradutorVM(ast_coins).traduzir()
+
+class MaquinaVirtual:
+    """
+    Máquina virtual de registradores que executa um ProgramaVM.
+
+    Cada chamada ganha uma cópia do modelo de registradores da subrotina; o
+    programa principal usa o quadro global, que as subrotinas acessam por
+    LER_GLOBAL e ESCREVER_GLOBAL. Cada quadro guarda também, em externos, os
+    quadros das subrotinas que envolvem a sua declaração (um display): uma
+    subrotina de nível n recebe os n - 1 primeiros quadros da cadeia de quem a
+    chama, e as de nível 1 recebem uma tupla vazia. As operações são as do Python, de modo que os
+    resultados são os mesmos do código gerado por CodeGenerator.
+    """
+
+    def __init__(self, programa, limite_chamadas=LIMITE_CHAMADAS):
+        self.programa = programa
+        self.limite_chamadas = limite_chamadas
+        self.globais = None
+
+    def executar(self):
+        """Executa o programa e retorna o valor final das variáveis globais por nome"""
+        programa = self.programa
+        funcoes = programa.funcoes
+        limite = self.limite_chamadas
+        globais = regs = programa.principal.registros[:]
+        self.globais = globais
+        codigo = programa.principal.codigo
+        externos = ()  # Quadros das subrotinas que envolvem a atual, do nível 1 em diante
+        pilha = []
+        pc = 0
+        try:
+            # Despacho em dois níveis pelas faixas de códigos: aritmética, comparação e
+            # salto, e as demais, com as mais frequentes primeiro em cada faixa
+            while True:
+                operacao, a, b, c = codigo[pc]
+                pc += 1
+                if operacao <= RESTO:
+                    if operacao == MOVER:
+                        regs[a] = regs[b]
+                    elif operacao == SOMAR:
+                        regs[a] = regs[b] + regs[c]
+                    elif operacao == SUBTRAIR:
+                        regs[a] = regs[b] - regs[c]
+                    elif operacao == MULTIPLICAR:
+                        regs[a] = regs[b] * regs[c]
+                    elif operacao == RESTO:
+                        regs[a] = regs[b] % regs[c]
+                    else:
+                        regs[a] = regs[b] / regs[c]
+                elif SE_NAO_IGUAL <= operacao <= SE_MENOR_IGUAL:
+                    if operacao < SE_IGUAL:
+                        if operacao == SE_NAO_MENOR:
+                            if not regs[a] < regs[b]:
+                                pc = c
+                        elif operacao == SE_NAO_IGUAL:
+                            if not regs[a] == regs[b]:
+                                pc = c
+                        elif operacao == SE_NAO_MAIOR:
+                            if not regs[a] > regs[b]:
+                                pc = c
+                        elif operacao == SE_NAO_MENOR_IGUAL:
+                            if not regs[a] <= regs[b]:
+                                pc = c
+                        elif operacao == SE_NAO_MAIOR_IGUAL:
+                            if not regs[a] >= regs[b]:
+                                pc = c
+                        elif not regs[a] != regs[b]:
+                            pc = c
+                    elif operacao == SE_MENOR:
+                        if regs[a] < regs[b]:
+                            pc = c
+                    elif operacao == SE_MENOR_IGUAL:
+                        if regs[a] <= regs[b]:
+                            pc = c
+                    elif operacao == SE_MAIOR:
+                        if regs[a] > regs[b]:
+                            pc = c
+                    elif operacao == SE_MAIOR_IGUAL:
+                        if regs[a] >= regs[b]:
+                            pc = c
+                    elif operacao == SE_DIFERENTE:
+                        if regs[a] != regs[b]:
+                            pc = c
+                    elif regs[a] == regs[b]:
+                        pc = c
+                elif operacao == SALTAR:
+                    pc = a
+                elif operacao == CHAMAR:
+                    funcao = funcoes[b]
+                    novos = funcao.registros[:]
+                    novos[:funcao.parametros] = regs[c:c + funcao.parametros]
+                    pilha.append((codigo, pc, regs, externos, a))
+                    if len(pilha) > limite:
+                        raise ErroExecucao(f"Limite de {limite} chamadas aninhadas excedido em '{funcao.nome}'.")
+                    # A subrotina é declarada no quadro de nível funcao.nivel - 1, que é o
+                    # atual ou um dos que o envolvem. Fora do nível 1, quem chama é uma
+                    # subrotina, de nível len(externos) + 1
+                    if funcao.nivel != 1:
+                        if funcao.nivel - 1 > len(externos):
+                            externos = externos + (regs,)
+                        else:
+                            externos = externos[:funcao.nivel - 1]
+                    elif externos:
+                        externos = ()
+                    codigo = funcao.codigo
+                    regs = novos
+                    pc = 0
+                elif operacao == RETORNAR or operacao == RETORNAR_NADA:
+                    valor = regs[a] if operacao == RETORNAR else None
+                    if not pilha:
+                        break  # 'retorna' no programa principal
+                    codigo, pc, regs, externos, destino = pilha.pop()
+                    regs[destino] = valor
+                elif operacao == LER_GLOBAL:
+                    regs[a] = globais[b]
+                elif operacao == ESCREVER_GLOBAL:
+                    globais[a] = regs[b]
+                elif operacao == SALTAR_SE_FALSO:
+                    if not regs[a]:
+                        pc = b
+                elif operacao == SALTAR_SE_VERDADEIRO:
+                    if regs[a]:
+                        pc = b
+                elif operacao == MENOR:
+                    regs[a] = regs[b] < regs[c]
+                elif operacao == MAIOR:
+                    regs[a] = regs[b] > regs[c]
+                elif operacao == IGUAL:
+                    regs[a] = regs[b] == regs[c]
+                elif operacao == DIFERENTE:
+                    regs[a] = regs[b] != regs[c]
+                elif operacao == MENOR_IGUAL:
+                    regs[a] = regs[b] <= regs[c]
+                elif operacao == MAIOR_IGUAL:
+                    regs[a] = regs[b] >= regs[c]
+                elif operacao == NAO:
+                    regs[a] = not regs[b]
+                elif operacao == NEGATIVO:
+                    regs[a] = -regs[b]
+                elif operacao == LER_EXTERNO:
+                    regs[a] = externos[b][c]
+                elif operacao == ESCREVER_EXTERNO:
+                    externos[a][b] = regs[c]
+                elif operacao == FIM:
+                    break
+                else:
+                    raise ErroExecucao(f"Instrução desconhecida: {operacao}")
+        except ErroExecucao:
+            raise
+        except Exception as e:
+            nome = next((funcao.nome for funcao in funcoes if funcao.codigo is codigo), "<programa>")
+            raise ErroExecucao(f"{type(e).__name__}: {e} (em '{nome}', instrução {pc - 1})") from e
+        return {nome: globais[registrador] for nome, registrador in programa.globais.items()}
+
+def executar(ast_coins, limite_chamadas=LIMITE_CHAMADAS):
+    """Traduz e executa a AST na máquina virtual; retorna as variáveis globais por nome"""
+    return MaquinaVirtual(traduzir(ast_coins), limite_chamadas).executar()
@@ -0,0 +1,311 @@
+# Códigos inteiros dos tipos de nó, usados para despacho nas fases seguintes
+(PROGRAMA, DECLARACAO, ATRIBUICAO, CONDICIONAL, REPETICAO, SUBROUTINE_DECLARATION,
+ CHAMADA_SUBROTINA, RETORNO, BINARY_EXPRESSION, UNARY_EXPRESSION, LITERAL, IDENTIFIER,
+ COMENTARIO) = range(13)
+
+class No:
+    """
+    Base dos nós da AST.
+
+    Cada subclasse define TAG (código inteiro do tipo de nó), TYPE (nome usado no
+    campo "type" do JSON) e CAMPOS, a lista de (atributo, chave no JSON, opcional)
+    usada por to_dict. Campos opcionais com valor None são omitidos do JSON.
+    EXTRAS lista atributos preenchidos pelas fases seguintes, que não aparecem no
+    JSON mas são guardados por to_tuple. Os argumentos do construtor seguem a ordem
+    de CAMPOS e depois EXTRAS (ver no_from_tuple).
+
+    Os comandos guardam em posicao a (linha, coluna) do seu primeiro token no
+    código fonte; nos demais nós, posicao é None.
+    """
+    __slots__ = ()
+    TAG = None
+    TYPE = None
+    CAMPOS = ()
+    EXTRAS = ()
+    posicao = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.ATRIBUTOS = tuple(atributo for atributo, _, _ in cls.CAMPOS) + cls.EXTRAS
+
+    @property
+    def type(self):
+        return self.TYPE
+
+    def to_dict(self):
+        """Converte o nó no formato de dicionário usado em ast.json"""
+        resultado = {"type": self.TYPE}
+        for atributo, chave, opcional in self.CAMPOS:
+            valor = getattr(self, atributo)
+            if valor is None and opcional:
+                continue
+            resultado[chave] = _para_dict(valor)
+        return resultado
+
+    def to_tuple(self):
+        """
+        Forma compacta do nó para caches: (TAG, campo, campo, ...) na ordem de
+        CAMPOS e EXTRAS, com listas e filhos convertidos. Serializável com marshal.
+        """
+        return (self.TAG,) + tuple(_para_tupla(getattr(self, atributo)) for atributo in self.ATRIBUTOS)
+
+    def repr_dict(self):
+        """
+        Mesmo texto de repr(self.to_dict()), montado com uma pilha explícita para
+        que ASTs muito profundas (expressões longas) não estourem o limite de recursão
+        """
+        partes = []
+        pilha = [(False, self)]  # (é texto pronto, item)
+        while pilha:
+            pronto, item = pilha.pop()
+            if pronto:
+                partes.append(item)
+            elif isinstance(item, No):
+                itens = [("type", item.TYPE)]
+                for atributo, chave, opcional in item.CAMPOS:
+                    valor = getattr(item, atributo)
+                    if valor is None and opcional:
+                        continue
+                    itens.append((chave, valor))
+                pilha.append((True, "}"))
+                for indice in range(len(itens) - 1, -1, -1):
+                    chave, valor = itens[indice]
+                    pilha.append((False, valor))
+                    pilha.append((True, ("{" if indice == 0 else ", ") + repr(chave) + ": "))
+            elif isinstance(item, list):
+                pilha.append((True, "]"))
+                for indice in range(len(item) - 1, -1, -1):
+                    pilha.append((False, item[indice]))
+                    if indice:
+                        pilha.append((True, ", "))
+                pilha.append((True, "["))
+            elif isinstance(item, DeclaracaoVariavel):
+                partes.append(repr(item.to_dict()))
+            else:
+                partes.append(repr(item))
+        return "".join(partes)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+def _para_dict(valor):
+    if isinstance(valor, list):
+        return [_para_dict(item) for item in valor]
+    if isinstance(valor, (No, DeclaracaoVariavel)):
+        return valor.to_dict()
+    return valor
+
+def _para_tupla(valor):
+    if isinstance(valor, No):
+        return valor.to_tuple()
+    if isinstance(valor, list):
+        return [_para_tupla(item) for item in valor]
+    if isinstance(valor, DeclaracaoVariavel):
+        return (valor.name, valor.var_type)
+    return valor
+
+def _de_tupla(valor):
+    if type(valor) is tuple:
+        if type(valor[0]) is int:
+            classe = NOS_POR_TAG[valor[0]]
+            if classe.EXTRAS:  # Extras são guardados como estão, sem conversão
+                fim = len(classe.CAMPOS) + 1
+                return classe(*[_de_tupla(item) for item in valor[1:fim]], *valor[fim:])
+            return classe(*[_de_tupla(item) for item in valor[1:]])
+        return DeclaracaoVariavel(*valor)
+    if type(valor) is list:
+        return [_de_tupla(item) for item in valor]
+    return valor
+
+class DeclaracaoVariavel:
+    """Nome e tipo de uma variável declarada ou de um parâmetro de subrotina"""
+    __slots__ = ("name", "var_type")
+
+    def __init__(self, name, var_type):
+        self.name = name
+        self.var_type = var_type
+
+    def to_dict(self):
+        return {"name": self.name, "type": self.var_type}
+
+class Programa(No):
+    __slots__ = ("body",)
+    TAG = PROGRAMA
+    TYPE = "Programa"
+    CAMPOS = (("body", "body", False),)
+
+    def __init__(self, body=None):
+        self.body = body if body is not None else []
+
+class Declaracao(No):
+    __slots__ = ("declarations", "posicao")
+    TAG = DECLARACAO
+    TYPE = "Declaracao"
+    CAMPOS = (("declarations", "declarations", False),)
+    EXTRAS = ("posicao",)
+
+    def __init__(self, declarations=None, posicao=None):
+        self.declarations = declarations if declarations is not None else []
+        self.posicao = posicao
+
+class Atribuicao(No):
+    __slots__ = ("variable", "value", "vinculo", "posicao")
+    TAG = ATRIBUICAO
+    TYPE = "Atribuicao"
+    CAMPOS = (("variable", "variable", False), ("value", "value", False))
+    EXTRAS = ("vinculo", "posicao")
+
+    def __init__(self, variable=None, value=None, vinculo=None, posicao=None):
+        self.variable = variable
+        self.value = value
+        self.vinculo = vinculo  # (profundidade, slot) da variável, anotado pela análise semântica
+        self.posicao = posicao
+
+class Condicional(No):
+    __slots__ = ("condition", "consequent", "alternate", "posicao")
+    TAG = CONDICIONAL
+    TYPE = "Condicional"
+    CAMPOS = (("condition", "condition", False), ("consequent", "consequent", False),
+              ("alternate", "alternate", True))
+    EXTRAS = ("posicao",)
+
+    def __init__(self, condition=None, consequent=None, alternate=None, posicao=None):
+        self.condition = condition
+        self.consequent = consequent
+        self.alternate = alternate  # None quando não há "senao"
+        self.posicao = posicao
+
+class Repeticao(No):
+    __slots__ = ("condition", "body", "posicao")
+    TAG = REPETICAO
+    TYPE = "Repeticao"
+    CAMPOS = (("condition", "condition", False), ("body", "body", False))
+    EXTRAS = ("posicao",)
+
+    def __init__(self, condition=None, body=None, posicao=None):
+        self.condition = condition
+        self.body = body
+        self.posicao = posicao
+
+class SubroutineDeclaration(No):
+    __slots__ = ("kind", "name", "parameters", "return_type", "body", "posicao")
+    TAG = SUBROUTINE_DECLARATION
+    TYPE = "SubroutineDeclaration"
+    CAMPOS = (("kind", "kind", False), ("name", "name", False), ("parameters", "parameters", False),
+              ("return_type", "return_type", True), ("body", "body", False))
+    EXTRAS = ("posicao",)
+
+    def __init__(self, kind=None, name=None, parameters=None, return_type=None, body=None, posicao=None):
+        self.kind = kind
+        self.name = name
+        self.parameters = parameters
+        self.return_type = return_type
+        self.body = body
+        self.posicao = posicao
+
+class ChamadaSubrotina(No):
+    __slots__ = ("name", "arguments", "posicao")
+    TAG = CHAMADA_SUBROTINA
+    TYPE = "ChamadaSubrotina"
+    CAMPOS = (("name", "name", False), ("arguments", "arguments", False))
+    EXTRAS = ("posicao",)
+
+    def __init__(self, name=None, arguments=None, posicao=None):
+        self.name = name
+        self.arguments = arguments
+        self.posicao = posicao  # None em chamadas dentro de expressões
+
+class Retorno(No):
+    __slots__ = ("value", "posicao")
+    TAG = RETORNO
+    TYPE = "Retorno"
+    CAMPOS = (("value", "value", True),)
+    EXTRAS = ("posicao",)
+
+    def __init__(self, value=None, posicao=None):
+        self.value = value  # None em "retorna;"
+        self.posicao = posicao
+
+class BinaryExpression(No):
+    __slots__ = ("operator", "left", "right", "tipo")
+    TAG = BINARY_EXPRESSION
+    TYPE = "BinaryExpression"
+    CAMPOS = (("operator", "operator", False), ("left", "left", False), ("right", "right", False))
+    EXTRAS = ("tipo",)
+
+    def __init__(self, operator, left, right, tipo=None):
+        self.operator = operator
+        self.left = left
+        self.right = right
+        self.tipo = tipo  # Código do tipo inferido pela análise semântica (ver analisador_semantico.TIPO_FIXO)
+
+class UnaryExpression(No):
+    __slots__ = ("operator", "operand", "tipo")
+    TAG = UNARY_EXPRESSION
+    TYPE = "UnaryExpression"
+    CAMPOS = (("operator", "operator", False), ("operand", "operand", False))
+    EXTRAS = ("tipo",)
+
+    def __init__(self, operator, operand, tipo=None):
+        self.operator = operator
+        self.operand = operand
+        self.tipo = tipo  # Código do tipo inferido pela análise semântica (ver analisador_semantico.TIPO_FIXO)
+
+class Literal(No):
+    __slots__ = ("value", "value_type")
+    TAG = LITERAL
+    TYPE = "Literal"
+    CAMPOS = (("value", "value", False), ("value_type", "_type", False))
+
+    def __init__(self, value, value_type):
+        self.value = value
+        self.value_type = value_type
+
+class Identifier(No):
+    __slots__ = ("name", "vinculo")
+    TAG = IDENTIFIER
+    TYPE = "Identifier"
+    CAMPOS = (("name", "name", False),)
+    EXTRAS = ("vinculo",)
+
+    def __init__(self, name, vinculo=None):
+        self.name = name
+        self.vinculo = vinculo  # (profundidade, slot) da variável, anotado pela análise semântica
+
+class Comentario(No):
+    __slots__ = ("value", "kind", "posicao")
+    TAG = COMENTARIO
+    TYPE = "Comentario"
+    CAMPOS = (("value", "value", False), ("kind", "kind", False))
+    EXTRAS = ("posicao",)
+
+    def __init__(self, value, kind, posicao=None):
+        self.value = value
+        self.kind = kind
+        self.posicao = posicao
+
+# Classe de cada nó pela TAG, usado por no_from_tuple
+NOS_POR_TAG = {classe.TAG: classe for classe in (
+    Programa, Declaracao, Atribuicao, Condicional, Repeticao, SubroutineDeclaration,
+    ChamadaSubrotina, Retorno, BinaryExpression, UnaryExpression, Literal, Identifier,
+    Comentario
+)}
+
+def no_from_tuple(tupla):
+    """Reconstrói um nó a partir da forma produzida por No.to_tuple"""
+    return _de_tupla(tupla)
+
+def contar_nos(raiz):
+    """Número de nós da árvore com raiz em raiz, percorrida com uma pilha explícita"""
+    total = 0
+    pilha = [raiz]
+    while pilha:
+        node = pilha.pop()
+        total += 1
+        for atributo in node.ATRIBUTOS:
+            valor = getattr(node, atributo)
+            if isinstance(valor, No):
+                pilha.append(valor)
+            elif isinstance(valor, list):
+                pilha.extend(item for item in valor if isinstance(item, No))
+    return total
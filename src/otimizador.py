@@ -0,0 +1,255 @@
+import math
+
+from analisador_semantico import INTEIRO, REAL, TIPO_FIXO
+from nos_ast import (ATRIBUICAO, CONDICIONAL, REPETICAO, SUBROUTINE_DECLARATION, CHAMADA_SUBROTINA,
+                     RETORNO, BINARY_EXPRESSION, UNARY_EXPRESSION, LITERAL, IDENTIFIER, BinaryExpression,
+                     UnaryExpression, Literal)
+
+OPERADORES_ARITMETICOS = ("+", "-", "*", "/", "%")
+OPERADORES_COMPARACAO = ("==", "!=", ">", "<", ">=", "<=")
+
+def _valor_numerico(literal):
+    """Valor Python de um literal inteiro ou real, ou None se não for numérico"""
+    if literal.value_type == "inteiro":
+        return int(literal.value)
+    if literal.value_type == "real":
+        return float(literal.value)
+    return None
+
+def _literal_numerico(valor, tipo):
+    """Literal com o texto que o Python avalia de volta para o mesmo valor, ou None"""
+    if tipo == "real":
+        if not math.isfinite(valor):
+            return None
+        return Literal(repr(float(valor)), "real")
+    try:
+        return Literal(str(valor), "inteiro")
+    except ValueError:  # inteiro grande demais para converter em texto
+        return None
+
+def _literal_booleano(valor):
+    return Literal("True" if valor else "False", "boolean")
+
+def _eh_inteiro(no, valor):
+    return no is not None and no.TAG == LITERAL and no.value_type == "inteiro" and no.value == valor
+
+def _eh_booleano(no, valor=None):
+    return (no is not None and no.TAG == LITERAL and no.value_type == "boolean"
+            and (valor is None or no.value == valor))
+
+def _eh_numerico(no):
+    """
+    Se a expressão tem tipo inteiro ou real: o value_type de literais, o tipo que a
+    análise semântica guardou em operações e, para variáveis, sempre (a análise
+    semântica rejeita aritmética com texto). Chamadas não guardam o tipo de retorno.
+    """
+    tag = no.TAG
+    if tag == LITERAL:
+        return no.value_type in ("inteiro", "real")
+    if tag == BINARY_EXPRESSION or tag == UNARY_EXPRESSION:
+        return no.tipo is not None and no.tipo & ~TIPO_FIXO in (INTEIRO, REAL)
+    return tag == IDENTIFIER and no.vinculo is not None
+
+class Otimizador:
+    """
+    Dobra constantes e simplifica identidades algébricas na AST, antes da geração de
+    código. Roda depois da análise semântica, então os tipos já foram verificados.
+
+    O resultado de cada dobra respeita a tipagem de infer_type: inteiro com inteiro
+    continua inteiro, qualquer operando real torna o resultado real e comparações e
+    operadores lógicos produzem literais do tipo "boolean" (True/False no código
+    gerado). Divisões entre inteiros não são dobradas, pois o Python produziria um
+    real onde o Coins espera um inteiro; divisões por zero também são mantidas.
+    """
+
+    def __init__(self):
+        self.dobras = 0  # Número de nós substituídos
+
+    def otimizar(self, ast):
+        """Otimiza a AST no lugar e a retorna"""
+        self.otimizar_bloco(ast.body)
+        return ast
+
+    def otimizar_bloco(self, comandos):
+        for comando in comandos:
+            if comando is not None:
+                self.otimizar_comando(comando)
+
+    def otimizar_comando(self, node):
+        tag = node.TAG
+        if tag == ATRIBUICAO:
+            node.value = self.otimizar_expressao(node.value)
+        elif tag == CONDICIONAL:
+            node.condition = self.otimizar_expressao(node.condition)
+            self.otimizar_bloco(node.consequent)
+            if node.alternate is not None:
+                self.otimizar_bloco(node.alternate)
+        elif tag == REPETICAO:
+            node.condition = self.otimizar_expressao(node.condition)
+            self.otimizar_bloco(node.body)
+        elif tag == SUBROUTINE_DECLARATION:
+            self.otimizar_bloco(node.body)
+        elif tag == CHAMADA_SUBROTINA:
+            node.arguments = [self.otimizar_expressao(arg) for arg in node.arguments]
+        elif tag == RETORNO:
+            if node.value is not None:
+                node.value = self.otimizar_expressao(node.value)
+
+    def otimizar_expressao(self, node):
+        """
+        Retorna a expressão otimizada. Percorre a árvore em pós-ordem com uma pilha
+        explícita, como o analisador semântico, para suportar expressões longas.
+        """
+        if node is None:
+            return None
+        resultados = []
+        pilha = [(node, False)]
+        while pilha:
+            atual, filhos_prontos = pilha.pop()
+            if atual is None:
+                resultados.append(None)
+                continue
+            tag = atual.TAG
+            if tag == BINARY_EXPRESSION:
+                if filhos_prontos:
+                    right = resultados.pop()
+                    left = resultados.pop()
+                    resultados.append(self.dobrar_binaria(atual, left, right))
+                else:
+                    pilha.append((atual, True))
+                    pilha.append((atual.right, False))
+                    pilha.append((atual.left, False))
+            elif tag == UNARY_EXPRESSION:
+                if filhos_prontos:
+                    resultados.append(self.dobrar_unaria(atual, resultados.pop()))
+                else:
+                    pilha.append((atual, True))
+                    pilha.append((atual.operand, False))
+            else:
+                if tag == CHAMADA_SUBROTINA:
+                    atual.arguments = [self.otimizar_expressao(arg) for arg in atual.arguments]
+                resultados.append(atual)
+        return resultados[0]
+
+    def dobrar_binaria(self, node, left, right):
+        operator = node.operator
+        resultado = None
+        if left is not None and right is not None:
+            if left.TAG == LITERAL and right.TAG == LITERAL:
+                resultado = self.avaliar_binaria(operator, left, right)
+            if resultado is None:
+                resultado = self.simplificar(operator, left, right)
+        if resultado is not None:
+            self.dobras += 1
+            return resultado
+        if left is node.left and right is node.right:
+            return node
+        return BinaryExpression(operator, left, right, node.tipo)
+
+    def dobrar_unaria(self, node, operand):
+        if node.operator == "!" and _eh_booleano(operand):
+            self.dobras += 1
+            return _literal_booleano(operand.value == "False")
+        if operand is node.operand:
+            return node
+        return UnaryExpression(node.operator, operand, node.tipo)
+
+    def avaliar_binaria(self, operator, left, right):
+        """Calcula operator entre dois literais, ou retorna None se não puder dobrar"""
+        if operator in ("&&", "||"):
+            if _eh_booleano(left) and _eh_booleano(right):
+                a, b = left.value == "True", right.value == "True"
+                return _literal_booleano(a and b if operator == "&&" else a or b)
+            return None
+
+        if left.value_type == "texto" and right.value_type == "texto":
+            if operator not in OPERADORES_COMPARACAO:
+                return None
+            # O gerador de código remove as aspas internas dos literais de texto
+            a, b = left.value.replace("\"", ""), right.value.replace("\"", "")
+            return _literal_booleano(self.comparar(operator, a, b))
+
+        a, b = _valor_numerico(left), _valor_numerico(right)
+        if a is None or b is None:
+            return None
+        if operator in OPERADORES_COMPARACAO:
+            return _literal_booleano(self.comparar(operator, a, b))
+        if operator not in OPERADORES_ARITMETICOS:
+            return None
+        tipo = "real" if "real" in (left.value_type, right.value_type) else "inteiro"
+        if operator in ("/", "%") and b == 0:
+            return None
+        if operator == "/" and tipo == "inteiro":
+            return None
+        try:
+            if operator == "+":
+                valor = a + b
+            elif operator == "-":
+                valor = a - b
+            elif operator == "*":
+                valor = a * b
+            elif operator == "/":
+                valor = a / b
+            else:
+                valor = a % b
+        except OverflowError:
+            return None
+        return _literal_numerico(valor, tipo)
+
+    @staticmethod
+    def comparar(operator, a, b):
+        if operator == "==":
+            return a == b
+        if operator == "!=":
+            return a != b
+        if operator == ">":
+            return a > b
+        if operator == "<":
+            return a < b
+        if operator == ">=":
+            return a >= b
+        return a <= b
+
+    @staticmethod
+    def simplificar(operator, left, right):
+        """
+        Identidades algébricas. Só usa os literais inteiros 0 e 1, e só quando o outro
+        operando é numérico: com um booleano, (1 > 0) + 0 vale 1, e não True. Nunca
+        descarta uma expressão que seria avaliada.
+        """
+        if operator == "+":
+            if _eh_inteiro(right, "0") and _eh_numerico(left):
+                return left
+            if _eh_inteiro(left, "0") and _eh_numerico(right):
+                return right
+        elif operator == "-":
+            if _eh_inteiro(right, "0") and _eh_numerico(left):
+                return left
+        elif operator == "*":
+            if _eh_inteiro(right, "1") and _eh_numerico(left):
+                return left
+            if _eh_inteiro(left, "1") and _eh_numerico(right):
+                return right
+        elif operator == "&&":
+            # Como no Python: "True and x" vale x e "False and x" não avalia x
+            if _eh_booleano(left):
+                return right if left.value == "True" else left
+            if _eh_booleano(right, "True"):
+                return left
+        elif operator == "||":
+            if _eh_booleano(left):
+                return left if left.value == "True" else right
+            if _eh_booleano(right, "False"):
+                return left
+        return None
+
+def otimizar(ast):
+    """
+    Aplica o Otimizador à AST (no lugar).
+
+    Returns:
+        Tupla (ast, dobras), onde dobras é o número de nós substituídos.
+    """
+    otimizador = Otimizador()
+    otimizador.otimizar(ast)
+    return ast, otimizador.dobras
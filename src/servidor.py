@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor de compilação: um processo de longa duração que recebe código Coins por
+um socket Unix ou TCP local e devolve os diagnósticos e o código gerado, sem o
+custo de iniciar o Python e importar o compilador a cada compilação.
+
+O protocolo é JSON por linha (um objeto por linha, nos dois sentidos). Pedido:
+
+    {"id": 1, "source": "inteiro x; x = 1;", "options": {"optimize": true}}
+
+Resposta, com o mesmo id:
+
+    {"id": 1, "ok": true, "success": true, "code": "x = 0\\nx = 1",
+     "diagnostics": [{"fase": "semantica", "severidade": "aviso", "mensagem": "..."}], ...}
+
+Em caso de pedido inválido ou falha do compilador, a resposta tem "ok": false e
+"error". Pedidos {"op": "ping"} e {"op": "stats"} respondem sem compilar.
+
+Uso:
+    python3 src/servidor.py [--socket /tmp/coins.sock | --host 127.0.0.1 --port 8765]
+                            [--workers N] [--queue 64]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from compilador import compile_source, CompileOptions
+
+# Opções de CompileOptions aceitas em "options", com os tipos JSON de cada uma; as
+# demais gravariam arquivos ou produziriam resultados que não cabem em JSON
+OPCOES_PERMITIDAS = {
+    "generate_code": (bool,),
+    "max_errors": (int, type(None)),
+    "optimize": (bool,),
+    "partial_code": (bool,),
+    "source_map": (bool,),
+    "source_name": (str, type(None)),
+    "strip_comments": (bool,),
+}
+
+# Nome de cada tipo nas mensagens de PedidoInvalido
+NOMES_TIPOS = {bool: "booleano", int: "inteiro", str: "texto", type(None): "null"}
+
+# Tamanho máximo de uma linha do protocolo (um pedido inteiro)
+TAMANHO_MAXIMO_PEDIDO = 16 * 1024 * 1024
+
+PORTA_PADRAO = 8765
+
+# Programa compilado por cada processo ao iniciar, para que o primeiro pedido não
+# pague as importações e a criação das tabelas de despacho
+_PROGRAMA_AQUECIMENTO = """
+inteiro x;
+funcao dobro(inteiro a) retorna inteiro {
+    retorna a * 2;
+}
+se (x < 1) {
+    x = dobro(x + 1);
+}
+"""
+
+class PedidoInvalido(Exception):
+    """Pedido que não segue o protocolo; vira uma resposta com "ok": false"""
+
+def _aquecer():
+    compile_source(_PROGRAMA_AQUECIMENTO)
+
+def compilar_pedido(texto, opcoes):
+    """
+    Compila texto em um processo do pool e retorna a resposta serializável em JSON
+    (sem o id). Cada pedido tem a sua própria compilação e tabela de símbolos.
+    """
+    result = compile_source(texto, CompileOptions(**opcoes))
+    return {
+        "ok": True,
+        "success": result.success,
+        "code": result.code,
+        "source_map": result.source_map,
+        "diagnostics": [d.to_dict() for d in result.diagnostics.diagnosticos],
+        "suppressed": result.diagnostics.suprimidos,
+        "tokens": len(result.tokens),
+        "folded": result.folded,
+        "stubs": result.stubs,
+    }
+
+def validar_pedido(pedido):
+    """Retorna (texto, opções) de um pedido de compilação, ou levanta PedidoInvalido"""
+    if not isinstance(pedido, dict):
+        raise PedidoInvalido("o pedido deve ser um objeto JSON")
+    texto = pedido.get("source")
+    if not isinstance(texto, str):
+        raise PedidoInvalido("\"source\" deve ser o código fonte, como texto")
+    opcoes = pedido.get("options", {})
+    if not isinstance(opcoes, dict):
+        raise PedidoInvalido("\"options\" deve ser um objeto JSON")
+    desconhecidas = sorted(set(opcoes) - set(OPCOES_PERMITIDAS))
+    if desconhecidas:
+        raise PedidoInvalido(f"opções não suportadas: {', '.join(desconhecidas)}")
+    for nome, valor in opcoes.items():
+        # type() e não isinstance(): True e False são instâncias de int
+        tipos = OPCOES_PERMITIDAS[nome]
+        if type(valor) not in tipos:
+            esperado = " ou ".join(NOMES_TIPOS[tipo] for tipo in tipos)
+            raise PedidoInvalido(f"a opção \"{nome}\" deve ser {esperado}, não {json.dumps(valor)}")
+    return texto, opcoes
+
+class ServidorCompilacao:
+    """
+    Recebe pedidos de várias conexões e os distribui a um pool de processos já
+    aquecidos.
+
+    Os pedidos lidos entram em uma fila limitada, consumida por uma tarefa por
+    processo. Com a fila cheia, o servidor para de ler as conexões até que um
+    processo fique livre, e a pressão volta aos clientes pelo próprio socket. Uma
+    conexão pode enviar vários pedidos sem esperar as respostas, que chegam na
+    ordem em que as compilações terminam, identificadas pelo id.
+
+    Args:
+        workers: Número de processos (padrão: número de CPUs).
+        fila: Pedidos aceitos e ainda não entregues a um processo.
+    """
+
+    def __init__(self, workers=None, fila=64):
+        self.workers = workers or os.cpu_count() or 1
+        self.tamanho_fila = fila
+        self.fila = None  # Criada em iniciar(), no laço de eventos do servidor
+        self.executor = None
+        self.servidor = None
+        self._consumidores = []
+        self._conexoes = set()  # writers das conexões abertas
+        self.em_andamento = 0
+        self.atendidos = 0
+        self.falhas = 0
+
+    def _criar_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_aquecer)
+
+    async def iniciar(self, socket=None, host="127.0.0.1", porta=PORTA_PADRAO):
+        """Cria e aquece os processos e começa a aceitar conexões"""
+        self.fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        self.executor = self._criar_executor()
+        loop = asyncio.get_running_loop()
+        # Um pedido simultâneo por processo faz o pool iniciar todos eles agora
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _aquecer) for _ in range(self.workers)])
+        self._consumidores = [asyncio.create_task(self._consumir()) for _ in range(self.workers)]
+        if socket is not None:
+            if os.path.exists(socket):
+                os.unlink(socket)  # Deixado por um servidor que não foi encerrado
+            self.servidor = await asyncio.start_unix_server(self._atender, path=socket,
+                                                            limit=TAMANHO_MAXIMO_PEDIDO)
+        else:
+            self.servidor = await asyncio.start_server(self._atender, host, porta, limit=TAMANHO_MAXIMO_PEDIDO)
+
+    async def encerrar(self):
+        """Para de aceitar conexões, cancela os pedidos na fila e encerra os processos"""
+        if self.servidor is not None:
+            self.servidor.close()
+            # wait_closed também espera as conexões abertas (Python 3.12+)
+            for writer in list(self._conexoes):
+                writer.close()
+            await self.servidor.wait_closed()
+        for consumidor in self._consumidores:
+            consumidor.cancel()
+        await asyncio.gather(*self._consumidores, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def estado(self):
+        return {"workers": self.workers, "queued": self.fila.qsize(), "queue_size": self.tamanho_fila,
+                "running": self.em_andamento, "served": self.atendidos, "failed": self.falhas}
+
+    async def _consumir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            identificador, texto, opcoes, responder = await self.fila.get()
+            self.em_andamento += 1
+            executor = self.executor
+            try:
+                resposta = await loop.run_in_executor(executor, compilar_pedido, texto, opcoes)
+            except BrokenProcessPool:
+                # Um processo morreu (ex.: falta de memória); os próximos pedidos usam um
+                # pool novo, criado uma só vez mesmo que vários pedidos falhem juntos
+                self.falhas += 1
+                resposta = {"ok": False, "error": "o processo de compilação terminou inesperadamente"}
+                if self.executor is executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self._criar_executor()
+            except Exception as e:
+                self.falhas += 1
+                resposta = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            finally:
+                self.em_andamento -= 1
+            self.atendidos += 1
+            await responder(identificador, resposta)
+
+    async def _atender(self, reader, writer):
+        """Lê os pedidos de uma conexão até o cliente fechá-la"""
+        self._conexoes.add(writer)
+        pendentes = 0
+        encerrada = asyncio.Event()
+        encerrada.set()
+
+        async def responder(identificador, resposta):
+            nonlocal pendentes
+            resposta["id"] = identificador
+            if not writer.is_closing():
+                writer.write(json.dumps(resposta, ensure_ascii=False).encode("utf-8") + b"\n")
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+            pendentes -= 1
+            if not pendentes:
+                encerrada.set()
+
+        try:
+            while True:
+                try:
+                    linha = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    pendentes += 1
+                    encerrada.clear()
+                    await responder(None, {"ok": False, "error": "pedido maior que o limite do servidor"})
+                    break
+                if not linha:
+                    break
+                if not linha.strip():
+                    continue
+                pendentes += 1
+                encerrada.clear()
+                identificador = None
+                try:
+                    pedido = json.loads(linha)
+                    if isinstance(pedido, dict):
+                        identificador = pedido.get("id")
+                    operacao = pedido.get("op", "compile") if isinstance(pedido, dict) else "compile"
+                    if operacao == "ping":
+                        await responder(identificador, {"ok": True})
+                    elif operacao == "stats":
+                        await responder(identificador, {"ok": True, **self.estado()})
+                    elif operacao == "compile":
+                        texto, opcoes = validar_pedido(pedido)
+                        # Espera com a fila cheia: a conexão não é lida enquanto isso
+                        await self.fila.put((identificador, texto, opcoes, responder))
+                    else:
+                        raise PedidoInvalido(f"operação desconhecida: {operacao!r}")
+                except json.JSONDecodeError as e:
+                    await responder(identificador, {"ok": False, "error": f"JSON inválido: {e}"})
+                except PedidoInvalido as e:
+                    await responder(identificador, {"ok": False, "error": str(e)})
+            # Entrega as respostas dos pedidos ainda em compilação antes de fechar
+            await encerrada.wait()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._conexoes.discard(writer)
+            writer.close()
+
+async def servir(socket=None, host="127.0.0.1", porta=PORTA_PADRAO, workers=None, fila=64):
+    """Executa o servidor até ser interrompido"""
+    servidor = ServidorCompilacao(workers, fila)
+    await servidor.iniciar(socket, host, porta)
+    endereco = socket if socket is not None else f"{host}:{porta}"
+    print(f"✅ Servidor de compilação em {endereco} com {servidor.workers} processos (fila de {fila} pedidos)")
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sinal, parar.set)
+        except (NotImplementedError, RuntimeError):  # Windows: Ctrl+C levanta KeyboardInterrupt
+            pass
+    try:
+        await parar.wait()
+        print("Servidor encerrado.")
+    finally:
+        await servidor.encerrar()
+        if socket is not None and os.path.exists(socket):
+            os.unlink(socket)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de compilação da Linguagem-Coins")
+    parser.add_argument("--socket", default=None, help="Caminho do socket Unix (padrão: TCP em --host e --port)")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço TCP (padrão: %(default)s)")
+    parser.add_argument("--port", type=int, default=PORTA_PADRAO, help="Porta TCP (padrão: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de compilação (padrão: número de CPUs)")
+    parser.add_argument("--queue", type=int, default=64,
+                        help="Pedidos aguardando um processo antes de o servidor parar de ler as conexões (padrão: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(servir(args.socket, args.host, args.port, args.workers, args.queue))
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import sys
+
+
+class EntradaSimbolo:
+    """Tipo e valor de um identificador na tabela de símbolos"""
+    __slots__ = ("tipo", "valor")
+
+    def __init__(self, tipo="indefinido", valor=""):
+        self.tipo = tipo
+        self.valor = valor
+
+
+class TabelaSimbolos:
+    """
+    Tabela de símbolos de uma compilação.
+
+    Cada compilação cria a sua própria tabela e a repassa ao analisador léxico, ao
+    analisador semântico e a salvar_html, de modo que compilações no mesmo processo
+    não compartilham estado. Os nomes são internados, então o mesmo identificador
+    repetido no código fonte ocupa uma única string.
+    """
+    __slots__ = ("_entradas",)
+
+    def __init__(self):
+        self._entradas = {}
+
+    def registrar(self, nome):
+        """Registra um identificador encontrado pelo analisador léxico, com tipo indefinido"""
+        if nome not in self._entradas:
+            self._entradas[sys.intern(nome)] = EntradaSimbolo()
+
+    def definir(self, nome, tipo, valor=""):
+        """Define (ou redefine) o tipo e o valor de um identificador"""
+        entrada = self._entradas.get(nome)
+        if entrada is None:
+            self._entradas[sys.intern(nome)] = EntradaSimbolo(tipo, valor)
+        else:
+            entrada.tipo = tipo
+            entrada.valor = valor
+
+    def atualizar_valor(self, nome, valor):
+        """Atualiza o valor de um identificador já presente na tabela"""
+        entrada = self._entradas.get(nome)
+        if entrada is not None:
+            entrada.valor = valor
+
+    def get(self, nome):
+        return self._entradas.get(nome)
+
+    def items(self):
+        return self._entradas.items()
+
+    def __contains__(self, nome):
+        return nome in self._entradas
+
+    def __iter__(self):
+        return iter(self._entradas)
+
+    def __len__(self):
+        return len(self._entradas)
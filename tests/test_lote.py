@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Compilação em lote: cada arquivo grava os artefatos no seu próprio subdiretório"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from compilador import compilar_lote, caminhos_artefatos
+
+
+class TestDiretoriosDeSaida(unittest.TestCase):
+    def setUp(self):
+        self.temporario = tempfile.TemporaryDirectory()
+        self.fontes = os.path.join(self.temporario.name, "fontes")
+        self.saida = os.path.join(self.temporario.name, "saida")
+        os.makedirs(os.path.join(self.fontes, "sub"))
+
+    def tearDown(self):
+        self.temporario.cleanup()
+
+    def escrever(self, relativo, texto):
+        caminho = os.path.join(self.fontes, relativo)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(texto)
+        return caminho
+
+    def test_arquivos_que_so_diferem_na_extensao(self):
+        arquivos = [self.escrever("a.coins", "inteiro x; x = 1;"),
+                    self.escrever("a.txt", "inteiro y; y = 2;"),
+                    self.escrever("sub/b.coins", "inteiro z; z = 3;")]
+        resumos = compilar_lote(arquivos, self.saida, jobs=2)
+
+        destinos = [resumo["output_dir"] for resumo in resumos]
+        self.assertEqual(destinos, [os.path.join(self.saida, "a.coins"), os.path.join(self.saida, "a.txt"),
+                                    os.path.join(self.saida, "sub", "b")])
+        self.assertTrue(all(resumo["sucesso"] for resumo in resumos))
+        for destino, variavel in zip(destinos, "xyz"):
+            with open(caminhos_artefatos(destino)["codigo_gerado_py"], encoding="utf-8") as f:
+                self.assertIn(f"{variavel} = ", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Máquina virtual: subrotinas aninhadas que usam variáveis das subrotinas externas"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from compilador import compile_source
+from gerador_bytecode import gerar_bytecode
+from maquina_virtual import executar
+
+PROGRAMAS = {
+    "leitura": """
+inteiro r;
+funcao f() retorna inteiro {
+    inteiro a;
+    a = 3;
+    funcao g() retorna inteiro {
+        retorna a;
+    }
+    retorna g();
+}
+r = f();
+""",
+    "escrita": """
+inteiro r;
+funcao f() retorna inteiro {
+    inteiro a;
+    a = 3;
+    procedimento g() {
+        a = a + 4;
+    }
+    g();
+    retorna a;
+}
+r = f();
+""",
+    "tres_niveis": """
+inteiro r;
+funcao f(inteiro n) retorna inteiro {
+    inteiro a;
+    a = n;
+    funcao g(inteiro m) retorna inteiro {
+        inteiro b;
+        b = m * 10;
+        funcao h() retorna inteiro {
+            a = a + 1;
+            retorna a + b;
+        }
+        procedimento irma() {
+            b = b + h();
+        }
+        irma();
+        retorna b;
+    }
+    retorna g(2) + a;
+}
+r = f(5);
+""",
+    "recursao": """
+inteiro r;
+funcao f(inteiro n) retorna inteiro {
+    inteiro total;
+    total = 0;
+    procedimento acumula(inteiro k) {
+        total = total + k;
+        se (k > 1) {
+            acumula(k - 1);
+        }
+    }
+    se (n > 0) {
+        acumula(n);
+        total = total + f(n - 1);
+    }
+    retorna total;
+}
+r = f(4);
+""",
+    "operando_alterado_pela_chamada": """
+inteiro r;
+funcao f() retorna inteiro {
+    inteiro a;
+    a = 1;
+    funcao g() retorna inteiro {
+        a = 100;
+        retorna 2;
+    }
+    retorna a + g() + a;
+}
+r = f();
+""",
+}
+
+
+def executar_codigo(codigo):
+    variaveis = {}
+    exec(codigo, variaveis)
+    return variaveis["r"]
+
+
+class TestSubrotinasAninhadas(unittest.TestCase):
+    def test_mesmo_resultado_do_codigo_gerado(self):
+        for nome, programa in PROGRAMAS.items():
+            with self.subTest(programa=nome):
+                resultado = compile_source(programa)
+                self.assertTrue(resultado.success, resultado.diagnostics.mensagens())
+                esperado = executar_codigo(resultado.code)
+                self.assertEqual(executar_codigo(gerar_bytecode(resultado.ast)), esperado)
+                self.assertEqual(executar(resultado.ast)["r"], esperado)
+
+    def test_valores(self):
+        valores = {nome: executar(compile_source(programa).ast)["r"] for nome, programa in PROGRAMAS.items()}
+        self.assertEqual(valores["leitura"], 3)
+        self.assertEqual(valores["escrita"], 7)
+        self.assertEqual(valores["operando_alterado_pela_chamada"], 103)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Identidades do otimizador: -O não pode mudar o valor nem o tipo de um programa"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from compilador import compile_source, CompileOptions
+from gerador_bytecode import gerar_bytecode
+from maquina_virtual import MaquinaVirtual, traduzir
+
+PROGRAMA = """
+inteiro a;
+inteiro q;
+inteiro w;
+inteiro z;
+real r;
+a = 3;
+q = (1 > 0) + 0;
+w = (a > 2) * 1;
+z = 1 * (a < 2) + 0 + (a * 1 + 0);
+r = 2.5 * 1 + 0;
+a = 0 + a * 1;
+"""
+
+VARIAVEIS = ("a", "q", "w", "z", "r")
+
+
+def executar_codigo(codigo):
+    variaveis = {}
+    exec(codigo, variaveis)
+    return {nome: variaveis[nome] for nome in VARIAVEIS}
+
+
+class TestIdentidades(unittest.TestCase):
+    def setUp(self):
+        self.normal = compile_source(PROGRAMA)
+        self.otimizado = compile_source(PROGRAMA, CompileOptions(optimize=True))
+        self.assertTrue(self.otimizado.success)
+
+    def assertValoresIguais(self, obtidos, esperados):
+        self.assertEqual(obtidos, esperados)
+        for nome in VARIAVEIS:
+            self.assertIs(type(obtidos[nome]), type(esperados[nome]), nome)
+
+    def test_booleano_nao_e_devolvido_pela_identidade(self):
+        esperados = executar_codigo(self.normal.code)
+        self.assertEqual(esperados["q"], 1)
+        self.assertValoresIguais(executar_codigo(self.otimizado.code), esperados)
+        self.assertValoresIguais(executar_codigo(gerar_bytecode(self.otimizado.ast)), esperados)
+        self.assertValoresIguais(MaquinaVirtual(traduzir(self.otimizado.ast)).executar(), esperados)
+
+    def test_operandos_numericos_sao_simplificados(self):
+        linhas = self.otimizado.code.splitlines()
+        self.assertIn("r = 2.5", linhas)
+        self.assertIn("a = a", linhas)
+        self.assertIn("z = ((1 * (a < 2)) + a)", linhas)
+
+
+if __name__ == "__main__":
+    unittest.main()
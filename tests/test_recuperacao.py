@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Recuperação de erros do analisador sintático: os erros reportados, os erros em
+cascata suprimidos e os comandos analisados depois de cada erro.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from analisador_lexico import analise_lexica
+from analisador_sintatico import Parser
+from simbolos import TabelaSimbolos
+
+ESPERADO_OPERANDO = "Erro de sintaxe: Esperado NUMERO, ID, STRING, ABRE_PAREN ou '!', encontrado "
+
+
+def analisar(texto):
+    fluxo, erros_lexicos = analise_lexica(texto, TabelaSimbolos())
+    parser = Parser(fluxo)
+    ast = parser.parse()
+    return parser, ast, len(fluxo)
+
+
+def atribuicoes(ast):
+    """(variável, valor literal) das atribuições de nível superior, em ordem"""
+    return [(node.variable, node.value.value) for node in ast.body if node.type == "Atribuicao"]
+
+
+class TestRecuperacao(unittest.TestCase):
+    def assertAnalisado(self, texto, erros, valores, suprimidos=0):
+        parser, ast, tokens = analisar(texto)
+        self.assertEqual(parser.errors, erros)
+        self.assertEqual(parser.suprimidos, suprimidos)
+        self.assertEqual(atribuicoes(ast), valores)
+        self.assertEqual(parser.current_token_index, tokens)
+        return ast
+
+    def test_operando_ausente_nao_descarta_o_comando_seguinte(self):
+        self.assertAnalisado("inteiro x;\nx = ;\nx = 2;\n",
+                             [ESPERADO_OPERANDO + "PONTO_VIRGULA (linha 2, coluna 5)"],
+                             [("x", "2")])
+
+    def test_continua_depois_de_cada_erro(self):
+        self.assertAnalisado(
+            "inteiro x;\nx = ;\nx = 1;\nse (x > ) { x = 2; }\nx = 3;\nenquanto x < 1 { }\nx = 4;\n",
+            [ESPERADO_OPERANDO + "PONTO_VIRGULA (linha 2, coluna 5)",
+             ESPERADO_OPERANDO + "FECHA_PAREN (linha 4, coluna 9)",
+             "Erro de sintaxe: Esperado ABRE_PAREN, encontrado ID (linha 6, coluna 10)"],
+            [("x", "1"), ("x", "3"), ("x", "4")],
+            suprimidos=2)
+
+    def test_chave_que_fecha_o_bloco_nao_e_descartada(self):
+        ast = self.assertAnalisado("inteiro x;\nse (x > 1) {\n    x = \n}\nx = 5;\n",
+                                   [ESPERADO_OPERANDO + "FECHA_CHAVE (linha 4, coluna 1)"],
+                                   [("x", "5")])
+        self.assertEqual([node.type for node in ast.body], ["Declaracao", "Condicional", "Atribuicao"])
+        self.assertEqual(ast.body[1].consequent, [])
+
+    def test_erros_em_cascata_sao_suprimidos(self):
+        self.assertAnalisado("inteiro x;\nse x > 1 { x = 1; }\nx = 5;\n",
+                             ["Erro de sintaxe: Esperado ABRE_PAREN, encontrado ID (linha 2, coluna 4)"],
+                             [("x", "5")], suprimidos=1)
+
+    def test_corpo_de_subrotina_com_cabecalho_invalido_e_descartado(self):
+        self.assertAnalisado("funcao f(inteiro) retorna inteiro {\n    x = 1;\n}\ninteiro x;\nx = 3;\n",
+                             ["Erro de sintaxe: Esperado ID, encontrado FECHA_PAREN (linha 1, coluna 17)"],
+                             [("x", "3")])
+
+    def test_bloco_fora_de_lugar_e_descartado(self):
+        self.assertAnalisado("inteiro x;\n{ x = 1; }\nx = 2;\n",
+                             ["Erro de sintaxe: Bloco inesperado no início de uma declaração ou comando. "
+                              "O bloco foi ignorado. (linha 2, coluna 1)"],
+                             [("x", "2")])
+
+    def test_fluxos_aleatorios_sao_lidos_ate_o_fim(self):
+        lexemas = ["x", "1", '"t"', "inteiro", "se", "senao", "enquanto", "funcao", "procedimento", "retorna",
+                   "+", "*", "<", "&&", "!", "=", ";", ",", "(", ")", "{", "}"]
+        for semente in range(20):
+            with self.subTest(semente=semente):
+                aleatorio = random.Random(semente)
+                parser, _, tokens = analisar(" ".join(aleatorio.choices(lexemas, k=2000)) + "\nx = 1;")
+                self.assertEqual(parser.current_token_index, tokens)
+                self.assertTrue(parser.errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
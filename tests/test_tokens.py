@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""--tokens: os tokens de gerar_tokens, um objeto JSON por linha"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from compilador import listar_tokens
+
+
+class TestListarTokens(unittest.TestCase):
+    def listar(self, texto):
+        with tempfile.NamedTemporaryFile("w", suffix=".coins", encoding="utf-8", delete=False) as f:
+            f.write(texto)
+        try:
+            saida = io.StringIO()
+            codigo = listar_tokens(f.name, saida)
+        finally:
+            os.unlink(f.name)
+        return codigo, [json.loads(linha) for linha in saida.getvalue().splitlines()]
+
+    def test_posicoes_e_valores(self):
+        codigo, tokens = self.listar('inteiro x;\n// comentário\ntexto t; t = "olá";')
+        self.assertEqual(codigo, 0)
+        self.assertEqual(tokens[0], {"tipo": "TIPO", "valor": "inteiro", "linha": 1, "coluna": 1})
+        self.assertEqual(tokens[1], {"tipo": "ID", "valor": "x", "linha": 1, "coluna": 9})
+        self.assertEqual(tokens[3], {"tipo": "TIPO", "valor": "texto", "linha": 3, "coluna": 1})
+        self.assertEqual(tokens[-2], {"tipo": "STRING", "valor": '"olá"', "linha": 3, "coluna": 14})
+
+    def test_erro_lexico(self):
+        codigo, tokens = self.listar("inteiro x;\nx = 1 @ 2;")
+        self.assertEqual(codigo, 1)
+        self.assertNotIn("@", [token["valor"] for token in tokens])
+
+
+if __name__ == "__main__":
+    unittest.main()